@@ -19,6 +19,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     # External libraries
     'rest_framework',
@@ -85,6 +86,29 @@ DATABASES = {
     }
 }
 
+# Kesh sozlamalari
+# Bir nechta worker ishlaganda katalog keshini bekor qilish to‘g‘ri ishlashi uchun
+# umumiy kesh (Redis) kerak. REDIS_URL berilmasa, lokal xotira keshi ishlatiladi.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'smartlife',
+        }
+    }
+
+# Katalog javoblari keshda qancha turadi (soniya)
+CATALOG_CACHE_TIMEOUT = 60 * 15
+# Like lar ro‘yxat keshlari va ETag larida ko‘pi bilan shuncha soniya eskirgan bo‘ladi
+CATALOG_LIKES_REFRESH_INTERVAL = 60
+
 # Parol validatsiyasi
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -126,6 +150,20 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Savatdagi mahsulot qancha vaqt band qilib turiladi (soniya), orders/inventory.py
+STOCK_RESERVATION_TTL = 60 * 15
+
+# Anonim savat saqlash backend i (orders/cart_storage.py) va keshdagi umri (soniya).
+# Eski xatti-harakat (har bir anonim savat bazada): 'orders.cart_storage.DatabaseCartStore'
+ANONYMOUS_CART_STORE = 'orders.cart_storage.CacheCartStore'
+ANONYMOUS_CART_TTL = 60 * 60 * 24 * 7
+
+# Idempotency-Key javoblari qancha saqlanadi (soniya), purge_idempotency_keys buyrug‘i uchun
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24
+
+# Rasm derivativlarini (thumbnail/WebP) yaratuvchi jarayonlar soni
+IMAGE_DERIVATIVE_WORKERS = 2
+
 # Default primary key turi
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -25,28 +25,37 @@ class DeliveryOptionAdmin(admin.ModelAdmin):
 class PromoCodeAdmin(admin.ModelAdmin):
     list_display = (
         'code', 'discount_type', 'amount',
-        'valid_until', 'is_active', 'used_count'
+        'valid_until', 'is_active', 'is_valid', 'usage', 'shard_count'
     )
-    list_filter = ('discount_type',)
+    list_filter = ('discount_type', 'is_active')
     search_fields = ('code',)
     ordering = ('-valid_until',)
-    readonly_fields = ('used_count',)
+    readonly_fields = ('usage',)
 
     # Ma'lumotlarni guruhlab ko‘rsatish
     fieldsets = (
         ('PromoCode maʼlumotlari', {
-            'fields': ('code', 'discount_type', 'amount')
+            'fields': ('code', 'discount_type', 'amount', 'min_order_amount')
         }),
         ('Muddati va holati', {
-            'fields': ('valid_until', 'used_count')
+            'fields': ('valid_from', 'valid_until', 'is_active')
+        }),
+        ('Foydalanish', {
+            'fields': ('usage_limit', 'usage', 'shard_count')
         }),
     )
 
-    def is_active(self, obj):
-        # PromoCode aktivligini boolean ko‘rinishda ko‘rsatadi
+    def is_valid(self, obj):
+        # PromoCode hozir ishlatilishi mumkinligini boolean ko‘rinishda ko‘rsatadi
         return obj.is_valid()
-    is_active.boolean = True
-    is_active.short_description = "Aktivmi?"
+    is_valid.boolean = True
+    is_valid.short_description = "Amal qiladimi?"
+
+    def usage(self, obj):
+        # Shardlangan kodlarda bo‘laklar yig‘indisi bilan
+        used = obj.get_used_count()
+        return f"{used} / {obj.usage_limit}" if obj.usage_limit is not None else used
+    usage.short_description = "Ishlatilgan"
 
     def get_queryset(self, request):
         # Admin ro‘yxatini muddati bo‘yicha kamayish tartibida ko‘rsatadi
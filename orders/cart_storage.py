@@ -0,0 +1,294 @@
+"""
+Savat saqlash backend lari. View lar savat bilan faqat `get_cart_store(request)` orqali ishlaydi.
+
+- DatabaseCartStore: Cart/CartItem jadvallari, hold lar bilan (login foydalanuvchilar uchun doim).
+- CacheCartStore: anonim savat Django keshida ixcham qatorlar ro‘yxati sifatida, TTL bilan.
+  Bazaga faqat login paytida yoziladi (persist → merge_session_cart); tashlab ketilgan savatlar
+  jadvallarda qolmaydi, kesh ularni o‘zi unutadi. O‘qib-yozish `cache.add` qulfi ostida —
+  bir vaqtdagi so‘rovlar bir-birining qatorlarini yo‘qotmaydi.
+
+Anonim savat backend i ANONYMOUS_CART_STORE sozlamasida (import yo‘li).
+"""
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import Http404
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from products.models import Accessory, Bundle, ProductVariant
+from .inventory import InsufficientStock, hold_stock, release_cart
+from .models import Cart, CartItem
+from .utils import get_or_create_cart, line_key, load_cart, load_cart_item
+
+
+class CartBusy(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Savat boshqa so‘rov bilan yangilanmoqda, qayta urinib ko‘ring."
+    default_code = "cart_busy"
+
+
+def get_cart_store(request):
+    if request.user.is_authenticated:
+        return DatabaseCartStore(request)
+    return get_anonymous_cart_store(request)
+
+
+def get_anonymous_cart_store(request):
+    path = getattr(settings, "ANONYMOUS_CART_STORE", "orders.cart_storage.CacheCartStore")
+    return import_string(path)(request)
+
+
+class DatabaseCartStore:
+    def __init__(self, request):
+        self.request = request
+
+    @property
+    def cart(self):
+        if not hasattr(self, "_cart"):
+            self._cart = get_or_create_cart(self.request)
+        return self._cart
+
+    def load(self):
+        return load_cart(self.cart)
+
+    def add(self, variant, bundle, accessory, quantity):
+        # Qoldiq yetmasa qator o‘zgarishi ham bekor qilinadi
+        with transaction.atomic():
+            # Parallel qo‘shishlar bir-birining miqdorini yo‘qotmaydi (hold_stock ham shu qulfni oladi)
+            self._lock()
+            item, created = CartItem.objects.get_or_create(
+                cart=self.cart,
+                variant=variant,
+                bundle=bundle,
+                accessory=accessory
+            )
+            item.quantity = item.quantity + quantity if not created else quantity
+            item.save()
+            if variant:
+                hold_stock(self.cart, variant.pk)
+        return load_cart_item(item)
+
+    def update(self, item_id, quantity):
+        with transaction.atomic():
+            self._lock()
+            item = self._get_item(item_id)
+            item.quantity = quantity
+            item.save()
+            if item.variant_id:
+                hold_stock(self.cart, item.variant_id)
+        return load_cart_item(item)
+
+    def remove(self, item_id):
+        with transaction.atomic():
+            self._lock()
+            item = self._get_item(item_id)
+            item.delete()
+            if item.variant_id:
+                hold_stock(self.cart, item.variant_id)
+
+    def clear(self):
+        with transaction.atomic():
+            self._lock()
+            self.cart.items.all().delete()
+            release_cart(self.cart)
+
+    def persist(self):
+        # Qatorlar allaqachon bazada — login da bo‘sh sessiya savati yaratilmaydi va qulflanmaydi
+        return None
+
+    def _lock(self):
+        Cart.objects.select_for_update().filter(pk=self.cart.pk).exists()
+
+    def _get_item(self, item_id):
+        try:
+            return CartItem.objects.get(pk=item_id, cart=self.cart)
+        except (CartItem.DoesNotExist, ValueError, TypeError):
+            raise Http404
+
+
+class SessionCart:
+    """Keshdagi anonim savat: CartSerializer uchun Cart bilan bir xil o‘qish interfeysi (id yo‘q)."""
+    id = None
+
+    def __init__(self, items):
+        self.items = items
+        self.computed_total = sum(item.computed_subtotal for item in items)
+
+    def total_price(self):
+        return self.computed_total
+
+
+class CacheCartStore:
+    """
+    Keshdagi qiymat: {"next": keyingi qator id si, "lines": [[id, variant_id, bundle_id, accessory_id, quantity], ...]}.
+    Keshda turgan savatga hold qo‘yilmaydi — ular persist() da (login) qo‘yiladi, qoldiq esa
+    checkout dagi shartli UPDATE da baribir tekshiriladi (orders/inventory.py).
+    """
+    key_prefix = "cart:session:"
+    # Qulf egasi yiqilsa ham shu muddatdan keyin bo‘shaydi; kutish ham shu muddat bilan cheklangan
+    lock_timeout = 5
+    lock_poll_interval = 0.01
+
+    def __init__(self, request):
+        self.request = request
+
+    @property
+    def session_key(self):
+        if not self.request.session.session_key:
+            self.request.session.create()
+        return self.request.session.session_key
+
+    @property
+    def cache_key(self):
+        return f"{self.key_prefix}{self.session_key}"
+
+    def read(self):
+        return cache.get(self.cache_key) or {"next": 1, "lines": []}
+
+    def write(self, data):
+        cache.set(self.cache_key, data, getattr(settings, "ANONYMOUS_CART_TTL", 60 * 60 * 24 * 7))
+
+    @contextmanager
+    def locked(self):
+        """
+        Savat kaliti uchun `cache.add` qulfi (add atomar: Redis da SET NX). Qulf lock_timeout
+        ichida olinmasa CartBusy. Bo‘shatishda token tekshiriladi — muddati o‘tib boshqa so‘rovga
+        o‘tgan qulf o‘chirilmaydi.
+        """
+        if getattr(self, "_lock_held", False):
+            # Qayta kirish: masalan, persist() tranzaksiyadan tashqarida — on_commit(clear) qulf ichida bajariladi
+            yield
+            return
+        lock_key = f"{self.cache_key}:lock"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_timeout
+        while not cache.add(lock_key, token, self.lock_timeout):
+            if time.monotonic() >= deadline:
+                raise CartBusy()
+            time.sleep(self.lock_poll_interval)
+        self._lock_held = True
+        try:
+            yield
+        finally:
+            self._lock_held = False
+            if cache.get(lock_key) == token:
+                cache.delete(lock_key)
+
+    def load(self):
+        return SessionCart(self.build_items(self.read()["lines"]))
+
+    def add(self, variant, bundle, accessory, quantity):
+        key = [variant.pk if variant else None, bundle.pk if bundle else None, accessory.pk if accessory else None]
+        with self.locked():
+            data = self.read()
+            line = next((line for line in data["lines"] if line[1:4] == key), None)
+            if line:
+                line[4] += quantity
+            else:
+                line = [data["next"], *key, quantity]
+                data["lines"].append(line)
+                data["next"] += 1
+            self.write(data)
+        return self.build_items([line])[0]
+
+    def update(self, item_id, quantity):
+        with self.locked():
+            data = self.read()
+            line = self._get_line(data, item_id)
+            line[4] = quantity
+            self.write(data)
+        return self.build_items([line])[0]
+
+    def remove(self, item_id):
+        with self.locked():
+            data = self.read()
+            data["lines"].remove(self._get_line(data, item_id))
+            self.write(data)
+
+    def clear(self):
+        with self.locked():
+            cache.delete(self.cache_key)
+
+    def persist(self):
+        """
+        Keshdagi savatni sessiya Cart qatoriga yozadi va keshdan o‘chiradi (merge_session_cart dan
+        oldin chaqiriladi). Qatorlar bazadagi kalit (line_key) bo‘yicha yig‘iladi: (variant, bundle)
+        bir xil, aksessuari farqli qatorlar va shu sessiya savatida allaqachon bor qatorlar
+        unique_together ni buzmaydi — miqdorlar qo‘shiladi. Savat bazaga tushgach variantlarga
+        hold qo‘yiladi (qoldiq yetmagan variant hold siz qoladi — login buzilmaydi).
+        Qaytaradi: Cart yoki savat bo‘sh bo‘lsa None.
+        """
+        if not self.request.session.session_key:
+            return None
+        with self.locked():
+            return self._persist()
+
+    def _persist(self):
+        # build_items — o‘chirilgan mahsulot qatorlari FK xatosiga olib kelmasin
+        items = self.build_items(self.read()["lines"])
+        if not items:
+            return None
+        with transaction.atomic():
+            cart, _ = Cart.objects.get_or_create(session_key=self.session_key, user=None)
+            Cart.objects.select_for_update().filter(pk=cart.pk).exists()
+            lines = {
+                line_key(item.variant_id, item.bundle_id, item.accessory_id): item
+                for item in CartItem.objects.filter(cart=cart)
+            }
+            for item in items:
+                key = line_key(item.variant_id, item.bundle_id, item.accessory_id)
+                if key in lines:
+                    lines[key].quantity += item.quantity
+                else:
+                    item.pk, item.cart = None, cart
+                    lines[key] = item
+            # pk li — bazada bor qatorlar (miqdor oshgan), pk siz — yangilari
+            CartItem.objects.bulk_update([item for item in lines.values() if item.pk], ["quantity"])
+            CartItem.objects.bulk_create([item for item in lines.values() if not item.pk])
+            for variant_id in sorted({item.variant_id for item in lines.values() if item.variant_id}):
+                try:
+                    hold_stock(cart, variant_id)
+                except InsufficientStock:
+                    # Qator qoladi — qoldiq checkout dagi shartli UPDATE da baribir tekshiriladi
+                    pass
+            transaction.on_commit(self.clear)
+        return cart
+
+    @staticmethod
+    def build_items(lines):
+        """
+        Qatorlardan saqlanmagan CartItem lar yasaydi: variant, bundle va aksessuarlar
+        har biri bitta so‘rovda (load_cart bilan bir xil reja). O‘chirilgan mahsulot qatorlari tashlab ketiladi.
+        """
+        variants = ProductVariant.objects.select_related("product", "color", "memory").in_bulk(
+            {line[1] for line in lines if line[1]}
+        )
+        bundles = Bundle.objects.in_bulk({line[2] for line in lines if line[2]})
+        accessories = Accessory.objects.in_bulk({line[3] for line in lines if line[3]})
+
+        items = []
+        for pk, variant_id, bundle_id, accessory_id, quantity in lines:
+            variant, bundle, accessory = variants.get(variant_id), bundles.get(bundle_id), accessories.get(accessory_id)
+            if not (variant or bundle or accessory):
+                continue
+            item = CartItem(pk=pk, variant=variant, bundle=bundle, accessory=accessory, quantity=quantity)
+            item.computed_subtotal = item.subtotal
+            items.append(item)
+        return items
+
+    @staticmethod
+    def _get_line(data, item_id):
+        try:
+            item_id = int(item_id)
+        except (TypeError, ValueError):
+            raise Http404
+        line = next((line for line in data["lines"] if line[0] == item_id), None)
+        if line is None:
+            raise Http404
+        return line
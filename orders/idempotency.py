@@ -0,0 +1,81 @@
+"""
+Idempotency-Key sarlavhasi: tarmoq uzilib, mijoz so‘rovni qayta yuborganda ish ikkinchi marta bajarilmaydi.
+
+Kalit yozuvi ishning o‘zi bilan bitta tranzaksiyada yaratiladi. Bir vaqtdagi takroriy so‘rovning
+INSERT i unique indeksda birinchisi commit (yoki rollback) bo‘lguncha kutadi, so‘ng saqlangan javobni
+qaytaradi. Ish xato bilan tugasa tranzaksiya bekor bo‘ladi va kalit qayta ishlatilishi mumkin.
+
+Faqat autentifikatsiyalangan so‘rovlar: ularning savati bazada (DatabaseCartStore). Anonim savat
+keshda (CacheCartStore) — kesh yozuvlari rollback bilan bekor bo‘lmaydi va qayta urinish ularni
+ikki marta qo‘llagan bo‘lardi, shuning uchun anonim so‘rovlar dekoratorsiz kabi bajariladi.
+"""
+import hashlib
+import json
+from functools import wraps
+
+from django.db import transaction
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.renderers import JSONRenderer
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = "Idempotency-Key boshqa so‘rov tanasi bilan ishlatilgan."
+    default_code = "idempotency_key_reused"
+
+
+def _scope(request):
+    # Kalit foydalanuvchi va endpoint doirasida yagona; anonim so‘rovlar uchun None (modul izohi)
+    if not request.user.is_authenticated:
+        return None
+    return f"user:{request.user.pk}:{request.method}:{request.path}"
+
+
+def _sha256(value):
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+def idempotent(handler):
+    """
+    View metodi uchun dekorator. Sarlavha bo‘lmasa yoki so‘rov anonim bo‘lsa odatdagidek ishlaydi.
+    Muvaffaqiyatli (5xx bo‘lmagan) javob saqlanadi va takrorda qayta bajarilmasdan qaytariladi.
+    """
+    @wraps(handler)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        scope = _scope(request) if key else None
+        if not scope:
+            return handler(self, request, *args, **kwargs)
+        if len(key) > 255:
+            raise ValidationError({IDEMPOTENCY_HEADER: "Kalit 255 belgidan oshmasligi kerak."})
+
+        key_hash = _sha256(f"{scope}:{key}")
+        fingerprint = _sha256(json.dumps(request.data, sort_keys=True, default=str))
+        with transaction.atomic():
+            record, created = IdempotencyKey.objects.get_or_create(
+                key_hash=key_hash, defaults={"fingerprint": fingerprint, "status_code": 0},
+            )
+            if not created:
+                if record.fingerprint != fingerprint:
+                    raise IdempotencyKeyReused()
+                response = HttpResponse(record.response_body, status=record.status_code, content_type="application/json")
+                response["Idempotent-Replayed"] = "true"
+                return response
+
+            response = handler(self, request, *args, **kwargs)
+            if response.status_code >= 500:
+                # Kalit saqlanmaydi — mijoz qayta urinib ko‘rishi mumkin
+                transaction.set_rollback(True)
+                return response
+            record.status_code = response.status_code
+            record.response_body = JSONRenderer().render(response.data).decode()
+            record.save(update_fields=["status_code", "response_body"])
+        return response
+
+    return wrapper
@@ -0,0 +1,151 @@
+"""
+Ombor qoldig‘ini band qilish (reservation) qatlami.
+
+Savatga qo‘shilgan variant uchun TTL li hold qo‘yiladi: ProductVariant.reserved shartli
+UPDATE bilan oshiriladi (`WHERE stock >= reserved + n`), shuning uchun o‘qib-yozish poygasi
+va ortiqcha sotuv bo‘lmaydi. Checkout hold larni bitta shartli UPDATE bilan qoldiqdan
+ayiradi, muddati o‘tgan hold larni `release_expired_reservations` buyrug‘i bo‘shatadi.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Q, Sum, When
+from django.db.models.functions import Greatest, Now
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from products.models import Product, ProductVariant
+from .models import Cart, CartItem, StockReservation
+
+
+class InsufficientStock(ValidationError):
+    default_detail = "Omborda yetarli mahsulot yo‘q."
+    default_code = "insufficient_stock"
+
+
+def reservation_expiry():
+    return timezone.now() + timedelta(seconds=getattr(settings, "STOCK_RESERVATION_TTL", 60 * 15))
+
+
+def _decrement_reserved(quantities):
+    # {variant_id: n} — barcha variantlar uchun bitta UPDATE
+    if not quantities:
+        return
+    ProductVariant.objects.filter(pk__in=quantities).update(reserved=Case(
+        *[When(pk=pk, then=Greatest(F("reserved") - quantity, 0)) for pk, quantity in quantities.items()],
+    ))
+
+
+def hold_stock(cart, variant_id):
+    """
+    Savatdagi variant miqdoriga (barcha qatorlar yig‘indisi) mos hold qo‘yadi yoki yangilaydi
+    va muddatini uzaytiradi. Yetarli bo‘sh qoldiq bo‘lmasa InsufficientStock.
+    """
+    with transaction.atomic():
+        # Savat qatori qulflanadi: bir savatning hold lari ketma-ket yangilanadi, yig‘indi qulfdan
+        # keyin o‘qiladi (eskirgan miqdordan delta hisoblanmaydi) va hold ni ikki oqim birga yaratmaydi
+        Cart.objects.select_for_update().filter(pk=cart.pk).exists()
+        quantity = CartItem.objects.filter(cart=cart, variant_id=variant_id).aggregate(
+            total=Sum("quantity")
+        )["total"] or 0
+        reservation = StockReservation.objects.select_for_update().filter(cart=cart, variant_id=variant_id).first()
+        delta = quantity - (reservation.quantity if reservation else 0)
+        if delta > 0:
+            reserved = ProductVariant.objects.filter(pk=variant_id, stock__gte=F("reserved") + delta).update(
+                reserved=F("reserved") + delta
+            )
+            if not reserved:
+                raise InsufficientStock()
+        elif delta < 0:
+            _decrement_reserved({variant_id: -delta})
+
+        if not quantity:
+            if reservation:
+                reservation.delete()
+        elif reservation:
+            reservation.quantity = quantity
+            reservation.expires_at = reservation_expiry()
+            reservation.save(update_fields=["quantity", "expires_at"])
+        else:
+            StockReservation.objects.create(
+                cart=cart, variant_id=variant_id, quantity=quantity, expires_at=reservation_expiry()
+            )
+
+
+def release_cart(cart):
+    """Savatning barcha hold larini bo‘shatadi (savat tozalanganda)."""
+    with transaction.atomic():
+        reservations = list(StockReservation.objects.select_for_update().filter(cart=cart))
+        _decrement_reserved({reservation.variant_id: reservation.quantity for reservation in reservations})
+        StockReservation.objects.filter(pk__in=[reservation.pk for reservation in reservations]).delete()
+
+
+def commit_stock(cart, items):
+    """
+    Checkout: savat qatorlari miqdorini qoldiqdan bitta shartli UPDATE bilan ayiradi.
+    Savatning o‘z hold lari `reserved` dan chiqariladi; hold muddati o‘tib bo‘shatilgan bo‘lsa,
+    miqdor boshqa savatlarning hold laridan tashqaridagi qoldiqdan olinadi.
+    Chaqiruvchi tranzaksiya ichida bo‘lishi kerak.
+    """
+    needed = defaultdict(int)
+    products = defaultdict(int)
+    for item in items:
+        if item.variant_id:
+            needed[item.variant_id] += item.quantity
+            products[item.variant.product_id] += item.quantity
+    if not needed:
+        return
+
+    # Hold qatorlari qulflanadi — sweeper ularni shu payt bo‘shatib yubormaydi (skip_locked)
+    held = dict(
+        StockReservation.objects.select_for_update().filter(cart=cart).values_list("variant_id", "quantity")
+    )
+    # Variant qatorlari pk tartibida qulflanadi — bir-biriga kesishgan savatlar deadlock bermaydi
+    list(ProductVariant.objects.select_for_update().filter(pk__in=needed).order_by("pk").values_list("pk", flat=True))
+    condition = reduce(or_, [
+        Q(pk=pk, stock__gte=F("reserved") - held.get(pk, 0) + quantity) for pk, quantity in needed.items()
+    ])
+    updated = ProductVariant.objects.filter(condition).update(
+        stock=Case(*[When(pk=pk, then=F("stock") - quantity) for pk, quantity in needed.items()]),
+        reserved=Case(*[
+            When(pk=pk, then=Greatest(F("reserved") - held.get(pk, 0), 0)) for pk in needed
+        ]),
+    )
+    if updated != len(needed):
+        raise InsufficientStock()
+
+    # Mahsulot darajasidagi umumiy qoldiq (manfiy bo‘lmaydi); updated_at — sahifa ETag i yangilanadi
+    Product.objects.filter(pk__in=products).update(
+        stock=Case(*[When(pk=pk, then=Greatest(F("stock") - quantity, 0)) for pk, quantity in products.items()]),
+        updated_at=Now(),
+    )
+    # Boshqa variantlar uchun qolgan hold lar ham savat bilan birga tugaydi
+    _decrement_reserved({pk: quantity for pk, quantity in held.items() if pk not in needed})
+    StockReservation.objects.filter(cart=cart).delete()
+
+
+def release_expired_reservations(batch_size=1000):
+    """
+    Muddati o‘tgan hold larni bo‘laklab bo‘shatadi. Band (checkout qilinayotgan) qatorlar
+    o‘tkazib yuboriladi. Qaytaradi: bo‘shatilgan hold lar soni.
+    """
+    released = 0
+    while True:
+        with transaction.atomic():
+            reservations = list(
+                StockReservation.objects.select_for_update(skip_locked=True)
+                .filter(expires_at__lt=timezone.now())
+                .order_by("expires_at")[:batch_size]
+            )
+            if not reservations:
+                return released
+            quantities = defaultdict(int)
+            for reservation in reservations:
+                quantities[reservation.variant_id] += reservation.quantity
+            _decrement_reserved(quantities)
+            StockReservation.objects.filter(pk__in=[reservation.pk for reservation in reservations]).delete()
+        released += len(reservations)
@@ -0,0 +1,85 @@
+import statistics
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from orders.models import Cart, CartItem
+from orders.utils import merge_session_cart
+from products.models import Category, Color, MemoryOption, Product, ProductVariant
+
+BENCH_CATEGORY = "Benchmark"
+
+
+class Command(BaseCommand):
+    help = (
+        "Login dagi savat birlashtirish benchmarki: sessiya savatidagi N qator (yarmi foydalanuvchi "
+        "savatida ham bor) uchun kechikish va so‘rovlar soni. Sintetik ma’lumotlar rollback qilinadi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="Sessiya savatidagi qatorlar soni")
+        parser.add_argument("--repeat", type=int, default=10)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Benchmark PostgreSQL da ishga tushirilishi kerak.")
+
+        sizes = options["sizes"]
+        with transaction.atomic():
+            user, variants = self.seed(max(sizes))
+            request = RequestFactory().post("/")
+            request.session = SessionStore()
+            request.session.create()
+
+            for size in sizes:
+                timings = []
+                queries = 0
+                for _ in range(options["repeat"]):
+                    Cart.objects.filter(user=user).delete()
+                    user_cart = Cart.objects.create(user=user)
+                    session_cart = Cart.objects.create(session_key=request.session.session_key)
+                    CartItem.objects.bulk_create(
+                        [CartItem(cart=user_cart, variant=variant, quantity=1) for variant in variants[:size // 2]]
+                        + [CartItem(cart=session_cart, variant=variant, quantity=2) for variant in variants[:size]]
+                    )
+                    # Yangi yozilgan qatorlar uchun statistika — aks holda rejalashtiruvchi jadvalni bo‘sh deb
+                    # hisoblab nested loop tanlaydi (production jadvallarida statistika bor)
+                    with connection.cursor() as cursor:
+                        cursor.execute(f"ANALYZE {CartItem._meta.db_table}")
+                    with CaptureQueriesContext(connection) as captured:
+                        started = time.perf_counter()
+                        merge_session_cart(request, user)
+                        timings.append((time.perf_counter() - started) * 1000)
+                    queries = len(captured.captured_queries)
+
+                    lines = CartItem.objects.filter(cart=user_cart).aggregate(count=Sum(1), quantity=Sum("quantity"))
+                    if lines["count"] != size or lines["quantity"] != size * 2 + size // 2:
+                        raise CommandError(f"Birlashtirish noto‘g‘ri: {lines}")
+
+                self.stdout.write(
+                    f"{size:>5} qator: so‘rovlar={queries:<3} "
+                    f"median={statistics.median(timings):8.2f}ms max={max(timings):8.2f}ms"
+                )
+
+            # Benchmark ma’lumotlari bazada qolmaydi
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def seed(count):
+        user = get_user_model().objects.create_user(email="bench-cart-merge@example.com", password=None)
+        category, _ = Category.objects.get_or_create(name=BENCH_CATEGORY, defaults={"is_active": False})
+        product = Product.objects.create(category=category, title="Bench cart merge", slug="bench-cart-merge", price=Decimal(100))
+        memory, _ = MemoryOption.objects.get_or_create(size="bench")
+        colors = Color.objects.bulk_create([Color(name=f"bench-merge-{i}") for i in range(count)])
+        variants = ProductVariant.objects.bulk_create([
+            ProductVariant(product=product, color=color, memory=memory, price=Decimal(100), stock=1000)
+            for color in colors
+        ])
+        return user, variants
@@ -0,0 +1,70 @@
+import statistics
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from orders.models import Cart, CartItem
+from orders.services import checkout
+from products.models import Category, Color, MemoryOption, Product, ProductVariant
+
+BENCH_CATEGORY = "Benchmark"
+
+
+class Command(BaseCommand):
+    help = (
+        "Checkout benchmarki: 1, 10 va 100 qatorli savatlar uchun kechikish va so‘rovlar soni. "
+        "Barcha sintetik ma’lumotlar oxirida rollback qilinadi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100], help="Savatdagi qatorlar soni")
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        sizes = options["sizes"]
+        with transaction.atomic():
+            user, variants = self.seed(max(sizes))
+            cart = Cart.objects.create(user=user)
+
+            for size in sizes:
+                timings = []
+                queries = 0
+                for _ in range(options["repeat"]):
+                    CartItem.objects.bulk_create([
+                        CartItem(cart=cart, variant=variant, quantity=2) for variant in variants[:size]
+                    ])
+                    with CaptureQueriesContext(connection) as captured:
+                        started = time.perf_counter()
+                        checkout(cart, user=user, address="Benchmark")
+                        timings.append((time.perf_counter() - started) * 1000)
+                    queries = len(captured.captured_queries)
+
+                self.stdout.write(
+                    f"{size:>4} qator: so‘rovlar={queries:<3} "
+                    f"median={statistics.median(timings):8.2f}ms p95={self.p95(timings):8.2f}ms"
+                )
+
+            # Benchmark ma’lumotlari bazada qolmaydi
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def p95(timings):
+        ordered = sorted(timings)
+        return ordered[max(int(len(ordered) * 0.95) - 1, 0)]
+
+    @staticmethod
+    def seed(count):
+        user = get_user_model().objects.create_user(email="bench-checkout@example.com", password=None)
+        category, _ = Category.objects.get_or_create(name=BENCH_CATEGORY, defaults={"is_active": False})
+        product = Product.objects.create(category=category, title="Bench checkout", slug="bench-checkout", price=Decimal(100))
+        memory, _ = MemoryOption.objects.get_or_create(size="bench")
+        colors = Color.objects.bulk_create([Color(name=f"bench-{i}") for i in range(count)])
+        variants = ProductVariant.objects.bulk_create([
+            ProductVariant(product=product, color=color, memory=memory, price=Decimal(100 + i), stock=1000)
+            for i, color in enumerate(colors)
+        ])
+        return user, variants
@@ -0,0 +1,104 @@
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from orders.models import Order, PromoCode, PromoRedemption
+from orders.promo import PromoUnavailable, redeem_promo
+
+BENCH_CODE = "BENCH-PROMO-{}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Bitta promokodni ko‘p oqimdan bir vaqtda ishlatish PostgreSQL da: usage_limit hech qachon "
+        "oshmasligini tekshiradi va oddiy/shardlangan hisoblagich o‘tkazuvchanligini o‘lchaydi. "
+        "Yaratilgan ma’lumotlar oxirida o‘chiriladi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--attempts", type=int, default=100, help="Har bir oqimdagi urinishlar soni")
+        parser.add_argument("--limit", type=int, default=1000, help="usage_limit (0 — cheklanmagan)")
+        parser.add_argument("--shards", type=int, nargs="+", default=[1, 8], help="Sinaladigan shard_count qiymatlari")
+        parser.add_argument(
+            "--hold-ms", type=float, default=0,
+            help="Redemption dan keyin tranzaksiya ochiq turadigan vaqt (checkout ning qolgan ishi o‘rniga)",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Benchmark PostgreSQL da ishga tushirilishi kerak.")
+
+        failed = False
+        for shard_count in options["shards"]:
+            failed |= self.run(
+                shard_count, options["threads"], options["attempts"], options["limit"] or None, options["hold_ms"] / 1000
+            )
+        if failed:
+            raise CommandError("usage_limit buzildi yoki hisoblagich nomuvofiq.")
+        self.stdout.write(self.style.SUCCESS("Limit hech qachon oshmadi."))
+
+    def run(self, shard_count, threads, attempts, limit, hold):
+        promo = PromoCode.objects.create(
+            code=BENCH_CODE.format(shard_count), discount_type="fixed", amount=Decimal(1),
+            valid_until=timezone.now() + timedelta(hours=1), usage_limit=limit, shard_count=shard_count,
+        )
+        results = {"redeemed": 0, "rejected": 0, "errors": []}
+        lock = threading.Lock()
+        barrier = threading.Barrier(threads)
+
+        def worker():
+            redeemed = rejected = 0
+            try:
+                barrier.wait()
+                for _ in range(attempts):
+                    try:
+                        with transaction.atomic():
+                            order = Order(address="Benchmark", promo_code=promo.code, total_price=Decimal(99))
+                            order.save(skip_calculation=True)
+                            redeem_promo(promo, order, Decimal(100), Decimal(1))
+                            if hold:
+                                time.sleep(hold)
+                        redeemed += 1
+                    except PromoUnavailable:
+                        rejected += 1
+            except Exception as error:  # noqa: BLE001 — natijada ko‘rsatiladi
+                with lock:
+                    results["errors"].append(repr(error))
+            finally:
+                with lock:
+                    results["redeemed"] += redeemed
+                    results["rejected"] += rejected
+                connections.close_all()
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        try:
+            promo.refresh_from_db()
+            used = promo.get_used_count()
+            recorded = PromoRedemption.objects.filter(promo=promo).count()
+            total = threads * attempts
+            self.stdout.write(
+                f"shardlar={shard_count:<3} urinishlar={total} ishlatildi={results['redeemed']} "
+                f"rad etildi={results['rejected']} hisoblagich={used} yozuvlar={recorded} "
+                f"vaqt={elapsed:.2f}s o‘tkazuvchanlik={total / elapsed:.0f} urinish/s"
+            )
+            for error in results["errors"]:
+                self.stderr.write(error)
+
+            expected = total if limit is None else min(limit, total)
+            return bool(results["errors"]) or not (results["redeemed"] == used == recorded == expected)
+        finally:
+            Order.objects.filter(promo_redemption__promo=promo).delete()
+            promo.delete()
@@ -0,0 +1,110 @@
+import threading
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+
+from orders.inventory import InsufficientStock, hold_stock
+from orders.models import Cart, CartItem, Order
+from orders.services import checkout
+from products.models import Category, Color, MemoryOption, Product, ProductVariant
+
+BENCH_CATEGORY = "Benchmark"
+BENCH_EMAIL = "bench-reservation-{}@example.com"
+
+
+class Command(BaseCommand):
+    help = (
+        "Bitta variantni ko‘p oqimdan bir vaqtda sotib olish (savatga qo‘shish + checkout) "
+        "PostgreSQL da: ortiqcha sotuv yo‘qligini tekshiradi va o‘tkazuvchanlikni o‘lchaydi. "
+        "Yaratilgan ma’lumotlar oxirida o‘chiriladi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--attempts", type=int, default=50, help="Har bir oqimdagi xaridlar soni")
+        parser.add_argument("--stock", type=int, default=500, help="Variantning boshlang‘ich qoldig‘i")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Benchmark PostgreSQL da ishga tushirilishi kerak.")
+
+        threads, attempts, stock = options["threads"], options["attempts"], options["stock"]
+        users, variant = self.seed(threads, stock)
+        results = {"sold": 0, "rejected": 0, "holds": 0, "errors": []}
+        lock = threading.Lock()
+        barrier = threading.Barrier(threads)
+
+        def worker(user):
+            sold = rejected = holds = 0
+            try:
+                cart = Cart.objects.create(user=user)
+                barrier.wait()
+                for _ in range(attempts):
+                    try:
+                        with transaction.atomic():
+                            CartItem.objects.create(cart=cart, variant=variant, quantity=1)
+                            hold_stock(cart, variant.pk)
+                        holds += 1
+                        checkout(cart, user=user, address="Benchmark")
+                        sold += 1
+                    except InsufficientStock:
+                        rejected += 1
+            except Exception as error:  # noqa: BLE001 — natijada ko‘rsatiladi
+                with lock:
+                    results["errors"].append(repr(error))
+            finally:
+                with lock:
+                    results["sold"] += sold
+                    results["rejected"] += rejected
+                    results["holds"] += holds
+                connections.close_all()
+
+        workers = [threading.Thread(target=worker, args=(user,)) for user in users]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        try:
+            variant.refresh_from_db()
+            ordered = Order.objects.filter(user__in=users).count()
+            total = threads * attempts
+            self.stdout.write(
+                f"oqimlar={threads} urinishlar={total} sotildi={results['sold']} rad etildi={results['rejected']} "
+                f"vaqt={elapsed:.2f}s o‘tkazuvchanlik={total / elapsed:.0f} urinish/s ({results['sold'] / elapsed:.0f} sotuv/s)"
+            )
+            self.stdout.write(f"yakuniy qoldiq={variant.stock} reserved={variant.reserved} buyurtmalar={ordered}")
+            for error in results["errors"]:
+                self.stderr.write(error)
+
+            expected = min(stock, total)
+            if results["errors"] or results["sold"] != expected or ordered != expected \
+                    or variant.stock != stock - expected or variant.reserved != 0:
+                raise CommandError("Qoldiq nomuvofiq: ortiqcha sotuv yoki yo‘qolgan hold.")
+            self.stdout.write(self.style.SUCCESS("Ortiqcha sotuv yo‘q."))
+        finally:
+            self.cleanup(users, variant)
+
+    @staticmethod
+    def seed(threads, stock):
+        User = get_user_model()
+        users = [User.objects.create_user(email=BENCH_EMAIL.format(i), password=None) for i in range(threads)]
+        category, _ = Category.objects.get_or_create(name=BENCH_CATEGORY, defaults={"is_active": False})
+        product = Product.objects.create(
+            category=category, title="Bench reservation", slug="bench-reservation", price=Decimal(100), stock=stock
+        )
+        color, _ = Color.objects.get_or_create(name="bench")
+        memory, _ = MemoryOption.objects.get_or_create(size="bench")
+        variant = ProductVariant.objects.create(product=product, color=color, memory=memory, price=Decimal(100), stock=stock)
+        return users, variant
+
+    @staticmethod
+    def cleanup(users, variant):
+        Order.objects.filter(user__in=users).delete()
+        Product.objects.filter(pk=variant.product_id).delete()
+        get_user_model().objects.filter(pk__in=[user.pk for user in users]).delete()
@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from orders.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "IDEMPOTENCY_KEY_TTL dan eski Idempotency-Key yozuvlarini bo‘laklab o‘chiradi (cron orqali)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ttl", type=int, default=None, help="Soniya; berilmasa IDEMPOTENCY_KEY_TTL")
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        ttl = options["ttl"] if options["ttl"] is not None else getattr(settings, "IDEMPOTENCY_KEY_TTL", 60 * 60 * 24)
+        cutoff = timezone.now() - timedelta(seconds=ttl)
+        deleted = 0
+        while True:
+            batch = list(
+                IdempotencyKey.objects.filter(created_at__lt=cutoff).order_by("created_at")
+                .values_list("pk", flat=True)[:options["batch_size"]]
+            )
+            if not batch:
+                break
+            deleted += IdempotencyKey.objects.filter(pk__in=batch).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f"{deleted} ta Idempotency-Key o‘chirildi."))
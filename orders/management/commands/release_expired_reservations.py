@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db.models import IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from orders.inventory import release_expired_reservations
+from orders.models import StockReservation
+from products.models import ProductVariant
+
+
+class Command(BaseCommand):
+    help = (
+        "Muddati o‘tgan savat hold larini bo‘shatadi (cron orqali har necha daqiqada). "
+        "--reconcile bilan ProductVariant.reserved faol hold lar yig‘indisidan qayta hisoblanadi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--reconcile", action="store_true", help="reserved ustunini hold lardan qayta hisoblash")
+
+    def handle(self, *args, **options):
+        released = release_expired_reservations(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"{released} ta hold bo‘shatildi."))
+
+        if options["reconcile"]:
+            held = (
+                StockReservation.objects.filter(variant=OuterRef("pk"))
+                .values("variant").annotate(total=Sum("quantity")).values("total")
+            )
+            updated = ProductVariant.objects.update(
+                reserved=Coalesce(Subquery(held, output_field=IntegerField()), Value(0))
+            )
+            self.stdout.write(self.style.SUCCESS(f"{updated} ta variantning reserved qiymati qayta hisoblandi."))
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_alter_orderitem_variant'),
+        ('products', '0013_productvariant_reserved'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='order',
+            name='payment_method',
+            field=models.CharField(choices=[('cash', 'Naqt pul'), ('card', 'Plastik/Online'), ('installment', 'Bo‘lib to‘lash')], default='cash', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField()),
+                ('expires_at', models.DateTimeField()),
+                ('cart', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='orders.cart')),
+                ('variant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='products.productvariant')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['expires_at'], name='orders_stoc_expires_f55a9e_idx')],
+                'constraints': [models.UniqueConstraint(fields=('cart', 'variant'), name='unique_cart_variant_reservation')],
+            },
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:31
+
+from django.db import migrations, models
+from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+
+def line_snapshot(item):
+    # orders.models.line_snapshot nusxasi — migratsiya faqat tarixiy modellarga tayanadi
+    variant = item.variant
+    return {
+        'title': variant.product.title if variant else (item.accessory.title if item.accessory else ''),
+        'variant_label': f"{variant.memory.size} / {variant.color.name}" if variant else '',
+        'bundle_name': item.bundle.name if item.bundle else '',
+        'accessory_title': item.accessory.title if item.accessory else '',
+    }
+
+
+def fill_pricing_snapshot(apps, schema_editor):
+    Order = apps.get_model('orders', 'Order')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    money = DecimalField(max_digits=10, decimal_places=2)
+
+    # Eski total_price = chegirmali qatorlar yig‘indisi (yetkazish qo‘shilmagan) — o‘zgarmaydi
+    items_total = (
+        OrderItem.objects.filter(order=OuterRef('pk')).values('order')
+        .annotate(total=Sum(ExpressionWrapper(F('price') * F('quantity'), output_field=money))).values('total')
+    )
+    Order.objects.update(subtotal=Coalesce(Subquery(items_total, output_field=money), Value(0, output_field=money)))
+    Order.objects.update(discount_amount=Greatest(F('subtotal') - F('total_price'), Value(0, output_field=money)))
+
+    items = OrderItem.objects.select_related(
+        'variant__product', 'variant__color', 'variant__memory', 'bundle', 'accessory',
+    ).order_by('pk')
+    batch = []
+    for item in items.iterator(chunk_size=2000):
+        for name, value in line_snapshot(item).items():
+            setattr(item, name, value)
+        batch.append(item)
+        if len(batch) == 2000:
+            OrderItem.objects.bulk_update(batch, ['title', 'variant_label', 'bundle_name', 'accessory_title'])
+            batch = []
+    OrderItem.objects.bulk_update(batch, ['title', 'variant_label', 'bundle_name', 'accessory_title'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0006_order_history_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='delivery_cost',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='discount_amount',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='subtotal',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='accessory_title',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='bundle_name',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='title',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='variant_label',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.RunPython(fill_pricing_snapshot, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,9 @@
+from decimal import Decimal
+
 from django.utils import timezone
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
-from products.models import ProductVariant, Bundle, Accessory
+from products.models import ProductVariant, Bundle, Accessory, save_fields_excluding
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -41,18 +43,103 @@ class PromoCode(models.Model):
     code = models.CharField(max_length=50, unique=True)
     discount_type = models.CharField(max_length=10, choices=[('percent', 'Foiz'), ('fixed', 'Summaga')])
     amount = models.DecimalField(max_digits=10, decimal_places=2)
+    min_order_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    valid_from = models.DateTimeField(null=True, blank=True)
     valid_until = models.DateTimeField()
-    used_count = models.PositiveIntegerField(default=0)
+    usage_limit = models.PositiveIntegerField(null=True, blank=True)  # bo‘sh — cheklanmagan
+    # Faqat orders/promo.py dagi shartli UPDATE lar oshiradi; shardlangan kodlarda qolgani PromoCodeShard larda
+    used_count = models.PositiveIntegerField(default=0, editable=False)
+    # Ko‘p ishlatiladigan (viral) kodlar uchun hisoblagich nechta qatorga bo‘linadi
+    shard_count = models.PositiveSmallIntegerField(default=1)
+    is_active = models.BooleanField(default=True)
+
+    MAINTAINED_FIELDS = ('used_count',)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Shardlarni faqat limit yoki shard soni o‘zgarganda qayta taqsimlash uchun (yuklanmagan maydon — None)
+        instance._shard_state = (instance.__dict__.get('shard_count'), instance.__dict__.get('usage_limit'))
+        return instance
 
-    def is_valid(self):
-        # Promokod muddati tugamagan bo‘lsa, aktiv hisoblanadi
-        return timezone.now() <= self.valid_until
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        if not adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = save_fields_excluding(self, self.MAINTAINED_FIELDS)
+        super().save(*args, **kwargs)
+        shard_state = (self.shard_count, self.usage_limit)
+        changed = adding or shard_state != getattr(self, '_shard_state', None)
+        self._shard_state = shard_state
+        if changed and (self.shard_count > 1 or (not adding and self.shards.exists())):
+            self.rebalance_shards()
+
+    def rebalance_shards(self):
+        """
+        Hisoblagichni shard_count ta bo‘lakka qayta taqsimlaydi: ishlatilganlar asosiy qatorga
+        yig‘iladi, qolgan limit bo‘laklar orasida teng bo‘linadi (yig‘indisi limitdan oshmaydi).
+        """
+        with transaction.atomic():
+            PromoCode.objects.select_for_update().filter(pk=self.pk).exists()
+            used = sum(self.shards.select_for_update().values_list('used_count', flat=True))
+            PromoCode.objects.filter(pk=self.pk).update(used_count=models.F('used_count') + used)
+            self.shards.all().delete()
+            self.refresh_from_db(fields=['used_count'])
+            if self.shard_count <= 1:
+                return
+
+            remaining = None if self.usage_limit is None else max(self.usage_limit - self.used_count, 0)
+            PromoCodeShard.objects.bulk_create([
+                PromoCodeShard(
+                    promo=self,
+                    index=index,
+                    capacity=None if remaining is None else remaining // self.shard_count + (index < remaining % self.shard_count),
+                )
+                for index in range(self.shard_count)
+            ])
+
+    def get_used_count(self):
+        # Shardlangan kodlarda: asosiy qator + shardlar yig‘indisi
+        if self.shard_count <= 1:
+            return self.used_count
+        sharded = self.shards.aggregate(total=models.Sum('used_count'))['total'] or 0
+        return self.used_count + sharded
+
+    def is_valid(self, order_amount=None):
+        # Aktiv, muddat ichida, limit tugamagan va (berilsa) buyurtma summasi yetarli
+        now = timezone.now()
+        if not self.is_active or now > self.valid_until:
+            return False
+        if self.valid_from and now < self.valid_from:
+            return False
+        if order_amount is not None and order_amount < self.min_order_amount:
+            return False
+        return self.usage_limit is None or self.get_used_count() < self.usage_limit
 
     def apply_discount(self, total):
-        # Chegirma turiga qarab narxni kamaytiradi
+        # Chegirma turiga qarab narxni kamaytiradi (Decimal, tiyingacha, manfiy bo‘lmaydi)
+        total = Decimal(total)
         if self.discount_type == 'percent':
-            return float(total) * (1 - float(self.amount) / 100)
-        return float(total) - float(self.amount)
+            total = total * (1 - self.amount / 100)
+        else:
+            total = total - self.amount
+        return max(total, Decimal(0)).quantize(Decimal('0.01'))
+
+    def __str__(self):
+        return self.code
+
+
+# Viral promokod hisoblagichining bo‘lagi: har biri limitning o‘z ulushiga (capacity) ega,
+# parallel redemption lar turli qatorlarni yangilaydi (orders/promo.py)
+class PromoCodeShard(models.Model):
+    promo = models.ForeignKey(PromoCode, on_delete=models.CASCADE, related_name='shards')
+    index = models.PositiveSmallIntegerField()
+    used_count = models.PositiveIntegerField(default=0)
+    capacity = models.PositiveIntegerField(null=True, blank=True)  # bo‘sh — cheklanmagan
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['promo', 'index'], name='unique_promo_shard_index'),
+        ]
 
 
 # Buyurtma modeli
@@ -74,35 +161,37 @@ class Order(models.Model):
     payment_method = models.CharField(max_length=20, choices=PaymentMethod.choices, default=PaymentMethod.CASH)
     initial_payment = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
     promo_code = models.CharField(max_length=50, blank=True, null=True)
-    total_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    # Checkout paytidagi narxlar: o‘qishda katalog va promokod qayta hisoblanmaydi
+    subtotal = models.DecimalField(max_digits=10, decimal_places=2, default=0)  # qatorlar yig‘indisi
+    discount_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    delivery_cost = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    total_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)  # subtotal − chegirma + yetkazish
     comment = models.TextField(blank=True, null=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Buyurtmalar tarixi: WHERE user_id = ? ORDER BY created_at DESC, id DESC (keyset)
+            models.Index(fields=['user', '-created_at', '-id'], name='order_user_created_idx'),
+        ]
+
     def __str__(self):
         user_email = self.user.email if self.user else "Anonymous"
         return f"Order {self.id} - {user_email}"
 
     def calculate_total_price(self):
         """
-        Buyurtma uchun umumiy narxni hisoblaydi.
-        - OrderItem lar asosida narx yig‘iladi
-        - Promokod bo‘lsa, chegirma qo‘llanadi
+        Buyurtma uchun umumiy narxni saqlangan qiymatlardan hisoblaydi.
+        - subtotal OrderItem lar asosida qayta yig‘iladi
+        - checkout da qayd etilgan chegirma va yetkazish narxi ishlatiladi (promokod qayta o‘qilmaydi)
         """
         if not self.pk:
             return 0
 
-        total = sum(item.price * item.quantity for item in self.items.all())
-
-        if self.promo_code:
-            promo = PromoCode.objects.filter(code__iexact=self.promo_code).first()
-            if promo and promo.is_valid():
-                total = promo.apply_discount(total)
-                promo.used_count = models.F('used_count') + 1
-                promo.save(update_fields=['used_count'])
-
-        return round(total, 2)
+        self.subtotal = sum(item.subtotal for item in self.items.all())
+        return max(self.subtotal - self.discount_amount, 0) + self.delivery_cost
 
     def save(self, *args, **kwargs):
         # Saqlashdan oldin narxni hisoblaydi (agar skip_calculation berilmagan bo‘lsa)
@@ -111,14 +200,46 @@ class Order(models.Model):
         super().save(*args, **kwargs)
 
 
+# Promokodning buyurtmada ishlatilishi: har bir buyurtmaga ko‘pi bilan bitta —
+# qayta saqlash yoki takroriy so‘rov hisoblagichni ikki marta oshira olmaydi
+class PromoRedemption(models.Model):
+    promo = models.ForeignKey(PromoCode, on_delete=models.PROTECT, related_name='redemptions')
+    order = models.OneToOneField(Order, on_delete=models.CASCADE, related_name='promo_redemption')
+    shard = models.PositiveSmallIntegerField(null=True, blank=True)  # qaysi hisoblagich bo‘lagi oshirilgan
+    discount_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.promo} → Order {self.order_id}"
+
+
+def line_snapshot(line):
+    """
+    Savat/buyurtma qatori uchun nomlar nusxasi (OrderItem ning title, variant_label, bundle_name,
+    accessory_title ustunlari). variant (rang, xotira bilan), bundle va aksessuar yuklangan bo‘lishi kerak.
+    """
+    variant = line.variant
+    return {
+        'title': variant.product.title if variant else (line.accessory.title if line.accessory else ''),
+        'variant_label': f"{variant.memory.size} / {variant.color.name}" if variant else '',
+        'bundle_name': line.bundle.name if line.bundle else '',
+        'accessory_title': line.accessory.title if line.accessory else '',
+    }
+
+
 # Buyurtmadagi har bir item (variant, aksessuar, yoki bundle)
 class OrderItem(models.Model):
     order = models.ForeignKey("Order", related_name="items", on_delete=models.CASCADE)
     variant = models.ForeignKey(ProductVariant, on_delete=models.SET_NULL, null=True, blank=True)
     accessory = models.ForeignKey(Accessory, on_delete=models.SET_NULL, null=True, blank=True)
     bundle = models.ForeignKey(Bundle, on_delete=models.SET_NULL, null=True, blank=True)
-    price = models.DecimalField(max_digits=10, decimal_places=2)
+    price = models.DecimalField(max_digits=10, decimal_places=2)  # checkout paytidagi birlik narxi
     quantity = models.PositiveIntegerField(default=1)
+    # Checkout paytidagi nomlar (line_snapshot): katalog o‘zgarsa yoki o‘chirilsa ham tarix saqlanadi
+    title = models.CharField(max_length=255, blank=True, default='')
+    variant_label = models.CharField(max_length=255, blank=True, default='')
+    bundle_name = models.CharField(max_length=255, blank=True, default='')
+    accessory_title = models.CharField(max_length=255, blank=True, default='')
 
     @property
     def subtotal(self):
@@ -126,10 +247,10 @@ class OrderItem(models.Model):
         return round(self.price * self.quantity, 2)
 
     def __str__(self):
-        if self.variant:
-            return f"{self.variant} x {self.quantity}"
-        elif self.accessory:
-            return f"{self.accessory} x {self.quantity}"
+        if self.variant_label:
+            return f"{self.title} - {self.variant_label} x {self.quantity}"
+        elif self.title:
+            return f"{self.title} x {self.quantity}"
         return f"Item x {self.quantity}"
 
 
@@ -146,7 +267,9 @@ class Cart(models.Model):
         return f"Session {self.session_key} savatchasi"
 
     def total_price(self):
-        # Savatchadagi jami narx
+        # Savatchadagi jami narx (orders.utils.load_cart bilan yuklangan bo‘lsa, tayyor qiymat)
+        if hasattr(self, 'computed_total'):
+            return self.computed_total
         return sum([item.subtotal for item in self.items.all()])
 
 
@@ -175,5 +298,39 @@ class CartItem(models.Model):
 
     @property
     def subtotal(self):
-        # Narx × miqdor
+        # Narx × miqdor (load_cart bilan yuklangan bo‘lsa, tayyor qiymat)
+        if hasattr(self, 'computed_subtotal'):
+            return self.computed_subtotal
         return round(self.unit_price * self.quantity, 2)
+
+
+# Savatdagi variant uchun vaqtinchalik band qilish (TTL hold), orders/inventory.py
+class StockReservation(models.Model):
+    cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name="reservations")
+    variant = models.ForeignKey(ProductVariant, on_delete=models.CASCADE, related_name="reservations")
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['cart', 'variant'], name='unique_cart_variant_reservation'),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.variant_id} × {self.quantity} (cart {self.cart_id})"
+
+
+# Idempotency-Key sarlavhasi bilan kelgan so‘rovning saqlangan javobi (orders/idempotency.py).
+# IDEMPOTENCY_KEY_TTL dan eski yozuvlarni purge_idempotency_keys buyrug‘i o‘chiradi
+class IdempotencyKey(models.Model):
+    key_hash = models.CharField(max_length=64, unique=True)  # sha256(scope + kalit)
+    fingerprint = models.CharField(max_length=64)  # so‘rov tanasining sha256 i
+    status_code = models.PositiveSmallIntegerField()
+    response_body = models.TextField(blank=True)  # JSONRenderer chiqishi — takrorda aynan shu baytlar
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.key_hash[:12]} ({self.status_code})"
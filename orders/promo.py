@@ -0,0 +1,62 @@
+"""
+Promokod redemption: limit va amal qilish muddati bitta shartli UPDATE ichida tekshiriladi
+(`WHERE used_count < usage_limit AND is_active AND ...`), o‘qib-yozish poygasi yo‘q.
+Har bir buyurtmaga bitta PromoRedemption — hisoblagich ikki marta oshmaydi.
+
+Viral kodlarda (shard_count > 1) hisoblagich PromoCodeShard qatorlariga bo‘lingan: parallel
+tranzaksiyalar bitta "issiq" qatorni navbat bilan kutmaydi, har bir bo‘lak o‘z capacity sidan oshmaydi.
+"""
+import random
+
+from django.db.models import F, Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .models import PromoCode, PromoCodeShard, PromoRedemption
+
+
+class PromoUnavailable(ValidationError):
+    default_detail = {"promo_code": "Ushbu promo kod yaroqsiz yoki muddati tugagan."}
+    default_code = "promo_unavailable"
+
+
+def _active():
+    now = timezone.now()
+    return Q(is_active=True, valid_until__gte=now) & (Q(valid_from__isnull=True) | Q(valid_from__lte=now))
+
+
+def redeem_promo(promo, order, order_amount, discount_amount):
+    """
+    Buyurtma uchun promokodni ishlatadi. Limit tugagan, muddati o‘tgan yoki summa yetmasa PromoUnavailable.
+    Chaqiruvchi tranzaksiya ichida bo‘lishi kerak va uni iloji boricha oxirida chaqirishi kerak —
+    hisoblagich qatori qulfi commit gacha ushlanadi.
+    """
+    shard = None
+    if promo.shard_count <= 1:
+        redeemed = PromoCode.objects.filter(
+            _active(),
+            Q(usage_limit__isnull=True) | Q(used_count__lt=F("usage_limit")),
+            pk=promo.pk,
+            min_order_amount__lte=order_amount,
+        ).update(used_count=F("used_count") + 1)
+    else:
+        # Muddat/holat PromoCode qatorining o‘zida (qulfsiz) tekshiriladi. Shard UPDATE faqat o‘z
+        # ustunlari bilan filtrlanadi: JOIN li filtr `id IN (subquery)` ga aylanadi va READ COMMITTED da
+        # qulfdan keyin capacity sharti qayta tekshirilmay qoladi
+        redeemed = 0
+        if PromoCode.objects.filter(_active(), pk=promo.pk, min_order_amount__lte=order_amount).exists():
+            # Tasodifiy bo‘lakdan boshlab bo‘sh capacity li birinchisi olinadi
+            start = random.randrange(promo.shard_count)
+            for offset in range(promo.shard_count):
+                shard = (start + offset) % promo.shard_count
+                redeemed = PromoCodeShard.objects.filter(
+                    Q(capacity__isnull=True) | Q(used_count__lt=F("capacity")),
+                    promo=promo,
+                    index=shard,
+                ).update(used_count=F("used_count") + 1)
+                if redeemed:
+                    break
+    if not redeemed:
+        raise PromoUnavailable()
+
+    return PromoRedemption.objects.create(promo=promo, order=order, shard=shard, discount_amount=discount_amount)
@@ -2,6 +2,7 @@
 from .models import Order, DeliveryOption, CartItem, Cart, OrderItem
 from rest_framework import serializers
 from .models import PromoCode
+from .services import checkout
 
 class DeliveryOptionSerializer(serializers.ModelSerializer):
     class Meta:
@@ -11,48 +12,64 @@ class DeliveryOptionSerializer(serializers.ModelSerializer):
 
 class PromoCodeSerializer(serializers.ModelSerializer):
     is_valid = serializers.SerializerMethodField()  # Promokod amal qiladimi yoki yo‘qmi
+    used_count = serializers.IntegerField(source='get_used_count', read_only=True)  # shardlar bilan birga
 
     class Meta:
         model = PromoCode
         fields = [
             'id', 'code', 'discount_type', 'amount',
             'min_order_amount', 'usage_limit', 'used_count',
-            'valid_from', 'valid_to', 'is_active', 'is_valid'
+            'valid_from', 'valid_until', 'is_active', 'is_valid'
         ]
-        read_only_fields = ['used_count', 'is_valid']
+        read_only_fields = ['is_valid']
 
     def get_is_valid(self, obj):
         return obj.is_valid()
 
 class OrderItemSerializer(serializers.ModelSerializer):
-    variant_title = serializers.CharField(source="variant.product.title", read_only=True)
+    # Barcha qiymatlar checkout paytidagi nusxadan (OrderItem ustunlari) — katalog qayta o‘qilmaydi
+    variant_title = serializers.SerializerMethodField()
     variant_price = serializers.DecimalField(source="price", max_digits=10, decimal_places=2, read_only=True)
-    bundle_id = serializers.IntegerField(source="bundle.id", read_only=True)
-    bundle_name = serializers.CharField(source="bundle.name", read_only=True)
+    bundle_id = serializers.IntegerField(read_only=True)
+    bundle_name = serializers.SerializerMethodField()
     bundle_price = serializers.SerializerMethodField()
-    accessory_title = serializers.CharField(source='accessory.title', read_only=True, default=None)
-    accessory_price = serializers.DecimalField(source='accessory.price', max_digits=10, decimal_places=2, read_only=True, default=None)
+    accessory_title = serializers.SerializerMethodField()
+    accessory_price = serializers.SerializerMethodField()
     subtotal = serializers.SerializerMethodField()  # Narx × miqdor
 
     class Meta:
         model = OrderItem
         fields = [
-            'id', 'variant', 'variant_title', 'variant_price', 'quantity',
+            'id', 'variant', 'variant_title', 'variant_label', 'variant_price', 'quantity',
             'bundle_id', 'bundle_name', 'bundle_price',
             'accessory', 'accessory_title', 'accessory_price',
-            'subtotal'
+            'title', 'subtotal'
         ]
 
-    def get_subtotal(self, obj):
-        return obj.subtotal
+    def get_variant_title(self, obj):
+        return obj.title if obj.variant_label else None
+
+    def get_bundle_name(self, obj):
+        return obj.bundle_name or None
 
     def get_bundle_price(self, obj):
-        return obj.bundle.total_price if obj.bundle else None
+        # Bundle qatorining birlik narxi — checkout paytidagi Bundle.total_price
+        return obj.price if obj.bundle_name else None
+
+    def get_accessory_title(self, obj):
+        return obj.accessory_title or None
+
+    def get_accessory_price(self, obj):
+        # CartItem.unit_price kabi: bundle bo‘lmasa aksessuarli qator aksessuar narxida
+        return obj.price if obj.accessory_title and not obj.bundle_name else None
+
+    def get_subtotal(self, obj):
+        return obj.subtotal
 
 class OrderSerializer(serializers.ModelSerializer):
-    items = serializers.SerializerMethodField()  # Buyurtmadagi itemlar ro‘yxati
-    total_items_price = serializers.SerializerMethodField()  # Promokodsiz narx
-    total_price = serializers.SerializerMethodField()  # Promokod qo‘llangandan keyingi narx
+    items = OrderItemSerializer(many=True, read_only=True)  # Buyurtmadagi itemlar ro‘yxati (prefetch qilingan)
+    # Checkout da saqlangan summalar
+    total_items_price = serializers.DecimalField(source='subtotal', max_digits=10, decimal_places=2, read_only=True)
 
     class Meta:
         model = Order
@@ -60,67 +77,20 @@ class OrderSerializer(serializers.ModelSerializer):
             'id', 'delivery_option', 'address', 'city', 'phone',
             'email', 'contact_method', 'payment_method',
             'initial_payment', 'promo_code', 'total_price',
-            'comment', 'items', 'total_items_price'
+            'comment', 'items', 'total_items_price', 'discount_amount', 'delivery_cost'
         ]
-
-    def get_items(self, obj):
-        return OrderItemSerializer(obj.items.all(), many=True).data
-
-    def get_total_items_price(self, obj):
-        return sum(item.subtotal for item in obj.items.all())
-
-    def get_total_price(self, obj):
-        total_items_price = self.get_total_items_price(obj)
-        if obj.promo_code:
-            promo = PromoCode.objects.filter(code=obj.promo_code).first()
-            if promo and promo.is_valid():
-                return promo.apply_discount(total_items_price)
-        return total_items_price
+        read_only_fields = ['total_price', 'discount_amount', 'delivery_cost']
 
     def create(self, validated_data):
         user = self.context['request'].user
-        promo_code_str = validated_data.get('promo_code')
         validated_data.pop('user', None)
 
-        cart = Cart.objects.filter(user=user).first()
+        cart = Cart.objects.filter(user=user).first() if user.is_authenticated else None
         if not cart:
             raise serializers.ValidationError("Savat topilmadi.")
 
-        cart_items = CartItem.objects.filter(cart=cart)
-        if not cart_items.exists():
-            raise serializers.ValidationError("Savat bo‘sh.")
-
-        order = Order.objects.create(user=user, **validated_data)
-
-        total_items_price = 0
-        for item in cart_items:
-            OrderItem.objects.create(
-                order=order,
-                variant=item.variant,
-                bundle=item.bundle,
-                accessory=item.accessory,
-                price=item.unit_price,
-                quantity=item.quantity,
-            )
-            total_items_price += item.subtotal
-
-        final_total = total_items_price
-        if promo_code_str:
-            promo = PromoCode.objects.filter(code=promo_code_str).first()
-            if promo and promo.is_valid():
-                final_total = promo.apply_discount(total_items_price)
-                promo.used_count += 1
-                promo.save()
-            else:
-                raise serializers.ValidationError({
-                    "promo_code": "Ushbu promo kod yaroqsiz yoki muddati tugagan."
-                })
-
-        order.total_price = final_total
-        order.save()
-        cart_items.delete()
-
-        return order
+        # Bitta tranzaksiya, bulk_create, buyurtma bir marta saqlanadi (orders/services.py)
+        return checkout(cart, user=user, **validated_data)
 
 
 class CartItemSerializer(serializers.ModelSerializer):
@@ -0,0 +1,82 @@
+"""
+Buyurtma rasmiylashtirish (checkout) servisi.
+
+Butun jarayon bitta tranzaksiyada: savat qulflanadi, qatorlar qat’iy sonli so‘rovda
+yuklanadi, qoldiq shartli UPDATE bilan kamaytiriladi (orders/inventory.py), OrderItem lar
+bulk_create bilan yoziladi, buyurtma esa bir marta saqlanadi. Promokod orders/promo.py orqali.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
+from rest_framework.exceptions import ValidationError
+
+from .inventory import commit_stock
+from .models import Cart, CartItem, Order, OrderItem, PromoCode, line_snapshot
+from .promo import PromoUnavailable, redeem_promo
+from .utils import cart_items_queryset
+
+
+def order_items_queryset():
+    # Buyurtma javobi uchun: OrderItemSerializer faqat saqlangan ustunlarni o‘qiydi — katalogga JOIN yo‘q
+    return OrderItem.objects.order_by('id')
+
+
+def checkout(cart, user=None, **order_data):
+    """
+    Savatdan buyurtma yaratadi. Savat bo‘sh yoki promokod yaroqsiz bo‘lsa ValidationError.
+    Qaytaradi: qatorlari oldindan yuklangan Order.
+    """
+    promo_code = order_data.get('promo_code')
+
+    with transaction.atomic():
+        # Bir savatni parallel rasmiylashtirish ketma-ket bajariladi (ikkinchisi bo‘sh savat ko‘radi)
+        Cart.objects.select_for_update().filter(pk=cart.pk).exists()
+        items = list(cart_items_queryset().filter(cart=cart))
+        if not items:
+            raise ValidationError("Savat bo‘sh.")
+
+        # Narxlar shu yerda bir marta hisoblanadi va buyurtmada saqlanadi (o‘qishda qayta hisoblanmaydi)
+        subtotal = sum(item.subtotal for item in items)
+        discount_amount = Decimal(0)
+        promo = None
+        if promo_code:
+            promo = PromoCode.objects.filter(code=promo_code).first()
+            if not promo or not promo.is_valid(subtotal):
+                raise PromoUnavailable()
+            discount_amount = subtotal - promo.apply_discount(subtotal)
+        delivery_option = order_data.get('delivery_option')
+        delivery_cost = delivery_option.cost if delivery_option else Decimal(0)
+
+        # Hold lar qoldiqdan shartli UPDATE bilan ayiriladi; yetmasa butun tranzaksiya bekor
+        commit_stock(cart, items)
+
+        order = Order(
+            user=user,
+            subtotal=subtotal,
+            discount_amount=discount_amount,
+            delivery_cost=delivery_cost,
+            total_price=subtotal - discount_amount + delivery_cost,
+            **order_data,
+        )
+        order.save(skip_calculation=True)
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                variant=item.variant,
+                bundle=item.bundle,
+                accessory=item.accessory,
+                price=item.unit_price,
+                quantity=item.quantity,
+                **line_snapshot(item),
+            )
+            for item in items
+        ])
+        CartItem.objects.filter(pk__in=[item.pk for item in items]).delete()
+
+        # Oxirida: promokod hisoblagichi qatori faqat commit gacha qulflanadi
+        if promo:
+            redeem_promo(promo, order, subtotal, discount_amount)
+
+    prefetch_related_objects([order], Prefetch('items', queryset=order_items_queryset()))
+    return order
@@ -1,3 +1,562 @@
-from django.test import TestCase
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.backends.db import SessionStore
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from products.models import Accessory, Bundle, Category, Color, MemoryOption, Product, ProductVariant
+from .cart_storage import CacheCartStore, CartBusy, DatabaseCartStore
+from .idempotency import idempotent
+from .inventory import InsufficientStock, hold_stock, release_expired_reservations
+from .models import Cart, CartItem, IdempotencyKey, Order, OrderItem, PromoCode, PromoRedemption, StockReservation
+from .promo import PromoUnavailable, redeem_promo
+from .services import checkout
+from .utils import merge_session_cart
+
+User = get_user_model()
+
+
+def run_in_threads(count, target):
+    """
+    `target(index)` ni `count` ta oqimda bir vaqtda ishga tushiradi (har biri o‘z ulanishi bilan).
+    Qaytaradi: oqimlarda ko‘tarilgan kutilmagan xatolar ro‘yxati.
+    """
+    barrier = threading.Barrier(count)
+    errors = []
+
+    def worker(index):
+        try:
+            barrier.wait()
+            target(index)
+        except Exception as error:  # noqa: BLE001 — test xabarida ko‘rsatiladi
+            errors.append(error)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+def create_variant(stock, slug="variant"):
+    category = Category.objects.create(name=f"Kategoriya {slug}", slug=f"kategoriya-{slug}")
+    product = Product.objects.create(category=category, title=slug, slug=slug, price=Decimal(100), stock=stock)
+    color, _ = Color.objects.get_or_create(name="Qora")
+    memory, _ = MemoryOption.objects.get_or_create(size="128GB")
+    return ProductVariant.objects.create(product=product, color=color, memory=memory, price=Decimal(100), stock=stock)
+
+
+class StockReservationConcurrencyTests(TransactionTestCase):
+    """Bitta variantni ko‘p oqimdan sotib olish: ortiqcha sotuv va yo‘qolgan hold bo‘lmaydi."""
+    THREADS = 8
+    ATTEMPTS = 6
+    STOCK = 20
+
+    def test_concurrent_purchases_never_oversell(self):
+        variant = create_variant(self.STOCK)
+        users = [User.objects.create_user(email=f"buyer{index}@example.com") for index in range(self.THREADS)]
+        sold = []
+        violations = []
+        done = threading.Event()
+
+        def buy(index):
+            cart = Cart.objects.create(user=users[index])
+            for _ in range(self.ATTEMPTS):
+                try:
+                    with transaction.atomic():
+                        CartItem.objects.create(cart=cart, variant=variant, quantity=1)
+                        hold_stock(cart, variant.pk)
+                    checkout(cart, user=users[index], address="Toshkent")
+                    sold.append(1)
+                except InsufficientStock:
+                    pass
+
+        def observe():
+            # Sotuv davomida qoldiq manfiy bo‘lmaydi va hold lar qoldiqdan oshmaydi
+            try:
+                while not done.is_set():
+                    stock, reserved = ProductVariant.objects.values_list("stock", "reserved").get(pk=variant.pk)
+                    if stock < 0 or reserved > stock:
+                        violations.append((stock, reserved))
+            finally:
+                connection.close()
+
+        observer = threading.Thread(target=observe)
+        observer.start()
+        try:
+            errors = run_in_threads(self.THREADS, buy)
+        finally:
+            done.set()
+            observer.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(violations, [])
+        variant.refresh_from_db()
+        self.assertEqual(len(sold), self.STOCK)
+        self.assertEqual(variant.stock, 0)
+        self.assertEqual(variant.reserved, 0)
+        self.assertEqual(Order.objects.count(), self.STOCK)
+        self.assertFalse(StockReservation.objects.exists())
+
+
+    def test_concurrent_adds_to_one_cart_hold_the_total(self):
+        # Bir savatga parallel qo‘shish: yig‘indi qulf ichida o‘qiladi, hold bir marta yaratiladi
+        variant = create_variant(self.STOCK * 5)
+        user = User.objects.create_user(email="cart@example.com")
+        bundles = [
+            Bundle.objects.create(product=variant.product, name=Bundle.BUNDLE_CHOICES[index % 3][0])
+            for index in range(self.THREADS)
+        ]
+        cart = Cart.objects.create(user=user)
+        request = SimpleNamespace(user=user)
+
+        def add(index):
+            for _ in range(self.ATTEMPTS):
+                DatabaseCartStore(request).add(variant, bundles[index], None, 1)
+
+        self.assertEqual(run_in_threads(self.THREADS, add), [])
+
+        total = self.THREADS * self.ATTEMPTS
+        self.assertEqual(cart.items.aggregate(total=Sum("quantity"))["total"], total)
+        self.assertEqual(StockReservation.objects.get(cart=cart, variant=variant).quantity, total)
+        variant.refresh_from_db()
+        self.assertEqual(variant.reserved, total)
+
+class ReleaseExpiredReservationsTests(TransactionTestCase):
+
+    def test_expired_holds_are_released(self):
+        variant = create_variant(10)
+        expired_cart = Cart.objects.create(session_key="expired")
+        active_cart = Cart.objects.create(session_key="active")
+        for cart, quantity in ((expired_cart, 3), (active_cart, 2)):
+            CartItem.objects.create(cart=cart, variant=variant, quantity=quantity)
+            hold_stock(cart, variant.pk)
+        StockReservation.objects.filter(cart=expired_cart).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(release_expired_reservations(), 1)
+
+        variant.refresh_from_db()
+        self.assertEqual(variant.reserved, 2)
+        self.assertEqual(variant.stock, 10)
+        self.assertEqual(list(StockReservation.objects.values_list("cart_id", flat=True)), [active_cart.pk])
+
+
+class PromoRedemptionConcurrencyTests(TransactionTestCase):
+    """Bitta promokodni ko‘p oqimdan ishlatish: usage_limit hech qachon oshmaydi."""
+    THREADS = 8
+    ATTEMPTS = 10
+    LIMIT = 25
+
+    def create_promo(self, shard_count):
+        return PromoCode.objects.create(
+            code=f"PROMO{shard_count}", discount_type="fixed", amount=Decimal(10),
+            valid_until=timezone.now() + timedelta(hours=1), usage_limit=self.LIMIT, shard_count=shard_count,
+        )
+
+    @staticmethod
+    def create_order(promo):
+        order = Order(address="Toshkent", promo_code=promo.code, total_price=Decimal(90))
+        order.save(skip_calculation=True)
+        return order
+
+    def assert_limit_holds(self, shard_count):
+        promo = self.create_promo(shard_count)
+        redeemed = []
+
+        def redeem(index):
+            for _ in range(self.ATTEMPTS):
+                try:
+                    with transaction.atomic():
+                        redeem_promo(promo, self.create_order(promo), Decimal(100), Decimal(10))
+                    redeemed.append(1)
+                except PromoUnavailable:
+                    pass
+
+        self.assertEqual(run_in_threads(self.THREADS, redeem), [])
+        promo.refresh_from_db()
+        self.assertLessEqual(promo.get_used_count(), self.LIMIT)
+        self.assertLessEqual(PromoRedemption.objects.filter(promo=promo).count(), self.LIMIT)
+        # Urinishlar limitdan ko‘p — limit to‘liq ishlatiladi va hisoblagich redemption lar bilan mos
+        self.assertEqual(len(redeemed), self.LIMIT)
+        self.assertEqual(promo.get_used_count(), PromoRedemption.objects.filter(promo=promo).count())
+
+    def test_unsharded_limit(self):
+        self.assert_limit_holds(shard_count=1)
+
+    def test_sharded_limit(self):
+        self.assert_limit_holds(shard_count=4)
+
+    def test_order_redeems_once(self):
+        for shard_count in (1, 4):
+            promo = self.create_promo(shard_count)
+            order = self.create_order(promo)
+            with transaction.atomic():
+                redeem_promo(promo, order, Decimal(100), Decimal(10))
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                redeem_promo(promo, order, Decimal(100), Decimal(10))
+            # Ikkinchi urinish rollback bo‘ladi — hisoblagich ham oshmaydi
+            promo.refresh_from_db()
+            self.assertEqual(promo.get_used_count(), 1)
+            self.assertEqual(PromoRedemption.objects.filter(order=order).count(), 1)
+
+    def test_save_rebalances_only_when_limits_change(self):
+        promo = self.create_promo(shard_count=4)
+        self.assertEqual(promo.shards.count(), 4)
+
+        with mock.patch.object(PromoCode, "rebalance_shards", autospec=True) as rebalance:
+            promo = PromoCode.objects.get(pk=promo.pk)
+            promo.is_active = False
+            promo.save()
+            rebalance.assert_not_called()
+
+            promo.usage_limit = self.LIMIT + 5
+            promo.save()
+            self.assertEqual(rebalance.call_count, 1)
+            # Holat saqlangandan keyin yangilanadi — takroriy saqlash qayta taqsimlamaydi
+            promo.save()
+            self.assertEqual(rebalance.call_count, 1)
+
+        promo.shard_count = 1
+        promo.save()
+        self.assertFalse(promo.shards.exists())
+
+
+class OrderHistoryQueryBudgetTests(TestCase):
+    """
+    Buyurtmalar tarixi sahifasi so‘rovlari soni buyurtmalar va qatorlar soniga bog‘liq emas:
+    sahifa uchun bitta so‘rov + qatorlar prefetch i (order_items_queryset — katalogga JOIN yo‘q).
+    """
+    QUERY_BUDGET = 2
+
+    def setUp(self):
+        self.variant = create_variant(100)
+        self.client = APIClient()
+
+    def create_history(self, email, orders, items):
+        user = User.objects.create_user(email=email)
+        for _ in range(orders):
+            order = Order(user=user, address="Toshkent", total_price=Decimal(100) * items)
+            order.save(skip_calculation=True)
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, variant=self.variant, price=Decimal(100), title="variant", variant_label="Qora 128GB")
+                for _ in range(items)
+            ])
+        return user
+
+    def assert_history_budget(self, user):
+        self.client.force_authenticate(user)
+        with self.assertNumQueries(self.QUERY_BUDGET):
+            response = self.client.get(reverse("orders"))
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_query_count_does_not_grow_with_items(self):
+        small = self.assert_history_budget(self.create_history("kichik@example.com", 1, 1))
+        large = self.assert_history_budget(self.create_history("katta@example.com", 12, 10))
+
+        self.assertEqual(len(small["results"]), 1)
+        self.assertEqual(len(large["results"]), 12)
+        self.assertTrue(all(len(order["items"]) == 10 for order in large["results"]))
+
+
+class MergeSessionCartTests(TestCase):
+    """Login da sessiya savati birlashtiriladi: miqdorlar yo‘qolmaydi, hold lar reserved bilan mos qoladi."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="merge@example.com")
+        self.variant = create_variant(50, "merge")
+        self.other = create_variant(50, "other")
+        self.bundle = Bundle.objects.create(product=self.variant.product, name=Bundle.BUNDLE_CHOICES[0][0])
+        self.accessories = [Accessory.objects.create(title=f"Aksessuar {i}", price=Decimal(10)) for i in range(2)]
+        self.session_cart = Cart.objects.create(session_key="anonim")
+        self.user_cart = Cart.objects.create(user=self.user)
+
+    def add(self, cart, quantity, variant=None, bundle=None, accessory=None):
+        CartItem.objects.create(cart=cart, variant=variant, bundle=bundle, accessory=accessory, quantity=quantity)
+        if variant is not None:
+            hold_stock(cart, variant.pk)
+
+    def merge(self):
+        request = SimpleNamespace(session=SimpleNamespace(session_key="anonim"))
+        self.assertEqual(merge_session_cart(request, self.user), self.user_cart)
+        self.assertFalse(Cart.objects.filter(pk=self.session_cart.pk).exists())
+
+    def lines(self):
+        return sorted(
+            self.user_cart.items.values_list("variant_id", "bundle_id", "accessory_id", "quantity"),
+            key=lambda line: tuple(value or 0 for value in line),
+        )
+
+    def assert_holds_consistent(self):
+        for variant in (self.variant, self.other):
+            variant.refresh_from_db()
+            held = StockReservation.objects.filter(variant=variant).aggregate(total=Sum("quantity"))["total"] or 0
+            self.assertEqual(variant.reserved, held)
+            in_cart = self.user_cart.items.filter(variant=variant).aggregate(total=Sum("quantity"))["total"] or 0
+            self.assertEqual(held, in_cart)
+
+    def test_variant_bundle_line_with_different_accessory(self):
+        # (variant, bundle) unique — aksessuar farq qilsa ham bitta qatorga yig‘iladi
+        first, second = self.accessories
+        self.add(self.user_cart, 1, self.variant, self.bundle, first)
+        self.add(self.session_cart, 2, self.variant, self.bundle, second)
+
+        self.merge()
+
+        self.assertEqual(self.lines(), [(self.variant.pk, self.bundle.pk, first.pk, 3)])
+        self.assert_holds_consistent()
+
+    def test_accessory_only_lines(self):
+        # variant/bundle NULL qatorlar faqat aksessuar bo‘yicha mos keladi
+        first, second = self.accessories
+        self.add(self.user_cart, 1, accessory=first)
+        self.add(self.session_cart, 2, accessory=first)
+        self.add(self.session_cart, 4, accessory=second)
+        self.add(self.session_cart, 1, self.variant)
+
+        self.merge()
+
+        self.assertEqual(self.lines(), [
+            (None, None, first.pk, 3),
+            (None, None, second.pk, 4),
+            (self.variant.pk, None, None, 1),
+        ])
+        self.assert_holds_consistent()
+
+    def test_reservations_are_handed_over(self):
+        # Umumiy variant hold lari qo‘shiladi, faqat sessiyadagisi foydalanuvchi savatiga o‘tadi
+        self.add(self.user_cart, 2, self.variant)
+        self.add(self.session_cart, 3, self.variant)
+        self.add(self.session_cart, 1, self.variant, self.bundle)
+        self.add(self.session_cart, 5, self.other)
+
+        self.merge()
+
+        self.assertEqual(self.lines(), [
+            (self.variant.pk, None, None, 5),
+            (self.variant.pk, self.bundle.pk, None, 1),
+            (self.other.pk, None, None, 5),
+        ])
+        self.assertEqual(set(StockReservation.objects.values_list("cart_id", "variant_id", "quantity")), {
+            (self.user_cart.pk, self.variant.pk, 6),
+            (self.user_cart.pk, self.other.pk, 5),
+        })
+        self.assert_holds_consistent()
+
+
+    def login(self):
+        self.user.set_password("parol12345")
+        self.user.is_active = True
+        self.user.save()
+        response = self.client.post(reverse("login"), {"email": self.user.email, "password": "parol12345"})
+        self.assertEqual(response.status_code, 200)
+
+    def test_login_does_not_create_empty_session_cart(self):
+        for store in ("orders.cart_storage.DatabaseCartStore", "orders.cart_storage.CacheCartStore"):
+            with self.subTest(store=store), override_settings(ANONYMOUS_CART_STORE=store):
+                # Vaqtincha yaratilib, birlashtirishda o‘chiriladigan savat ham bo‘lmasin
+                with CaptureQueriesContext(connection) as queries:
+                    self.login()
+                inserts = [query["sql"] for query in queries if query["sql"].startswith('INSERT INTO "orders_cart"')]
+                self.assertEqual(inserts, [])
+
+    def test_login_persists_cached_cart(self):
+        session = self.client.session
+        session.save()
+        CacheCartStore(SimpleNamespace(session=session)).add(None, None, self.accessories[0], 2)
+
+        self.login()
+        self.assertIn((None, None, self.accessories[0].pk, 2), self.lines())
+
+class CacheCartStoreTests(TransactionTestCase):
+    """Anonim (keshdagi) savat: parallel qo‘shishlar yo‘qolmaydi, persist unique_together ni buzmaydi."""
+    THREADS = 8
+    ATTEMPTS = 5
+
+    def setUp(self):
+        self.variant = create_variant(50, "kesh")
+        self.bundle = Bundle.objects.create(product=self.variant.product, name=Bundle.BUNDLE_CHOICES[0][0])
+        self.accessories = [
+            Accessory.objects.create(title=f"Aksessuar {i}", price=Decimal(10)) for i in range(self.THREADS)
+        ]
+        session = SessionStore()
+        session.create()
+        self.request = SimpleNamespace(session=session)
+        self.store = CacheCartStore(self.request)
+        self.addCleanup(self.store.clear)
+
+    def test_concurrent_adds_keep_every_line(self):
+        write = CacheCartStore.write
+
+        def slow_write(store, data):
+            # O‘qish va yozish orasidagi oyna kengaytiriladi — qulfsiz poyga aniq namoyon bo‘ladi
+            time.sleep(0.005)
+            write(store, data)
+
+        def add(index):
+            for _ in range(self.ATTEMPTS):
+                CacheCartStore(self.request).add(None, None, self.accessories[index], 1)
+
+        with mock.patch.object(CacheCartStore, "write", slow_write):
+            self.assertEqual(run_in_threads(self.THREADS, add), [])
+        lines = self.store.read()["lines"]
+        self.assertEqual(sorted(line[3] for line in lines), sorted(accessory.pk for accessory in self.accessories))
+        self.assertTrue(all(line[4] == self.ATTEMPTS for line in lines))
+        self.assertEqual(len({line[0] for line in lines}), self.THREADS)
+
+    def test_persist_merges_lines_by_database_key(self):
+        first, second, third = self.accessories[:3]
+        # Shu sessiya uchun bazada allaqachon savat bor (masalan, oldingi muvaffaqiyatsiz login)
+        cart = Cart.objects.create(session_key=self.request.session.session_key)
+        CartItem.objects.create(cart=cart, accessory=third, quantity=1)
+        self.store.add(self.variant, self.bundle, first, 1)
+        self.store.add(self.variant, self.bundle, second, 2)
+        self.store.add(None, None, third, 4)
+        self.store.add(self.variant, None, None, 1)
+
+        with transaction.atomic():
+            self.assertEqual(self.store.persist(), cart)
+
+        self.assertEqual(
+            sorted(cart.items.values_list("variant_id", "bundle_id", "accessory_id", "quantity"),
+                   key=lambda line: tuple(value or 0 for value in line)),
+            [(None, None, third.pk, 5), (self.variant.pk, None, None, 1), (self.variant.pk, self.bundle.pk, first.pk, 3)],
+        )
+        self.assertEqual(self.store.read()["lines"], [])
+
+    def test_persist_places_holds(self):
+        scarce = create_variant(1, "kam")
+        self.store.add(self.variant, None, None, 3)
+        self.store.add(scarce, None, None, 2)
+
+        # Tashqi tranzaksiyasiz: on_commit(clear) shu zahoti, qulf ichida bajariladi
+        cart = self.store.persist()
+
+        self.variant.refresh_from_db()
+        scarce.refresh_from_db()
+        self.assertEqual(self.variant.reserved, 3)
+        self.assertEqual(StockReservation.objects.get(cart=cart, variant=self.variant).quantity, 3)
+        # Qoldiq yetmagan variant qatori hold siz saqlanadi
+        self.assertEqual(scarce.reserved, 0)
+        self.assertTrue(cart.items.filter(variant=scarce, quantity=2).exists())
+        self.assertEqual(self.store.read()["lines"], [])
+
+    def test_clear_takes_the_lock(self):
+        self.store.add(None, None, self.accessories[0], 1)
+        other = CacheCartStore(self.request)
+        other.lock_timeout = 0.05
+
+        with self.store.locked():
+            with self.assertRaises(CartBusy):
+                other.clear()
+        self.assertEqual(len(self.store.read()["lines"]), 1)
+
+
+class IdempotencyTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="idem@example.com")
+        self.accessory = Accessory.objects.create(title="Aksessuar", price=Decimal(10))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add(self, key, quantity=1):
+        return self.client.post(
+            reverse("cart-add"), {"accessory_id": self.accessory.pk, "quantity": quantity},
+            format="json", HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_replay_returns_stored_response(self):
+        first = self.add("kalit-1")
+        self.assertEqual(first.status_code, 201)
+
+        replay = self.add("kalit-1")
+        self.assertEqual(replay.status_code, 201)
+        self.assertEqual(replay.content, first.content)
+        self.assertEqual(replay["Idempotent-Replayed"], "true")
+        # Ish ikkinchi marta bajarilmadi
+        self.assertEqual(CartItem.objects.get(cart__user=self.user).quantity, 1)
+
+        self.assertEqual(self.add("kalit-2").status_code, 201)
+        self.assertEqual(CartItem.objects.get(cart__user=self.user).quantity, 2)
+
+    def test_reused_key_with_other_body_is_rejected(self):
+        self.add("kalit")
+        response = self.add("kalit", quantity=5)
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(CartItem.objects.get(cart__user=self.user).quantity, 1)
+
+    def test_server_error_is_not_stored(self):
+        responses = [Response({"detail": "xato"}, status=503), Response({"ok": True}, status=201)]
+        calls = []
+
+        class FlakyView(APIView):
+            @idempotent
+            def post(self, request):
+                calls.append(1)
+                return responses[len(calls) - 1]
+
+        def post():
+            request = APIRequestFactory().post("/flaky/", {"a": 1}, format="json", HTTP_IDEMPOTENCY_KEY="kalit")
+            force_authenticate(request, self.user)
+            return FlakyView.as_view()(request)
+
+        self.assertEqual(post().status_code, 503)
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.assertEqual(post().status_code, 201)
+        replay = post()
+        self.assertEqual((replay.status_code, replay["Idempotent-Replayed"]), (201, "true"))
+        self.assertEqual(len(calls), 2)
+
+    def test_anonymous_requests_are_not_recorded(self):
+        # Anonim savat keshda — kesh o‘zgarishlari rollback bo‘lmaydi, shuning uchun kalit saqlanmaydi
+        request = SimpleNamespace(
+            headers={"Idempotency-Key": "kalit"}, user=SimpleNamespace(is_authenticated=False),
+        )
+        handler = mock.Mock(return_value=Response(status=201))
+        self.assertEqual(idempotent(handler)(None, request).status_code, 201)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+
+class IdempotentCheckoutConcurrencyTests(TransactionTestCase):
+    THREADS = 6
+
+    def test_same_key_creates_single_order(self):
+        variant = create_variant(10, "idem")
+        user = User.objects.create_user(email="checkout@example.com")
+        cart = Cart.objects.create(user=user)
+        with transaction.atomic():
+            CartItem.objects.create(cart=cart, variant=variant, quantity=2)
+            hold_stock(cart, variant.pk)
+        responses = []
+
+        def order(index):
+            client = APIClient()
+            client.force_authenticate(user)
+            responses.append(client.post(
+                reverse("orders"), {"address": "Toshkent"}, format="json", HTTP_IDEMPOTENCY_KEY="buyurtma",
+            ))
+
+        self.assertEqual(run_in_threads(self.THREADS, order), [])
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual({response.status_code for response in responses}, {201})
+        self.assertEqual(len({response.content for response in responses}), 1)
+        self.assertEqual(sum(response.has_header("Idempotent-Replayed") for response in responses), self.THREADS - 1)
+        variant.refresh_from_db()
+        self.assertEqual((variant.stock, variant.reserved), (8, 0))
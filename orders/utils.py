@@ -1,4 +1,36 @@
-from .models import Cart
+from django.db import connection, transaction
+from django.db.models import Prefetch, prefetch_related_objects
+
+from .models import Cart, CartItem, StockReservation
+
+
+def cart_items_queryset():
+    """
+    Savat qatorlari uchun yuklash rejasi: variant (mahsulot, rang, xotira), bundle (saqlangan
+    narxi bilan) va aksessuar bitta JOIN li so‘rovda.
+    """
+    return (
+        CartItem.objects.select_related(
+            'variant__product', 'variant__color', 'variant__memory', 'bundle', 'accessory',
+        ).order_by('id')
+    )
+
+
+def load_cart(cart):
+    """
+    Savatni barcha qatorlari bilan qat’iy sonli so‘rovda yuklaydi va qator hamda
+    savat summalarini bir marta hisoblaydi (CartItem.subtotal, Cart.total_price() ularni qaytaradi).
+    """
+    prefetch_related_objects([cart], Prefetch('items', queryset=cart_items_queryset()))
+    for item in cart.items.all():
+        item.computed_subtotal = item.subtotal
+    cart.computed_total = sum(item.computed_subtotal for item in cart.items.all())
+    return cart
+
+
+def load_cart_item(item):
+    # Mutatsiya javobi uchun bitta qatorni o‘sha reja bilan qayta yuklaydi
+    return cart_items_queryset().get(pk=item.pk)
 
 def get_or_create_cart(request):
     """
@@ -20,3 +52,71 @@ def get_or_create_cart(request):
         cart, _ = Cart.objects.get_or_create(session_key=session_key)
 
     return cart
+
+
+# Savat qatori kaliti: CartAddAPIView dagi get_or_create bilan bir xil (variant, bundle, aksessuar).
+# variant va bundle ikkalasi ham bor qatorlarda unique_together (cart, variant, bundle) ustun turadi.
+# NULL lar COALESCE(.., 0) bilan tenglashtiriladi (IS NOT DISTINCT FROM dan farqli, hash join ishlaydi)
+LINE_MATCH_SQL = """
+    COALESCE(t.variant_id, 0) = COALESCE(s.variant_id, 0)
+    AND COALESCE(t.bundle_id, 0) = COALESCE(s.bundle_id, 0)
+    AND (COALESCE(t.accessory_id, 0) = COALESCE(s.accessory_id, 0) OR (t.variant_id IS NOT NULL AND t.bundle_id IS NOT NULL))
+"""
+
+
+def line_key(variant_id, bundle_id, accessory_id):
+    # LINE_MATCH_SQL ning Python dagi nusxasi: bir xil kalitli qatorlar bitta CartItem ga yig‘iladi
+    if variant_id and bundle_id:
+        return variant_id, bundle_id
+    return variant_id, bundle_id, accessory_id
+
+
+def merge_session_cart(request, user):
+    """
+    Login paytida sessiya (anonim) savatini foydalanuvchi savatiga qo‘shadi: bir xil qatorlar
+    miqdori yig‘iladi, qolganlari ko‘chiriladi, hold lar ham birlashtiriladi, sessiya savati o‘chiriladi.
+    Hammasi bitta tranzaksiyada va qatorlar soniga bog‘liq bo‘lmagan sonli so‘rovda.
+    Qaytaradi: foydalanuvchi savati yoki sessiya savati bo‘lmasa None.
+    """
+    session_key = request.session.session_key
+    if not session_key:
+        return None
+
+    with transaction.atomic():
+        session_cart = Cart.objects.select_for_update().filter(session_key=session_key, user__isnull=True).first()
+        if not session_cart:
+            return None
+        cart, _ = Cart.objects.get_or_create(user=user)
+        Cart.objects.select_for_update().filter(pk=cart.pk).exists()
+
+        items = CartItem._meta.db_table
+        reservations = StockReservation._meta.db_table
+        params = {"session": session_cart.pk, "user": cart.pk}
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                UPDATE {items} AS t SET quantity = t.quantity + s.quantity
+                FROM {items} AS s
+                WHERE s.cart_id = %(session)s AND t.cart_id = %(user)s AND {LINE_MATCH_SQL}
+            """, params)
+            cursor.execute(f"""
+                INSERT INTO {items} (cart_id, variant_id, bundle_id, accessory_id, quantity)
+                SELECT %(user)s, s.variant_id, s.bundle_id, s.accessory_id, s.quantity
+                FROM {items} AS s
+                WHERE s.cart_id = %(session)s
+                  AND NOT EXISTS (SELECT 1 FROM {items} AS t WHERE t.cart_id = %(user)s AND {LINE_MATCH_SQL})
+            """, params)
+            # Hold lar yig‘indisi (ProductVariant.reserved) o‘zgarmaydi — faqat egasi almashadi
+            cursor.execute(f"""
+                UPDATE {reservations} AS t
+                SET quantity = t.quantity + s.quantity, expires_at = GREATEST(t.expires_at, s.expires_at)
+                FROM {reservations} AS s
+                WHERE s.cart_id = %(session)s AND t.cart_id = %(user)s AND t.variant_id = s.variant_id
+            """, params)
+            cursor.execute(f"""
+                UPDATE {reservations} SET cart_id = %(user)s
+                WHERE cart_id = %(session)s
+                  AND variant_id NOT IN (SELECT variant_id FROM {reservations} WHERE cart_id = %(user)s)
+            """, params)
+        # Qatorlar va birlashtirilgan hold lar CASCADE bilan
+        session_cart.delete()
+    return cart
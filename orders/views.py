@@ -1,4 +1,4 @@
-from django.db.models import Sum
+from django.db.models import Prefetch, Sum
 from rest_framework.exceptions import ValidationError
 from rest_framework.generics import GenericAPIView, get_object_or_404
 from rest_framework.permissions import AllowAny, IsAuthenticated
@@ -6,25 +6,41 @@ from rest_framework.response import Response
 from rest_framework import status, generics
 
 from products.models import ProductVariant, Bundle, Accessory
-from .models import Order, PromoCode, CartItem
+from products.pagination import KeysetPagination
+from .cart_storage import get_cart_store
+from .idempotency import idempotent
+from .models import Order, PromoCode
 from .serializers import OrderSerializer, PromoCodeSerializer, CartItemSerializer, CartSerializer
-from .utils import get_or_create_cart
+from .services import order_items_queryset
 
 
 class OrderGenericAPIView(generics.GenericAPIView):
     serializer_class = OrderSerializer
-    permission_classes = []  # login shart emas
+    permission_classes = []  # buyurtma berish uchun login shart emas
+    pagination_class = KeysetPagination
+
+    def get_permissions(self):
+        # Ro‘yxat faqat o‘z buyurtmalari — login kerak
+        if self.request.method == "GET":
+            return [IsAuthenticated()]
+        return super().get_permissions()
 
     def get_queryset(self):
-        # Buyurtmalarni tegishli bog‘lamalar bilan birga olish
-        return Order.objects.all().select_related("delivery_option", "user").prefetch_related("items__variant")
+        # Faqat so‘rovchining buyurtmalari; qatorlar bitta prefetch da (saqlangan nomlar — katalogga JOIN yo‘q)
+        return Order.objects.filter(user=self.request.user).prefetch_related(
+            Prefetch("items", queryset=order_items_queryset())
+        )
+
+    def get_keyset_ordering(self):
+        return "-created_at"
 
     def get(self, request, *args, **kwargs):
-        # Barcha buyurtmalarni ro‘yxat tarzida qaytaradi
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        # Buyurtmalar tarixi cursor bo‘yicha sahifalab qaytariladi (sahifa uchun 2 ta so‘rov)
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
+    @idempotent
     def post(self, request, *args, **kwargs):
         # Yangi buyurtma yaratish
         serializer = self.get_serializer(data=request.data)
@@ -39,37 +55,29 @@ class CartDetailAPIView(generics.RetrieveAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_object(self):
-        # Foydalanuvchining mavjud yoki yangi savatini qaytaradi
-        return get_or_create_cart(self.request)
+        # Foydalanuvchining mavjud yoki yangi savatini barcha qatorlari bilan qaytaradi
+        return get_cart_store(self.request).load()
 
 
 class CartAddAPIView(generics.CreateAPIView):
     serializer_class = CartItemSerializer
     permission_classes = [IsAuthenticated]
 
+    @idempotent
     def create(self, request, *args, **kwargs):
-        cart = get_or_create_cart(request)
         variant_id = request.data.get("variant_id")
         bundle_id = request.data.get("bundle_id")
         accessory_id = request.data.get("accessory_id")
         quantity = int(request.data.get("quantity", 1))
 
         variant = ProductVariant.objects.filter(pk=variant_id).first() if variant_id else None
-        bundle = Bundle.objects.filter(pk=bundle_id, product=variant.product).first() if bundle_id and variant else None
+        bundle = Bundle.objects.filter(pk=bundle_id, product_id=variant.product_id).first() if bundle_id and variant else None
         accessory = Accessory.objects.filter(pk=accessory_id).first() if accessory_id else None
 
         if not variant and not accessory and not bundle:
             raise ValidationError("Hech qanday mahsulot tanlanmagan.")
 
-        item, created = CartItem.objects.get_or_create(
-            cart=cart,
-            variant=variant,
-            bundle=bundle,
-            accessory=accessory
-        )
-        item.quantity = item.quantity + quantity if not created else quantity
-        item.save()
-
+        item = get_cart_store(request).add(variant, bundle, accessory, quantity)
         serializer = self.get_serializer(item)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -78,11 +86,9 @@ class CartUpdateQuantityAPIView(generics.UpdateAPIView):
     serializer_class = CartItemSerializer
     permission_classes = [IsAuthenticated]
 
+    @idempotent
     def update(self, request, *args, **kwargs):
-        cart = get_or_create_cart(request)
-        item = get_object_or_404(CartItem, pk=request.data.get("item_id"), cart=cart)
-        item.quantity = int(request.data.get("quantity", 1))
-        item.save()
+        item = get_cart_store(request).update(request.data.get("item_id"), int(request.data.get("quantity", 1)))
         serializer = self.get_serializer(item)
         return Response(serializer.data)
 
@@ -91,10 +97,9 @@ class CartRemoveAPIView(generics.DestroyAPIView):
     serializer_class = CartItemSerializer
     permission_classes = [IsAuthenticated]
 
+    @idempotent
     def delete(self, request, *args, **kwargs):
-        cart = get_or_create_cart(request)
-        item = get_object_or_404(CartItem, pk=request.data.get("item_id"), cart=cart)
-        item.delete()
+        get_cart_store(request).remove(request.data.get("item_id"))
         return Response({"detail": "Item removed"}, status=status.HTTP_200_OK)
 
 
@@ -102,6 +107,5 @@ class CartClearAPIView(generics.DestroyAPIView):
     permission_classes = [AllowAny]
 
     def delete(self, request, *args, **kwargs):
-        cart = get_or_create_cart(request)
-        cart.items.all().delete()
+        get_cart_store(request).clear()
         return Response({"detail": "Cart cleared"}, status=status.HTTP_200_OK)
@@ -77,18 +77,18 @@ class ProductAdmin(admin.ModelAdmin):
     )
 
     def likes_count_display(self, obj):
-        return obj.likes.count()
+        return obj.likes_count
     likes_count_display.short_description = "Likes"
 
     def main_image_preview(self, obj):
-        main_image = obj.images.filter(is_main=True).first()
-        if main_image:
-            return format_html('<img src="{}" width="100" style="border-radius:10px;" />', main_image.image.url)
+        # Saqlangan nomdan — har bir qator uchun rasm so‘rovi yo‘q
+        if obj.main_image_name:
+            return format_html('<img src="{}" width="100" style="border-radius:10px;" />', obj.main_image_thumbnail)
         return "-"
     main_image_preview.short_description = "Main Image"
 
     def get_queryset(self, request):
-        return super().get_queryset(request).prefetch_related('likes', 'images', 'category')
+        return super().get_queryset(request).select_related('category')
 
 # Aksessuar tariflari admini
 @admin.register(AccessoryTarif)
@@ -0,0 +1,80 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Katalog versiyasi: mahsulot/kategoriya o‘zgarganda oshiriladi,
+# eski versiyadagi kesh kalitlari shunchaki ishlatilmay qoladi.
+CATALOG_VERSION_KEY = "catalog:version"
+# Oxirgi o‘zgarish vaqti (Last-Modified sarlavhasi uchun)
+CATALOG_MODIFIED_KEY = "catalog:modified"
+# Hali versiyaga kiritilmagan birinchi like o‘zgarishi vaqti
+CATALOG_LIKES_DIRTY_KEY = "catalog:likes-dirty"
+
+
+def get_catalog_version():
+    values = cache.get_many([CATALOG_VERSION_KEY, CATALOG_LIKES_DIRTY_KEY])
+    dirty_since = values.get(CATALOG_LIKES_DIRTY_KEY)
+    if dirty_since is not None and time.time() - dirty_since >= get_likes_refresh_interval():
+        # Like lar (likes_count, ordering=likes) ko‘pi bilan shu interval eskirgan holda ko‘rinadi
+        return bump_catalog_version()
+    version = values.get(CATALOG_VERSION_KEY)
+    if version is None:
+        # Kalit yo‘qolgan bo‘lsa (restart, eviction), vaqtdan boshlaymiz —
+        # shunda eski kesh yozuvlari bilan to‘qnashuv bo‘lmaydi
+        cache.add(CATALOG_VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    cache.set(CATALOG_MODIFIED_KEY, int(time.time()), timeout=None)
+    # Yangi versiya kutayotgan like larni ham qamraydi
+    cache.delete(CATALOG_LIKES_DIRTY_KEY)
+    try:
+        return cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        return get_catalog_version()
+
+
+def mark_likes_changed():
+    """
+    Like bosilishi katalog versiyasini darhol oshirmaydi — aks holda har bir bosish ro‘yxat
+    keshlarini tozalab yuboradi. Birinchi o‘zgarish vaqti belgilanadi va versiya keyingi
+    o‘qishda, interval o‘tgan bo‘lsa, bir marta oshiriladi (get_catalog_version).
+    """
+    cache.add(CATALOG_LIKES_DIRTY_KEY, time.time(), timeout=None)
+
+
+def get_catalog_last_modified():
+    """Katalog oxirgi o‘zgargan vaqt (unix timestamp, soniya)."""
+    modified = cache.get(CATALOG_MODIFIED_KEY)
+    if modified is None:
+        # Noma’lum bo‘lsa — hozirgi vaqt: eski nusxa hech qachon yangi deb hisoblanmaydi
+        cache.add(CATALOG_MODIFIED_KEY, int(time.time()), timeout=None)
+        modified = cache.get(CATALOG_MODIFIED_KEY)
+    return modified
+
+
+def catalog_cache_key(prefix, request, params):
+    """
+    Query parametrlari normallashtirilgan (tartiblangan) holda kesh kalitini yasaydi.
+    Faqat `params` ro‘yxatidagi parametrlar hisobga olinadi. Javobda build_absolute_uri bilan
+    yasalgan URL lar bor — shuning uchun sxema va host ham kalitga kiradi.
+    """
+    parts = [request.scheme, request.get_host()]
+    for name in sorted(params):
+        values = sorted(v for v in request.query_params.getlist(name) if v != "")
+        if values:
+            parts.append(f"{name}={','.join(values)}")
+    digest = hashlib.md5("&".join(parts).encode()).hexdigest()
+    return f"catalog:{prefix}:v{get_catalog_version()}:{digest}"
+
+
+def get_catalog_cache_timeout():
+    return getattr(settings, "CATALOG_CACHE_TIMEOUT", 60 * 15)
+
+
+def get_likes_refresh_interval():
+    return getattr(settings, "CATALOG_LIKES_REFRESH_INTERVAL", 60)
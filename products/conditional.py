@@ -0,0 +1,51 @@
+"""
+Shartli GET (ETag / Last-Modified) uchun validatorlar.
+
+Validatorlar javob tanasini yasamasdan, keshdagi katalog versiyasidan (va detal uchun
+bitta yengil so‘rovdan) hisoblanadi — 304 javobida asosiy so‘rovlar ham, serializatsiya ham bo‘lmaydi.
+View larda django.views.decorators.http.condition bilan ishlatiladi.
+"""
+import hashlib
+from datetime import datetime, timezone
+
+from .cache import catalog_cache_key, get_catalog_last_modified
+
+
+def _etag(*parts):
+    return hashlib.md5(":".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def catalog_last_modified(request, *args, **kwargs):
+    return datetime.fromtimestamp(get_catalog_last_modified(), tz=timezone.utc)
+
+
+def catalog_etag(prefix, params=()):
+    """
+    Ro‘yxatlar uchun ETag: katalog versiyasi + host + `params` dagi query parametrlar.
+    URL kwargs (slug, product_id) ham qo‘shiladi.
+    """
+    def etag_func(request, *args, **kwargs):
+        return _etag(catalog_cache_key(prefix, request, params), *sorted(kwargs.items()))
+    return etag_func
+
+
+def _product_state(request, slug):
+    # ETag va Last-Modified uchun bitta yengil so‘rov (so‘rov obyektida eslab qolinadi)
+    from .models import Product
+
+    if getattr(request, "_product_state", None) is None:
+        request._product_state = (
+            Product.objects.filter(slug=slug, is_available=True).values_list("updated_at", "likes_count").first(),
+        )
+    return request._product_state[0]
+
+
+def product_detail_etag(request, slug):
+    # like soni katalog versiyasini oshirmaydi, shuning uchun u ham validatorga kiradi
+    return _etag(catalog_cache_key("product-detail", request, ()), slug, _product_state(request, slug))
+
+
+def product_detail_last_modified(request, slug):
+    state = _product_state(request, slug)
+    modified = catalog_last_modified(request)
+    return max(state[0], modified) if state else modified
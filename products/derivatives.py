@@ -0,0 +1,194 @@
+"""
+Rasm derivativlari: yuklangan rasmlarning belgilangan kengliklardagi JPEG va WebP nusxalari.
+
+Derivativlar `MEDIA_ROOT/derivatives/<asl nom>/<kenglik>.<kengaytma>` ga yoziladi va
+so‘rov jarayonidan tashqarida, alohida jarayonlar pulida (ProcessPoolExecutor) yaratiladi.
+Worker funksiyasi (render_derivatives) faqat Pillow va fayl tizimi bilan ishlaydi — worker
+jarayonida Django sozlanmaydi. Modulning qolgan qismi (rejalashtirish, URL lar) Django jarayonida ishlaydi.
+
+Tayyor derivativlar rasm egasi qatorida (`derivatives_name`) qayd etiladi — srcset lar shu
+yozuvdan quriladi, so‘rov vaqtida storage tekshirilmaydi.
+"""
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connection
+from PIL import Image, ImageOps
+
+from .cache import bump_catalog_version
+from .storage import is_blob
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_WIDTHS = (320, 640, 1024)
+DERIVATIVE_FORMATS = {"jpeg": ".jpg", "webp": ".webp"}
+DERIVATIVES_DIR = "derivatives"
+# Admin va ro‘yxatlardagi eskiz (thumbnail) kengligi
+THUMBNAIL_WIDTH = DERIVATIVE_WIDTHS[0]
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+
+_executor = None
+_record_executor = None
+
+
+def derivative_name(name, width, image_format):
+    base, _ = os.path.splitext(name)
+    return f"{DERIVATIVES_DIR}/{base}/{width}{DERIVATIVE_FORMATS[image_format]}"
+
+
+def derivative_url(name, width, image_format):
+    return default_storage.url(derivative_name(name, width, image_format))
+
+
+def image_srcset(name, derivatives_name, request=None):
+    """
+    Serializerlar uchun {"jpeg": {"320": url, ...}, "webp": {...}} ko‘rinishidagi xarita.
+    `derivatives_name` — qatorda qayd etilgan, derivativlari tayyor rasm nomi. U joriy rasmga
+    mos kelmasa (worker navbatda yoki xato bergan) None — mijoz asl rasm URL idan foydalanadi.
+    """
+    if not name or name != derivatives_name:
+        return None
+
+    srcset = {}
+    for image_format in DERIVATIVE_FORMATS:
+        urls = {}
+        for width in DERIVATIVE_WIDTHS:
+            url = derivative_url(name, width, image_format)
+            urls[str(width)] = request.build_absolute_uri(url) if request is not None else url
+        srcset[image_format] = urls
+    return srcset
+
+
+def record_derivatives(name):
+    """
+    Derivativlari tayyor rasm nomini shu rasmni ishlatadigan barcha qatorlarga yozadi.
+    Qaytaradi: o‘zgargan qatorlar soni.
+    """
+    from .models import IMAGE_FIELDS, Product
+
+    updated = sum(
+        model.objects.filter(**{field: name}).exclude(derivatives_name=name).update(derivatives_name=name)
+        for model, field in IMAGE_FIELDS.items()
+    )
+    updated += Product.objects.filter(main_image_name=name).exclude(
+        main_image_derivatives_name=name
+    ).update(main_image_derivatives_name=name)
+    return updated
+
+
+def render_derivatives(media_root, name, force=False):
+    """
+    Worker jarayonida ishlaydi: bitta rasm uchun barcha derivativlarni yaratadi.
+    Tayyor (manbadan yangi) fayllar o‘tkazib yuboriladi, shuning uchun qayta ishga tushirish xavfsiz.
+    Qaytaradi: yaratilgan fayllar soni.
+    """
+    source = os.path.join(media_root, name)
+    source_mtime = os.path.getmtime(source)
+    targets = [
+        (width, image_format, os.path.join(media_root, derivative_name(name, width, image_format)))
+        for width in DERIVATIVE_WIDTHS
+        for image_format in DERIVATIVE_FORMATS
+    ]
+    # Kontent bo‘yicha saqlangan bloblar o‘zgarmaydi — derivativ mavjud bo‘lsa yetarli (xesh bo‘yicha kesh)
+    immutable = is_blob(name)
+    pending = [
+        target for target in targets
+        if force or not os.path.exists(target[2])
+        or (not immutable and os.path.getmtime(target[2]) < source_mtime)
+    ]
+    if not pending:
+        return 0
+
+    with Image.open(source) as original:
+        original = ImageOps.exif_transpose(original)
+        if original.mode in ("RGBA", "LA", "P"):
+            # JPEG shaffoflikni qo‘llamaydi — oq fon ustiga joylanadi
+            rgba = original.convert("RGBA")
+            background = Image.new("RGB", rgba.size, (255, 255, 255))
+            background.paste(rgba, mask=rgba.getchannel("A"))
+            original = background
+        else:
+            original = original.convert("RGB")
+
+        for width, image_format, path in pending:
+            resized = original
+            if original.width > width:
+                height = round(original.height * width / original.width)
+                resized = original.resize((width, height), Image.Resampling.LANCZOS)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temporary = f"{path}.{os.getpid()}.tmp"
+            if image_format == "jpeg":
+                resized.save(temporary, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+            else:
+                resized.save(temporary, "WEBP", quality=WEBP_QUALITY, method=4)
+            # Yarim yozilgan fayl hech qachon tayyor deb hisoblanmasligi uchun atomar almashtirish
+            os.replace(temporary, path)
+    return len(pending)
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=getattr(settings, "IMAGE_DERIVATIVE_WORKERS", 2),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def reset_executor():
+    # Worker jarayoni yiqilsa pul "broken" holatda qoladi va boshqa vazifa qabul qilmaydi
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+_record_executor = None
+
+
+def get_record_executor():
+    # Natijalar bitta oqimda qayd etiladi — callback lar bazaga to‘g‘ridan-to‘g‘ri yozmaydi
+    global _record_executor
+    if _record_executor is None:
+        _record_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-derivatives")
+    return _record_executor
+
+
+def _record(name, created):
+    try:
+        if record_derivatives(name) or created:
+            # Yangi derivativlar srcset larda ko‘rinishi uchun keshlangan ro‘yxatlar va ETag lar eskiradi
+            bump_catalog_version()
+    except Exception:
+        logger.exception("Derivativlar qayd etilmadi: %s", name)
+    finally:
+        connection.close()
+
+
+def _on_done(name):
+    def callback(future):
+        if future.exception() is not None:
+            logger.error("Derivativ yaratilmadi: %s", name, exc_info=future.exception())
+        else:
+            # Fayllar allaqachon bor bo‘lsa ham qayd etiladi: eskirgan obyekt saqlanib yozuvni o‘chirgan bo‘lishi mumkin
+            get_record_executor().submit(_record, name, future.result())
+    return callback
+
+
+def schedule_derivatives(name):
+    # So‘rov jarayonini kutdirmaydi: ish jarayonlar puliga topshiriladi
+    if not name:
+        return
+    try:
+        future = get_executor().submit(render_derivatives, str(settings.MEDIA_ROOT), name)
+    except BrokenProcessPool:
+        # Oldingi worker yiqilgan — pul yangidan yaratiladi va vazifa bir marta qayta topshiriladi
+        logger.warning("Derivativ jarayonlar puli qayta yaratilmoqda")
+        reset_executor()
+        future = get_executor().submit(render_derivatives, str(settings.MEDIA_ROOT), name)
+    future.add_done_callback(_on_done(name))
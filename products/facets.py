@@ -0,0 +1,98 @@
+from decimal import Decimal
+from functools import reduce
+from operator import and_
+
+from django.db.models import Count, Max, Min, Q
+
+from .filters import FACET_FIELDS
+from .models import Product
+
+PRICE_BUCKETS = 10
+
+
+def _price_ranges(min_price, max_price, buckets=PRICE_BUCKETS):
+    # Narx oralig‘ini teng bo‘laklarga ajratadi, oxirgi bo‘lak max_price ni ham o‘z ichiga oladi
+    if min_price is None:
+        return []
+    if min_price == max_price:
+        return [(min_price, max_price)]
+    step = ((max_price - min_price) / buckets).quantize(Decimal("0.01"))
+    if step <= 0:
+        step = Decimal("0.01")
+    ranges = []
+    lower = min_price
+    for index in range(buckets):
+        upper = max_price if index == buckets - 1 else min(lower + step, max_price)
+        ranges.append((lower, upper))
+        if upper >= max_price:
+            break
+        lower = upper
+    return ranges
+
+
+def selected_filters(data):
+    """
+    ProductFilter ning cleaned_data sidan guruhlangan shartlar: {facet maydoni | "price": Q}.
+    Bir maydon ichidagi qiymatlar OR (IN), guruhlar o‘zaro AND.
+    """
+    filters = {field: Q(**{f"{field}__in": data[field]}) for field in FACET_FIELDS if data.get(field)}
+    price = Q()
+    if data.get("min_price") is not None:
+        price &= Q(price__gte=data["min_price"])
+    if data.get("max_price") is not None:
+        price &= Q(price__lte=data["max_price"])
+    if price:
+        filters["price"] = price
+    return filters
+
+
+def _other_filters(filters, group):
+    return reduce(and_, [condition for name, condition in filters.items() if name != group], Q())
+
+
+def compute_facets(queryset, filters=None):
+    """
+    Facet sonlari va narx gistogrammasi. `queryset` — facet filtrlari qo‘llanmagan natija
+    (kategoriya, qidiruv), `filters` — selected_filters() natijasi.
+    Disjunktiv hisob: har bir facet soni o‘z guruhining filtrisiz, qolgan filtrlar bilan olinadi —
+    manufacturer=apple tanlanganda boshqa ishlab chiqaruvchilar soni 0 ga tushmaydi
+    (tanlovni kengaytirish mumkin). Narx chegaralari va gistogramma ham narx filtrisiz.
+    Jami 2 ta so‘rov: narx chegaralari + bitta aggregate (COUNT ... FILTER).
+    """
+    filters = filters or {}
+    queryset = queryset.order_by()
+    without_price = _other_filters(filters, "price")
+    bounds = queryset.filter(without_price).aggregate(min_price=Min("price"), max_price=Max("price"))
+    ranges = _price_ranges(bounds["min_price"], bounds["max_price"])
+
+    aggregates = {}
+    facet_aliases = []
+    for field in FACET_FIELDS:
+        others = _other_filters(filters, field)
+        for value, label in Product._meta.get_field(field).choices:
+            alias = f"facet_{len(aggregates)}"
+            aggregates[alias] = Count("id", filter=Q(**{field: value}) & others)
+            facet_aliases.append((field, value, label, alias))
+
+    price_aliases = []
+    for index, (lower, upper) in enumerate(ranges):
+        alias = f"price_{index}"
+        condition = Q(price__gte=lower) & (Q(price__lte=upper) if index == len(ranges) - 1 else Q(price__lt=upper))
+        aggregates[alias] = Count("id", filter=condition & without_price)
+        price_aliases.append((lower, upper, alias))
+
+    counts = queryset.aggregate(**aggregates)
+
+    facets = {field: [] for field in FACET_FIELDS}
+    for field, value, label, alias in facet_aliases:
+        facets[field].append({"value": value, "label": label, "count": counts[alias]})
+
+    facets["price"] = {
+        "min": str(bounds["min_price"]) if bounds["min_price"] is not None else None,
+        "max": str(bounds["max_price"]) if bounds["max_price"] is not None else None,
+        "histogram": [
+            {"from": str(lower), "to": str(upper), "count": counts[alias]}
+            for lower, upper, alias in price_aliases
+        ],
+    }
+    return facets
@@ -0,0 +1,31 @@
+import django_filters
+
+from .models import Product
+
+# Faceted filtrlash mumkin bo‘lgan tanlovli maydonlar
+FACET_FIELDS = (
+    "manufacturer", "operating_system", "material", "construction",
+    "sim_type", "sim_count", "availability", "delivery", "warranty",
+)
+
+
+class ProductFilter(django_filters.FilterSet):
+    """
+    Tanlovli maydonlar bo‘yicha filtr: bir nechta qiymat berish mumkin
+    (?manufacturer=apple&manufacturer=samsung), turli maydonlar AND bilan birlashadi.
+    """
+    manufacturer = django_filters.MultipleChoiceFilter(choices=Product.MANUFACTURER_CHOICES)
+    operating_system = django_filters.MultipleChoiceFilter(choices=Product.OS_CHOICES)
+    material = django_filters.MultipleChoiceFilter(choices=Product.MATERIAL_CHOICES)
+    construction = django_filters.MultipleChoiceFilter(choices=Product.CONSTRUCTION_CHOICES)
+    sim_type = django_filters.MultipleChoiceFilter(choices=Product.SIM_TYPE_CHOICES)
+    sim_count = django_filters.MultipleChoiceFilter(choices=Product.SIM_COUNT_CHOICES)
+    availability = django_filters.MultipleChoiceFilter(choices=Product.AVAILABILITY_CHOICES)
+    delivery = django_filters.MultipleChoiceFilter(choices=Product.DELIVERY_CHOICES)
+    warranty = django_filters.MultipleChoiceFilter(choices=Product.WARRANTY_CHOICES)
+    min_price = django_filters.NumberFilter(field_name="price", lookup_expr="gte")
+    max_price = django_filters.NumberFilter(field_name="price", lookup_expr="lte")
+
+    class Meta:
+        model = Product
+        fields = list(FACET_FIELDS) + ["min_price", "max_price"]
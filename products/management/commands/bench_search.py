@@ -0,0 +1,106 @@
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from products.models import Category, Product
+from products.search import search_products, update_search_vector
+
+BENCH_CATEGORY = "Benchmark"
+WORDS = [
+    "smartfon", "telefon", "iphone", "galaxy", "redmi", "pro", "max", "ultra", "kamera", "batareya",
+    "смартфон", "телефон", "камера", "чехол", "зарядка", "экран", "memory", "display", "charger", "case",
+    "qora", "oq", "ko‘k", "yashil", "o‘zbek", "g‘ilof", "quvvat", "tez", "arzon", "yangi",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Qidiruv benchmarki: icontains va full-text search ni solishtiradi. "
+        "--seed N berilsa, avval N ta sintetik mahsulot yaratiladi — ular bitta tranzaksiyada "
+        "o‘lchanadi va oxirida rollback qilinadi (jonli katalogda qolmaydi)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=0, help="Yaratiladigan sintetik mahsulotlar soni (masalan 100000)")
+        parser.add_argument("--repeat", type=int, default=20, help="Har bir so‘rov necha marta bajariladi")
+        parser.add_argument("--page-size", type=int, default=12)
+        parser.add_argument("--cleanup", action="store_true", help="Eski versiyalar qoldirgan benchmark mahsulotlarini o‘chirish va chiqish")
+        parser.add_argument("queries", nargs="*", default=["iphone pro", "телефон", "o‘zbek g‘ilof", "kamera"])
+
+    def handle(self, *args, **options):
+        if options["cleanup"]:
+            deleted, _ = Category.objects.filter(name=BENCH_CATEGORY).delete()
+            self.stdout.write(f"{deleted} ta obyekt o‘chirildi.")
+            return
+
+        if not options["seed"]:
+            self.measure(options)
+            return
+
+        # Sintetik mahsulotlar is_available=True — commit qilinsa /products/ ro‘yxatida ko‘rinadi
+        with transaction.atomic():
+            self.seed(options["seed"])
+            with connection.cursor() as cursor:
+                # Rejalashtiruvchi yangi qatorlarni (o‘z tranzaksiyamizdagi) hisobga olsin
+                cursor.execute(f"ANALYZE {Product._meta.db_table}")
+            self.measure(options)
+            transaction.set_rollback(True)
+
+    def measure(self, options):
+        total = Product.objects.filter(is_available=True).count()
+        self.stdout.write(f"Katalogda {total} ta mahsulot.\n")
+
+        page_size = options["page_size"]
+        for text in options["queries"]:
+            base = Product.objects.filter(is_available=True)
+            icontains = base.filter(Q(title__icontains=text) | Q(description__icontains=text)).order_by("-created_at")
+            fts = search_products(base, text).order_by("-search_rank", "-created_at")
+
+            for label, queryset in (("icontains", icontains), ("fts", fts)):
+                timings = []
+                count = 0
+                for _ in range(options["repeat"]):
+                    started = time.perf_counter()
+                    count = queryset.count()
+                    list(queryset[:page_size])
+                    timings.append((time.perf_counter() - started) * 1000)
+                self.stdout.write(
+                    f"{text!r:24} {label:10} natija={count:<7} "
+                    f"median={statistics.median(timings):8.2f}ms p95={self.p95(timings):8.2f}ms"
+                )
+            self.stdout.write("")
+
+    @staticmethod
+    def p95(timings):
+        ordered = sorted(timings)
+        return ordered[max(int(len(ordered) * 0.95) - 1, 0)]
+
+    def seed(self, count):
+        category, _ = Category.objects.get_or_create(name=BENCH_CATEGORY, defaults={"is_active": False})
+        start = Product.objects.count()
+        rnd = random.Random(42)
+        manufacturers = [code for code, _ in Product.MANUFACTURER_CHOICES]
+        batch_size = 5000
+
+        for offset in range(0, count, batch_size):
+            batch = []
+            for i in range(offset, min(offset + batch_size, count)):
+                title = " ".join(rnd.sample(WORDS, 3))
+                batch.append(Product(
+                    category=category,
+                    title=title,
+                    slug=f"bench-{start + i}",
+                    description=" ".join(rnd.choices(WORDS, k=25)),
+                    price=Decimal(rnd.randint(50, 3000)),
+                    manufacturer=rnd.choice(manufacturers),
+                ))
+            with transaction.atomic():
+                created = Product.objects.bulk_create(batch)
+                # bulk_create signal yubormaydi — vektorlar shu yerning o‘zida hisoblanadi
+                update_search_vector(Product.objects.filter(pk__in=[p.pk for p in created]))
+            self.stdout.write(f"{offset + len(batch)}/{count} yaratildi")
@@ -0,0 +1,50 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from products.models import Product
+from products.serializers import ProductSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "ProductSerializer (ModelSerializer) va tez rejim (values() qatorlari) ni solishtiradi. "
+        "Katalog kichik bo‘lsa, avval `bench_search --seed 10000` bilan mahsulot yarating."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=10000, help="Serializatsiya qilinadigan mahsulotlar soni")
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        limit = options["limit"]
+        request = Request(RequestFactory().get("/products/products/"))
+        queryset = Product.objects.filter(is_available=True).order_by("-created_at", "-id")
+        if queryset.count() < limit:
+            self.stdout.write(self.style.WARNING(f"Katalogda {limit} tadan kam mahsulot bor."))
+
+        def model_serializer():
+            products = queryset.select_related("category").prefetch_related("images")[:limit]
+            return ProductSerializer(products, many=True, context={"request": request}).data
+
+        def fast_serializer():
+            rows = list(ProductSerializer.fast_queryset(queryset)[:limit])
+            return ProductSerializer.fast_data(rows, request)
+
+        renderer = JSONRenderer()
+        expected = renderer.render(model_serializer())
+        if renderer.render(fast_serializer()) != expected:
+            raise CommandError("Tez rejim natijasi ProductSerializer bilan bir xil emas!")
+        self.stdout.write(f"JSON bir xil ({len(expected)} bayt).")
+
+        for label, func in (("ModelSerializer", model_serializer), ("fast", fast_serializer)):
+            timings = []
+            for _ in range(options["repeat"]):
+                started = time.perf_counter()
+                renderer.render(func())
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(f"{label:16} median={statistics.median(timings):9.1f}ms min={min(timings):9.1f}ms")
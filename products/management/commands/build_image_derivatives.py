@@ -0,0 +1,61 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from products.cache import bump_catalog_version
+from products.derivatives import DERIVATIVES_DIR, record_derivatives, render_derivatives
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp"}
+
+
+class Command(BaseCommand):
+    help = (
+        "MEDIA_ROOT dagi mavjud rasmlar uchun derivativlarni parallel yaratadi. "
+        "Tayyor derivativlar o‘tkazib yuboriladi — to‘xtab qolsa, qayta ishga tushirish mumkin. "
+        "Natijalar rasm egalari qatorlarida qayd etiladi (srcset shu yozuvdan quriladi)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+        parser.add_argument("--force", action="store_true", help="Mavjud derivativlarni ham qayta yaratish")
+
+    def handle(self, *args, **options):
+        media_root = str(settings.MEDIA_ROOT)
+        names = list(self.iter_images(media_root))
+        self.stdout.write(f"{len(names)} ta rasm topildi.")
+
+        created = recorded = failed = 0
+        with ProcessPoolExecutor(max_workers=options["workers"]) as executor:
+            futures = {
+                executor.submit(render_derivatives, media_root, name, options["force"]): name
+                for name in names
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                try:
+                    created += future.result()
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f"Xato: {futures[future]}: {exc}")
+                else:
+                    recorded += record_derivatives(futures[future])
+                if done % 100 == 0:
+                    self.stdout.write(f"{done}/{len(names)}")
+
+        if created or recorded:
+            bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(
+            f"{created} ta derivativ yaratildi, {recorded} ta qator yangilandi, {failed} ta xato."
+        ))
+
+    @staticmethod
+    def iter_images(media_root):
+        for directory, subdirectories, files in os.walk(media_root):
+            relative = os.path.relpath(directory, media_root)
+            if relative.split(os.sep)[0] == DERIVATIVES_DIR:
+                subdirectories[:] = []
+                continue
+            for filename in files:
+                if os.path.splitext(filename)[1].lower() in IMAGE_EXTENSIONS:
+                    yield os.path.normpath(os.path.join(relative, filename)).replace(os.sep, "/")
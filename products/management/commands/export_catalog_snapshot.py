@@ -0,0 +1,243 @@
+import gzip
+import hashlib
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from products.facets import compute_facets
+from products.models import Accessory, Category, Product
+from products.pagination import StandardResultsSetPagination
+from products.serializers import (
+    AccessorySerializer, CategorySerializer, ProductDetailSerializer, ProductSerializer,
+)
+from products.tree import build_tree
+
+MANIFEST_NAME = "manifest.json"
+
+
+class SnapshotWriter:
+    """
+    Fayllarni oqimlar pulida gzip qilib yozadi. Tarkibi (digest) o‘zgarmagan fayllar
+    qayta yozilmaydi; navbatdagi yozuvlar soni cheklangan — xotira o‘smaydi.
+    """
+
+    def __init__(self, root, workers, previous_files):
+        self.root = root
+        self.previous_files = previous_files
+        self.files = {}
+        self.written = 0
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.max_pending = workers * 4
+        self.pending = set()
+
+    def write(self, path, data):
+        content = JSONRenderer().render(data)
+        digest = hashlib.sha1(content).hexdigest()
+        self.files[path] = digest
+        if self.previous_files.get(path) == digest and os.path.exists(self.full_path(path)):
+            return
+        if len(self.pending) >= self.max_pending:
+            done, self.pending = wait(self.pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                future.result()
+        self.pending.add(self.executor.submit(self._write, path, content))
+        self.written += 1
+
+    def full_path(self, path):
+        return os.path.join(self.root, f"{path}.gz")
+
+    def _write(self, path, content):
+        full_path = self.full_path(path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        temporary = f"{full_path}.tmp"
+        with open(temporary, "wb") as output:
+            # mtime=0 — bir xil tarkib bir xil baytlar beradi (CDN ETag lari o‘zgarmaydi)
+            output.write(gzip.compress(content, compresslevel=9, mtime=0))
+        os.replace(temporary, full_path)
+
+    def close(self):
+        for future in self.pending:
+            future.result()
+        self.executor.shutdown()
+
+
+class Command(BaseCommand):
+    help = (
+        "Ommaviy katalogni (kategoriyalar, daraxt, sahifalangan ro‘yxatlar, mahsulot sahifalari, "
+        "aksessuarlar) oldindan gzip qilingan JSON fayllar sifatida CDN uchun eksport qiladi. "
+        "Qayta ishga tushirilganda faqat tarkibi o‘zgargan fayllar qayta yoziladi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="Snapshot papkasi")
+        parser.add_argument("--base-url", required=True, help="Javoblardagi to‘liq URL lar uchun, masalan https://api.smartlife.uz")
+        parser.add_argument("--page-size", type=int, default=StandardResultsSetPagination.page_size)
+        parser.add_argument("--chunk-size", type=int, default=2000, help="iterator(chunk_size=...) qiymati")
+        parser.add_argument("--workers", type=int, default=4, help="Fayl yozuvchi oqimlar soni")
+        parser.add_argument("--full", action="store_true", help="Manifestga qaramay hammasini qayta yaratish")
+
+    def handle(self, *args, **options):
+        base_url = urlsplit(options["base_url"])
+        if not base_url.netloc:
+            raise CommandError("--base-url to‘liq bo‘lishi kerak (sxema va host bilan).")
+        self.factory = RequestFactory(HTTP_HOST=base_url.netloc, secure=base_url.scheme == "https")
+        self.page_size = options["page_size"]
+        self.chunk_size = max(options["chunk_size"] // self.page_size, 1) * self.page_size
+
+        root = options["output"]
+        manifest_path = os.path.join(root, MANIFEST_NAME)
+        manifest = {"files": {}}
+        if os.path.exists(manifest_path) and not options["full"]:
+            with open(manifest_path) as source:
+                manifest = json.load(source)
+
+        self.writer = SnapshotWriter(root, options["workers"], manifest["files"])
+        try:
+            self.export_categories()
+            self.export_product_details()
+            self.export_product_listings()
+            self.export_accessories()
+        finally:
+            self.writer.close()
+
+        # Endi mavjud bo‘lmagan fayllar (o‘chirilgan mahsulotlar, ortiqcha sahifalar) olib tashlanadi
+        removed = 0
+        for path in set(manifest["files"]) - set(self.writer.files):
+            if os.path.exists(self.writer.full_path(path)):
+                os.remove(self.writer.full_path(path))
+                removed += 1
+
+        temporary = f"{manifest_path}.tmp"
+        with open(temporary, "w") as output:
+            json.dump({
+                "generated_at": timezone.now().isoformat(),
+                "files": self.writer.files,
+            }, output)
+        os.replace(temporary, manifest_path)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(self.writer.files)} ta fayl: {self.writer.written} tasi yozildi, {removed} tasi o‘chirildi."
+        ))
+
+    def request(self, url):
+        return Request(self.factory.get(url))
+
+    def export_categories(self):
+        categories = Category.objects.filter(is_active=True)
+        request = self.request(reverse("category-list"))
+        self.writer.write(
+            "categories/index.json",
+            CategorySerializer(categories, many=True, context={"request": request}).data,
+        )
+
+        request = self.request(reverse("category-tree"))
+        nodes = CategorySerializer(categories.order_by("depth", "order", "name"), many=True, context={"request": request}).data
+        self.writer.write("categories/tree/index.json", build_tree([dict(node) for node in nodes]))
+
+        products = Product.objects.filter(is_available=True)
+        for category in categories.order_by("path"):
+            url = reverse("category-detail", kwargs={"slug": category.slug})
+            category_data = CategorySerializer(category, context={"request": self.request(url)}).data
+            self.export_listing(
+                f"categories/{category.slug}",
+                url,
+                products.filter(category__path__startswith=category.path),
+                lambda page, category_data=category_data: {
+                    "category": category_data,
+                    **{key: value for key, value in page.items() if key != "results"},
+                    "products": page["results"],
+                },
+            )
+
+    def export_product_listings(self):
+        queryset = Product.objects.filter(is_available=True)
+        facets = compute_facets(queryset)
+        self.export_listing("products", reverse("product-list"), queryset, lambda page: {**page, "facets": facets})
+
+    def export_listing(self, prefix, url, queryset, wrap):
+        """
+        Ro‘yxatni API dagi kabi sahifalab (?page=N) yozadi: count/next/previous/results.
+        Qatorlar iterator() bilan oqimda o‘qiladi, rasmlar har bir bo‘lak uchun bitta so‘rovda.
+        """
+        count = queryset.count()
+        page_count = max((count + self.page_size - 1) // self.page_size, 1)
+        request = self.request(url)
+        absolute_url = request.build_absolute_uri()
+        rows = ProductSerializer.fast_queryset(queryset.order_by("-created_at", "-id")).iterator(
+            chunk_size=self.chunk_size
+        )
+
+        def link(number):
+            if number < 1 or number > page_count:
+                return None
+            if number == 1:
+                return remove_query_param(absolute_url, "page")
+            return replace_query_param(absolute_url, "page", number)
+
+        number = 1
+        for chunk in self.chunked(rows, self.chunk_size):
+            results = ProductSerializer.fast_data(chunk, request)
+            for start in range(0, len(results), self.page_size):
+                page = {
+                    "count": count,
+                    "next": link(number + 1),
+                    "previous": link(number - 1),
+                    "results": results[start:start + self.page_size],
+                }
+                self.writer.write(f"{prefix}/page-{number}.json", wrap(page))
+                number += 1
+        if count == 0:
+            self.writer.write(f"{prefix}/page-1.json", wrap({"count": 0, "next": None, "previous": None, "results": []}))
+
+    def export_product_details(self):
+        """
+        Mahsulot sahifalari. Sahifa tarkibi faqat Product qatoriga emas, variantlar, bundle lar va
+        ularning narxlari, rasmlar (va ularning derivativlari), like soni hamda kategoriya sonlariga
+        ham bog‘liq — shuning uchun har bir mahsulot qayta serializatsiya qilinadi va tarkib
+        digest i manifestdagidan farq qilsagina fayl qayta yoziladi (SnapshotWriter.write).
+        """
+        products = Product.objects.with_detail_relations().filter(is_available=True).order_by("pk")
+        for product in products.iterator(chunk_size=self.chunk_size):
+            url = reverse("product-detail", kwargs={"slug": product.slug})
+            data = ProductDetailSerializer(product, context={"request": self.request(url)}).data
+            self.writer.write(f"products/{product.slug}/index.json", data)
+
+    def export_accessories(self):
+        # Har bir aksessuar bir marta serializatsiya qilinadi, keyin mahsulotlar bo‘yicha yig‘iladi
+        request = self.request(reverse("accessory-list"))
+        through = Accessory.compatible_products.through
+        accessories = {
+            accessory.pk: AccessorySerializer(accessory, context={"request": request}).data
+            for accessory in Accessory.objects.filter(is_active=True)
+            .prefetch_related("images", "compatible_products").iterator(chunk_size=self.chunk_size)
+        }
+        by_product = {}
+        for product_id, accessory_id in through.objects.filter(accessory_id__in=accessories).order_by(
+            "accessory_id"
+        ).values_list("product_id", "accessory_id"):
+            by_product.setdefault(product_id, []).append(accessories[accessory_id])
+
+        for pk in Product.objects.filter(is_available=True).order_by("pk").values_list("pk", flat=True).iterator(
+            chunk_size=self.chunk_size
+        ):
+            self.writer.write(f"accessories/{pk}.json", by_product.get(pk, []))
+
+    @staticmethod
+    def chunked(iterable, size):
+        chunk = []
+        for item in iterable:
+            chunk.append(item)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
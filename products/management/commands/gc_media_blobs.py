@@ -0,0 +1,124 @@
+import os
+import shutil
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from django.utils import timezone
+
+from products.derivatives import DERIVATIVES_DIR
+from products.models import AccessoryImage, MediaBlob, ProductImage
+from products.storage import BLOBS_DIR, content_addressed_storage, is_blob
+
+
+class Command(BaseCommand):
+    help = (
+        "Murojaat qilinmaydigan (yetim) media bloblarni va ularning derivativlarini o‘chiradi. "
+        "--full bilan ref_count qayta hisoblanadi va MediaBlob da yo‘q fayllar ham tekshiriladi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace", type=int, default=3600,
+            help="Shundan yangi (soniya) bloblar tegilmaydi — tugallanmagan yuklashlar uchun",
+        )
+        parser.add_argument("--full", action="store_true", help="ref_count ni qayta hisoblash va diskni to‘liq ko‘rib chiqish")
+        parser.add_argument("--dry-run", action="store_true", help="Faqat ko‘rsatish, o‘chirmaslik")
+
+    def handle(self, *args, **options):
+        self.dry_run = options["dry_run"]
+        cutoff = timezone.now() - timedelta(seconds=options["grace"])
+        self.cutoff_timestamp = cutoff.timestamp()
+
+        if options["full"]:
+            self.reconcile()
+
+        candidates = set(
+            MediaBlob.objects.filter(ref_count=0, updated_at__lt=cutoff).values_list("name", flat=True)
+        )
+        if options["full"]:
+            candidates |= self.untracked_files(self.cutoff_timestamp)
+
+        # Jadvallar bo‘yicha yakuniy tekshiruv: hisoblagich adashgan bo‘lsa ham ishlatilayotgan fayl o‘chmaydi
+        referenced = self.referenced_names(candidates)
+        orphans = []
+        freed = 0
+        for name in sorted(candidates - referenced):
+            size = self.delete_blob(name)
+            if size is not None:
+                orphans.append(name)
+                freed += size
+        if not self.dry_run:
+            MediaBlob.objects.filter(name__in=orphans, ref_count=0).delete()
+
+        action = "topildi" if self.dry_run else "o‘chirildi"
+        self.stdout.write(self.style.SUCCESS(f"{len(orphans)} ta yetim blob {action} ({freed / 1024 / 1024:.1f} MB)."))
+
+    @staticmethod
+    def referenced_names(names):
+        names = list(names)
+        referenced = set()
+        for model in (ProductImage, AccessoryImage):
+            referenced.update(model.objects.filter(image__in=names).values_list("image", flat=True))
+        return referenced
+
+    def reconcile(self):
+        """MediaBlob.ref_count ni ProductImage/AccessoryImage jadvallaridagi haqiqiy son bilan moslashtiradi."""
+        actual = {}
+        for model in (ProductImage, AccessoryImage):
+            rows = (
+                model.objects.filter(image__startswith=f"{BLOBS_DIR}/")
+                .values("image").annotate(total=Count("id")).values_list("image", "total")
+            )
+            for name, total in rows:
+                actual[name] = actual.get(name, 0) + total
+
+        fixed = 0
+        now = timezone.now()
+        for blob in MediaBlob.objects.all().iterator(chunk_size=2000):
+            count = actual.pop(blob.name, 0)
+            if blob.ref_count != count:
+                fixed += 1
+                if not self.dry_run:
+                    MediaBlob.objects.filter(pk=blob.pk).update(ref_count=count, updated_at=now)
+        if not self.dry_run:
+            MediaBlob.objects.bulk_create(
+                [MediaBlob(name=name, ref_count=count, updated_at=now) for name, count in actual.items()],
+                ignore_conflicts=True,
+            )
+        self.stdout.write(f"{fixed + len(actual)} ta blob hisoblagichi tuzatildi.")
+
+    @staticmethod
+    def untracked_files(cutoff_timestamp):
+        # Diskdagi, lekin MediaBlob da yozuvi yo‘q bloblar (masalan, tranzaksiya bekor qilingan yuklashlar)
+        media_root = str(settings.MEDIA_ROOT)
+        found = set()
+        for directory, _, files in os.walk(os.path.join(media_root, BLOBS_DIR)):
+            for filename in files:
+                path = os.path.join(directory, filename)
+                if filename.endswith(".tmp") or os.path.getmtime(path) >= cutoff_timestamp:
+                    continue
+                found.add(os.path.relpath(path, media_root).replace(os.sep, "/"))
+        tracked = set(MediaBlob.objects.filter(name__in=list(found)).values_list("name", flat=True))
+        return found - tracked
+
+    def delete_blob(self, name):
+        """Blob faylini va derivativlarini o‘chiradi. Qaytaradi: bo‘shatilgan hajm yoki None (tegilmadi)."""
+        if not is_blob(name):
+            return None
+        path = content_addressed_storage.path(name)
+        if not os.path.exists(path):
+            return 0
+        if os.path.getmtime(path) >= self.cutoff_timestamp:
+            # Yaqinda qayta yuklangan (storage mavjud blob mtime ini yangilaydi)
+            return None
+        size = os.path.getsize(path)
+        if self.dry_run:
+            self.stdout.write(name)
+            return size
+
+        os.remove(path)
+        derivatives = content_addressed_storage.path(f"{DERIVATIVES_DIR}/{os.path.splitext(name)[0]}")
+        shutil.rmtree(derivatives, ignore_errors=True)
+        return size
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from products.tree import rebuild_category_tree
+
+
+class Command(BaseCommand):
+    help = "Kategoriyalar daraxtini (path, depth) va saqlangan sonlarni noldan qayta hisoblaydi."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = rebuild_category_tree()
+        self.stdout.write(self.style.SUCCESS(f"{total} ta kategoriya qayta hisoblandi."))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from products.models import Product
+from products.search import update_search_vector
+
+
+class Command(BaseCommand):
+    help = "Barcha mahsulotlarning search_vector ustunini qayta hisoblaydi (bo‘laklab)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Bitta UPDATE dagi mahsulotlar soni")
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        last_id = 0
+        updated = 0
+        while True:
+            ids = list(
+                Product.objects.filter(pk__gt=last_id).order_by("pk").values_list("pk", flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+            updated += update_search_vector(Product.objects.filter(pk__in=ids))
+            last_id = ids[-1]
+
+        self.stdout.write(self.style.SUCCESS(f"{updated} ta mahsulot indekslandi."))
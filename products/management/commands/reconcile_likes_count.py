@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from products.cache import bump_catalog_version
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = "Product.likes_count ustunini haqiqiy like soni bilan moslashtiradi (bo‘laklab)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Bir tranzaksiyada nechta mahsulot tekshiriladi")
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        through = Product.likes.through
+        actual_count = Coalesce(
+            Subquery(
+                through.objects.filter(product_id=OuterRef("pk"))
+                .order_by()
+                .values("product_id")
+                .annotate(total=Count("*"))
+                .values("total")
+            ),
+            0,
+        )
+
+        last_id = 0
+        fixed = 0
+        while True:
+            ids = list(
+                Product.objects.filter(pk__gt=last_id).order_by("pk").values_list("pk", flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+            with transaction.atomic():
+                # Faqat qiymati farq qiladigan qatorlar yangilanadi
+                fixed += (
+                    Product.objects.filter(pk__in=ids)
+                    .exclude(likes_count=actual_count)
+                    .update(likes_count=actual_count)
+                )
+            last_id = ids[-1]
+
+        if fixed:
+            bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(f"{fixed} ta mahsulotning like soni tuzatildi."))
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from products.cache import bump_catalog_version
+from products.models import Category
+from products.similarity import rebuild_bucket, refresh_similar_products
+
+
+class Command(BaseCommand):
+    help = (
+        "O‘xshash mahsulotlar jadvalini hisoblaydi. Argumentsiz — barcha ildiz kategoriyalar "
+        "bo‘yicha to‘liq qayta hisoblash (birga like qilinganlik ham yangilanadi)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--product", type=int, action="append", default=[], help="Faqat shu mahsulot(lar) uchun")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options["product"]:
+            stored = refresh_similar_products(options["product"])
+        else:
+            stored = 0
+            for root in Category.objects.filter(depth=0).order_by("path").values_list("path", flat=True):
+                stored += rebuild_bucket(root)
+        bump_catalog_version()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"{stored} ta bog‘lanish saqlandi ({elapsed:.2f}s)."))
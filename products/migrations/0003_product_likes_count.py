@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:59
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_likes_count(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    through = Product.likes.through
+    Product.objects.update(likes_count=Coalesce(
+        Subquery(
+            through.objects.filter(product_id=OuterRef('pk'))
+            .order_by().values('product_id').annotate(total=Count('*')).values('total')
+        ),
+        0,
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_likes_count, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['likes_count'], name='products_pr_likes_c_87aaab_idx'),
+        ),
+    ]
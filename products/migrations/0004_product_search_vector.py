@@ -0,0 +1,60 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:00
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import F, Func, OuterRef, Subquery, TextField, Value
+
+# products/search.py dagi ifodaning migratsiya paytidagi nusxasi — ilova kodi o‘zgarsa ham migratsiya o‘zgarmaydi
+SEARCH_CONFIGS = ("simple", "russian", "english")
+SOURCE_CHARS = "ʻʼ‘’`´ё"
+TARGET_CHARS = "''''''е"
+
+
+def _normalized(expression):
+    return Func(
+        Func(expression, function="LOWER", output_field=TextField()),
+        Value(SOURCE_CHARS), Value(TARGET_CHARS),
+        function="TRANSLATE", output_field=TextField(),
+    )
+
+
+def fill_search_vector(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    Category = apps.get_model('products', 'Category')
+    category_name = Subquery(Category.objects.filter(pk=OuterRef("category_id")).values("name")[:1])
+    fields = (
+        (F("title"), "A"),
+        (F("manufacturer"), "B"),
+        (category_name, "B"),
+        (F("description"), "C"),
+    )
+    vector = None
+    for config in SEARCH_CONFIGS:
+        for expression, weight in fields:
+            part = SearchVector(_normalized(expression), config=config, weight=weight)
+            vector = part if vector is None else vector + part
+    Product.objects.update(search_vector=vector)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_product_likes_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_search_vector, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='product_search_vector_gin'),
+        ),
+    ]
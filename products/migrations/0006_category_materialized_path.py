@@ -0,0 +1,81 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:04
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+# products/tree.py dagi rebuild_category_tree ning migratsiya paytidagi nusxasi
+PATH_SEGMENT_LENGTH = 10
+
+
+def fill_category_tree(apps, schema_editor):
+    Category = apps.get_model('products', 'Category')
+    Product = apps.get_model('products', 'Product')
+
+    parents = dict(Category.objects.values_list("pk", "parent_id"))
+    paths = {}
+
+    def resolve(pk, seen=()):
+        if pk not in paths:
+            parent_id = parents[pk]
+            parent_path = "" if parent_id is None or parent_id in seen else resolve(parent_id, seen + (pk,))
+            paths[pk] = f"{parent_path}{pk:0{PATH_SEGMENT_LENGTH}d}/"
+        return paths[pk]
+
+    categories = list(Category.objects.only("pk", "path", "depth"))
+    for category in categories:
+        category.path = resolve(category.pk)
+        category.depth = category.path.count("/") - 1
+    Category.objects.bulk_update(categories, ["path", "depth"], batch_size=500)
+
+    Category.objects.update(
+        product_count=Coalesce(
+            Subquery(
+                Product.objects.filter(is_available=True, category__path__startswith=OuterRef("path"))
+                .order_by().values("is_available").annotate(total=Count("pk")).values("total")
+            ),
+            0,
+        ),
+        sub_count=Coalesce(
+            Subquery(
+                Category.objects.filter(parent_id=OuterRef("pk"), is_active=True)
+                .order_by().values("parent_id").annotate(total=Count("pk")).values("total")
+            ),
+            0,
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_product_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='product_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='sub_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['path'], name='category_path_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.RunPython(fill_category_tree, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:11
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_similar_product'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='productimage',
+            options={'ordering': ['-is_main', 'id']},
+        ),
+    ]
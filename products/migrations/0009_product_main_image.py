@@ -0,0 +1,50 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:15
+
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_main_images(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    ProductImage = apps.get_model('products', 'ProductImage')
+
+    # Bir nechta asosiy rasmi bor mahsulotlarda eng birinchisi (eng kichik id) qoladi
+    duplicates = (
+        ProductImage.objects.filter(is_main=True).values('product_id')
+        .annotate(first_id=Min('id'), total=Count('id')).filter(total__gt=1)
+    )
+    for row in duplicates:
+        ProductImage.objects.filter(product_id=row['product_id'], is_main=True).exclude(
+            pk=row['first_id']
+        ).update(is_main=False)
+
+    # Rasmi bor, lekin asosiysi yo‘q mahsulotlarda birinchi rasm asosiy bo‘ladi
+    without_main = (
+        ProductImage.objects.values_list('product_id', flat=True).distinct()
+        .exclude(product_id__in=ProductImage.objects.filter(is_main=True).values('product_id'))
+    )
+    for product_id in without_main:
+        first_id = ProductImage.objects.filter(product_id=product_id).order_by('id').values_list('id', flat=True).first()
+        ProductImage.objects.filter(pk=first_id).update(is_main=True)
+
+    main = ProductImage.objects.filter(product_id=OuterRef('pk'), is_main=True).values('image')[:1]
+    Product.objects.filter(pk__in=ProductImage.objects.values('product_id')).update(
+        main_image_name=Coalesce(Subquery(main), Value(""))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_product_image_ordering'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='main_image_name',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(fill_main_images, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Cheklov alohida migratsiyada: 0009 dagi ma'lumot o‘zgarishlari tranzaksiyasidan keyin yaratiladi
+
+    dependencies = [
+        ('products', '0009_product_main_image'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='productimage',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_main', True)), fields=('product',), name='unique_main_image_per_product'),
+        ),
+    ]
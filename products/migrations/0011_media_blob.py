@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:16
+
+import products.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_productimage_unique_main_image'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='accessoryimage',
+            name='image',
+            field=models.ImageField(storage=products.storage.get_content_addressed_storage, upload_to='accessory_images/'),
+        ),
+        migrations.AlterField(
+            model_name='productimage',
+            name='image',
+            field=models.ImageField(storage=products.storage.get_content_addressed_storage, upload_to='products/images/'),
+        ),
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['ref_count', 'updated_at'], name='products_me_ref_cou_b26885_idx')],
+            },
+        ),
+    ]
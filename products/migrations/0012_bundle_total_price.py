@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:22
+
+from django.db import migrations, models
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+
+def fill_bundle_prices(apps, schema_editor):
+    # products.models.refresh_bundle_prices ning migratsiya paytidagi nusxasi
+    Bundle = apps.get_model('products', 'Bundle')
+    Product = apps.get_model('products', 'Product')
+    through = Bundle.accessories.through
+    money = DecimalField(max_digits=10, decimal_places=2)
+
+    product_price = Subquery(Product.objects.filter(pk=OuterRef('product_id')).values('price')[:1])
+    accessories_total = Coalesce(
+        Subquery(
+            through.objects.filter(bundle_id=OuterRef('pk')).order_by().values('bundle_id')
+            .annotate(total=Sum('accessorytarif__price')).values('total')
+        ),
+        Value(0),
+        output_field=money,
+    )
+    Bundle.objects.update(total_price=Greatest(
+        product_price + accessories_total - F('discount'), Value(0), output_field=money,
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_media_blob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bundle',
+            name='total_price',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10),
+        ),
+        migrations.RunPython(fill_bundle_prices, migrations.RunPython.noop),
+    ]
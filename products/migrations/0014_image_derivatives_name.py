@@ -0,0 +1,70 @@
+# Generated by Django 5.2.7 on 2026-10-18 08:24
+
+import os
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+# products/derivatives.py dagi qiymatlar (migratsiya ilova kodini import qilmaydi)
+DERIVATIVE_FILES = [f"{width}{extension}" for width in (320, 640, 1024) for extension in (".jpg", ".webp")]
+IMAGE_FIELDS = {'ProductImage': 'image', 'AccessoryImage': 'image', 'AccessoryTarif': 'image', 'Category': 'icon'}
+
+
+def derivatives_exist(name):
+    directory = os.path.join(str(settings.MEDIA_ROOT), "derivatives", os.path.splitext(name)[0])
+    return all(os.path.exists(os.path.join(directory, filename)) for filename in DERIVATIVE_FILES)
+
+
+def fill_derivatives_names(apps, schema_editor):
+    # Oldin yaratilgan derivativlar bir marta diskdan tekshirilib qayd etiladi
+    for model_name, field in IMAGE_FIELDS.items():
+        model = apps.get_model('products', model_name)
+        names = model.objects.exclude(**{field: ""}).exclude(**{f"{field}__isnull": True})
+        for name in names.values_list(field, flat=True).distinct():
+            if derivatives_exist(name):
+                model.objects.filter(**{field: name}).update(derivatives_name=name)
+
+    Product = apps.get_model('products', 'Product')
+    ProductImage = apps.get_model('products', 'ProductImage')
+    main = ProductImage.objects.filter(product_id=OuterRef('pk'), is_main=True).values('derivatives_name')[:1]
+    Product.objects.exclude(main_image_name="").update(
+        main_image_derivatives_name=Coalesce(Subquery(main), Value(""))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0013_productvariant_reserved'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accessoryimage',
+            name='derivatives_name',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='accessorytarif',
+            name='derivatives_name',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='derivatives_name',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='main_image_derivatives_name',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='derivatives_name',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(fill_derivatives_names, migrations.RunPython.noop),
+    ]
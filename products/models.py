@@ -1,42 +1,114 @@
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import DecimalField, F, OuterRef, Prefetch, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
 from django.utils.text import slugify
 from django.contrib.auth import get_user_model
 
+from .cache import mark_likes_changed
+from .derivatives import THUMBNAIL_WIDTH, derivative_url
+from .storage import get_content_addressed_storage
+from .tree import make_path, move_subtree, path_ids
+
 User = get_user_model()
 
 
+def save_fields_excluding(instance, maintained_fields):
+    """
+    Mavjud obyekt saqlanganda alohida yangilanadigan (F()/signals bilan) ustunlarni
+    chetlab o‘tadi — aks holda eskirgan qiymatlar qayta yozilib ketadi.
+    """
+    return [
+        field.name for field in instance._meta.concrete_fields
+        if not field.primary_key and field.name not in maintained_fields
+    ]
+
+
 # Kategoriya modeli
 class Category(models.Model):
+    MAINTAINED_FIELDS = ('path', 'depth', 'product_count', 'sub_count', 'derivatives_name')
+
     name = models.CharField(max_length=255, unique=True)
     slug = models.SlugField(unique=True, blank=True)
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='children')
     icon = models.ImageField(upload_to='categories/icons/', blank=True, null=True)
+    # Derivativlari tayyor ikonka nomi (products/derivatives.py)
+    derivatives_name = models.CharField(max_length=255, blank=True, default="", editable=False)
     is_active = models.BooleanField(default=True)
     order = models.PositiveIntegerField(default=0)
 
+    # Materialized path: ildizdan o‘zigacha id lar ("0000000001/0000000007/"), products/tree.py
+    path = models.CharField(max_length=255, default="", editable=False)
+    depth = models.PositiveIntegerField(default=0, editable=False)
+    # Saqlangan sonlar — signals orqali yangilanadi
+    product_count = models.PositiveIntegerField(default=0, editable=False)  # Faol mahsulotlar (sub-kategoriyalar bilan)
+    sub_count = models.PositiveIntegerField(default=0, editable=False)  # Faol sub-kategoriyalar soni
+
     class Meta:
         verbose_name_plural = "Categories"
         ordering = ['order', 'name']
         indexes = [
             models.Index(fields=['slug']),
             models.Index(fields=['is_active']),
+            models.Index(fields=['path'], name='category_path_idx', opclasses=['varchar_pattern_ops']),
         ]
 
+    def clean(self):
+        self._check_parent()
+
+    def _check_parent(self):
+        # Kategoriyani o‘zining sub-kategoriyasiga ko‘chirib bo‘lmaydi (sikl hosil bo‘ladi)
+        if not self.parent_id:
+            return ""
+        parent_path = Category.objects.values_list('path', flat=True).get(pk=self.parent_id)
+        if self.path and parent_path.startswith(self.path):
+            raise ValidationError({'parent': "Kategoriyani o‘zining sub-kategoriyasiga ko‘chirib bo‘lmaydi."})
+        return parent_path
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+        parent_path = self._check_parent()
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = save_fields_excluding(self, self.MAINTAINED_FIELDS)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            new_path = make_path(parent_path, self.pk)
+            if new_path != self.path:
+                move_subtree(self, new_path)
 
     def __str__(self):
         return self.name
 
-    @property
-    def sub_count(self):
-        return self.children.filter(is_active=True).count()
+    def get_descendants(self, include_self=True):
+        queryset = Category.objects.filter(path__startswith=self.path)
+        return queryset if include_self else queryset.exclude(pk=self.pk)
+
+    def get_ancestors(self):
+        return Category.objects.filter(pk__in=path_ids(self.path)[:-1]).order_by('depth')
+
+
+class ProductQuerySet(models.QuerySet):
+    def with_detail_relations(self):
+        """
+        Mahsulot detail sahifasi uchun to‘liq yuklash rejasi — variant va bundle lar
+        sonidan qat’i nazar o‘zgarmas (5 ta) so‘rov: mahsulot+kategoriya, rasmlar,
+        variantlar (rang, xotira bilan), bundle lar (narxi saqlangan ustunda), aksessuarlar.
+        """
+        return self.select_related('category').prefetch_related(
+            'images',
+            # Teng narxlarda tartib barqaror bo‘lishi uchun id (snapshot va ETag lar o‘zgarib turmasin)
+            Prefetch('variants', queryset=ProductVariant.objects.select_related('color', 'memory').order_by('price', 'id')),
+            Prefetch('bundles', queryset=Bundle.objects.prefetch_related('accessories')),
+        )
 
 
 # Mahsulot modeli
 class Product(models.Model):
+    MAINTAINED_FIELDS = ('likes_count', 'search_vector', 'main_image_name', 'main_image_derivatives_name')
+
     category = models.ForeignKey("Category", on_delete=models.CASCADE, related_name="products")
     title = models.CharField(max_length=255)
     slug = models.SlugField(unique=True, blank=True)
@@ -78,17 +150,30 @@ class Product(models.Model):
     dimensions = models.CharField(max_length=100, blank=True, null=True, help_text="Masalan: 146.7 x 71.5 x 7.4 mm")
 
     likes = models.ManyToManyField(User, related_name="liked_products", blank=True)
+    # Like soni — toggle_like() orqali atomar yangilanadi (reconcile_likes_count bilan tekshiriladi)
+    likes_count = models.PositiveIntegerField(default=0, editable=False)
+    # To‘liq matnli qidiruv vektori — signals orqali yangilanadi (products/search.py)
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Asosiy rasm fayl nomi — ProductImage saqlanganda/o‘chirilganda signals orqali yangilanadi
+    main_image_name = models.CharField(max_length=255, blank=True, default="", editable=False)
+    main_image_derivatives_name = models.CharField(max_length=255, blank=True, default="", editable=False)
     is_available = models.BooleanField(default=True)
     is_featured = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProductQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['slug']),
-            models.Index(fields=['price']),
             models.Index(fields=['is_available']),
+            # Keyset pagination uchun: (tartiblash maydoni, id)
+            models.Index(fields=['price', 'id']),
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['likes_count', 'id']),
+            GinIndex(fields=['search_vector'], name='product_search_vector_gin'),
         ]
 
     def save(self, *args, **kwargs):
@@ -99,38 +184,153 @@ class Product(models.Model):
                 self.old_price = self.price
             discounted_price = self.old_price - (self.old_price * self.discount_percent / 100)
             self.price = round(discounted_price, 2)
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = save_fields_excluding(self, self.MAINTAINED_FIELDS)
         super().save(*args, **kwargs)
 
     def __str__(self):
         return self.title
 
-    @property
-    def likes_count(self):
-        return self.likes.count()
+    def toggle_like(self, user):
+        """
+        Like qo‘yadi yoki olib tashlaydi.
+        `likes_count` shu tranzaksiya ichida F() orqali oshiriladi/kamaytiriladi.
+        Qaytaradi: (liked, likes_count)
+        """
+        through = Product.likes.through
+        with transaction.atomic():
+            removed, _ = through.objects.filter(product_id=self.pk, user_id=user.pk).delete()
+            if removed:
+                liked, delta = False, -removed
+            else:
+                _, created = through.objects.get_or_create(product_id=self.pk, user_id=user.pk)
+                liked, delta = True, int(created)
+
+            if delta:
+                Product.objects.filter(pk=self.pk).update(likes_count=Greatest(F('likes_count') + delta, 0))
+                # Ro‘yxat keshlari va ETag lari (likes_count, ordering=likes) throttling bilan yangilanadi
+                transaction.on_commit(mark_likes_changed, robust=True)
+            self.likes_count = Product.objects.values_list('likes_count', flat=True).get(pk=self.pk)
+
+        return liked, self.likes_count
 
     @property
     def main_image(self):
-        main = self.images.filter(is_main=True).first()
-        return main.image.url if main else None
+        # images jadvaliga murojaat qilinmaydi — saqlangan nomdan
+        if not self.main_image_name:
+            return None
+        return ProductImage._meta.get_field('image').storage.url(self.main_image_name)
+
+    @property
+    def main_image_thumbnail(self):
+        # Eskiz hali yaratilmagan bo‘lsa (worker navbatda) asl rasm
+        if not self.main_image_name:
+            return None
+        if self.main_image_derivatives_name != self.main_image_name:
+            return self.main_image
+        return derivative_url(self.main_image_name, THUMBNAIL_WIDTH, "jpeg")
 
     @property
     def gallery(self):
         return [img.image.url for img in self.images.all()]
 
 
+class SimilarProduct(models.Model):
+    """
+    Oldindan hisoblangan o‘xshash mahsulotlar (top-K), products/similarity.py yangilaydi.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='similar_links')
+    similar = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['product', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'rank'], name='unique_similar_product_rank'),
+        ]
+        indexes = [
+            models.Index(fields=['similar']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} -> {self.similar_id} (#{self.rank})"
+
+
 class ProductImage(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='images')
-    image = models.ImageField(upload_to='products/images/')
+    # Bir xil fayllar bir marta saqlanadi (products/storage.py)
+    image = models.ImageField(upload_to='products/images/', storage=get_content_addressed_storage)
     is_main = models.BooleanField(default=False)
+    derivatives_name = models.CharField(max_length=255, blank=True, default="", editable=False)
 
     class Meta:
-        ordering = ['-is_main']
+        ordering = ['-is_main', 'id']
         unique_together = ('product', 'image')
+        constraints = [
+            # Har bir mahsulotda bittadan ortiq asosiy rasm bo‘lmaydi
+            models.UniqueConstraint(
+                fields=['product'], condition=Q(is_main=True), name='unique_main_image_per_product',
+            ),
+        ]
+
+    def clean(self):
+        # Kontent bo‘yicha saqlashda bir xil rasm bir xil nom oladi — takroriy yuklash oldindan rad etiladi
+        if self.image and not self.image._committed and self.product_id:
+            name = self.image.storage.hashed_name(self.image.name, self.image.file)
+            if ProductImage.objects.filter(product_id=self.product_id, image=name).exclude(pk=self.pk).exists():
+                raise ValidationError({'image': "Bu rasm mahsulotga allaqachon qo‘shilgan."})
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            # Bir mahsulot rasmlarini parallel saqlash ketma-ket bajariladi
+            Product.objects.select_for_update().filter(pk=self.product_id).exists()
+            others = ProductImage.objects.filter(product_id=self.product_id).exclude(pk=self.pk)
+            if self.is_main:
+                others.filter(is_main=True).update(is_main=False)
+            elif not others.filter(is_main=True).exists():
+                # Mahsulotning yagona asosiy rasmi bo‘lishi shart
+                self.is_main = True
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.product.title} image"
 
 
+def refresh_main_images(product_ids):
+    """Product.main_image_name ni asosiy rasmdan bitta UPDATE bilan yangilaydi."""
+    main = ProductImage.objects.filter(product_id=OuterRef('pk'), is_main=True)
+    return Product.objects.filter(pk__in=product_ids).update(
+        main_image_name=Coalesce(Subquery(main.values('image')[:1]), Value("")),
+        main_image_derivatives_name=Coalesce(Subquery(main.values('derivatives_name')[:1]), Value("")),
+    )
+
+
+def promote_main_image(product_id):
+    # Asosiy rasm o‘chirilganda keyingi rasm (eng kichik id) asosiy bo‘ladi
+    next_id = ProductImage.objects.filter(product_id=product_id).order_by('id').values_list('id', flat=True).first()
+    if next_id is not None:
+        ProductImage.objects.filter(pk=next_id).update(is_main=True)
+
+
+class MediaBlob(models.Model):
+    """
+    Kontent bo‘yicha saqlangan fayl (blobs/...) va unga murojaatlar soni.
+    ref_count signals orqali yuritiladi, 0 bo‘lganlarini gc_media_blobs o‘chiradi.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    ref_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['ref_count', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count})"
+
+
 class Color(models.Model):
     name = models.CharField(max_length=100, unique=True)
     hex_code = models.CharField(max_length=7, blank=True, null=True, help_text="Masalan: #FFFFFF")
@@ -158,11 +358,25 @@ class ProductVariant(models.Model):
     memory = models.ForeignKey(MemoryOption, on_delete=models.CASCADE, related_name='variants')
     price = models.DecimalField(max_digits=10, decimal_places=2)
     stock = models.PositiveIntegerField(default=0)
+    # Savatlardagi TTL hold lar yig‘indisi — faqat orders/inventory.py dagi shartli UPDATE lar o‘zgartiradi
+    reserved = models.PositiveIntegerField(default=0, editable=False)
+
+    MAINTAINED_FIELDS = ('reserved',)
 
     class Meta:
         unique_together = ('product', 'color', 'memory')
         ordering = ['product', 'price']
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = save_fields_excluding(self, self.MAINTAINED_FIELDS)
+        super().save(*args, **kwargs)
+
+    @property
+    def available(self):
+        # Boshqa savatlarda band qilinmagan qoldiq
+        return max(self.stock - self.reserved, 0)
+
     def __str__(self):
         return f"{self.product.title} - {self.memory.size} - {self.color.name}"
 
@@ -177,6 +391,7 @@ class AccessoryTarif(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     type = models.CharField(max_length=20, choices=TYPE_CHOICES)
     image = models.ImageField(upload_to="accesuar_image", blank=True, null=True)
+    derivatives_name = models.CharField(max_length=255, blank=True, default="", editable=False)
 
     def __str__(self):
         return self.name
@@ -193,23 +408,43 @@ class Bundle(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='bundles')  # Asosiy mahsulot
     accessories = models.ManyToManyField(AccessoryTarif, blank=True)  # Qo‘shimcha aksessuarlar
     discount = models.DecimalField(max_digits=10, decimal_places=2, default=0)  # Chegirma summasi
+    # To‘plamning umumiy narxi: mahsulot narxi + aksessuarlar narxi - chegirma (manfiy emas).
+    # Saqlangan ustun — refresh_bundle_prices() orqali signals dan yangilanadi
+    total_price = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False)
 
-    @property
-    def total_price(self):
-        """
-        To‘plamning umumiy narxi:
-        - Mahsulot narxi
-        - Aksessuarlar narxi
-        - Chegirma chiqariladi
-        """
-        accessories_total = sum([a.price for a in self.accessories.all()])
-        total = self.product.price + accessories_total - self.discount
-        return max(total, 0)  # Narx manfiy bo‘lmasligi oldi olinadi
+    MAINTAINED_FIELDS = ('total_price',)
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = save_fields_excluding(self, self.MAINTAINED_FIELDS)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.name} bundle for {self.product.title}"
 
 
+def refresh_bundle_prices(bundles):
+    """
+    Berilgan Bundle queryset idagi barcha to‘plamlarning total_price ini bitta UPDATE bilan
+    qayta hisoblaydi.
+    """
+    through = Bundle.accessories.through
+    money = DecimalField(max_digits=10, decimal_places=2)
+
+    product_price = Subquery(Product.objects.filter(pk=OuterRef('product_id')).values('price')[:1])
+    accessories_total = Coalesce(
+        Subquery(
+            through.objects.filter(bundle_id=OuterRef('pk')).order_by().values('bundle_id')
+            .annotate(total=Sum('accessorytarif__price')).values('total')
+        ),
+        Value(0),
+        output_field=money,
+    )
+    return bundles.update(total_price=Greatest(
+        product_price + accessories_total - F('discount'), Value(0), output_field=money,
+    ))
+
+
 class Accessory(models.Model):
     title = models.CharField(max_length=255)  # Aksessuar nomi
     description = models.TextField(max_length=100, blank=True, null=True)  # Qisqacha tavsif
@@ -225,8 +460,18 @@ class Accessory(models.Model):
 class AccessoryImage(models.Model):
     accessory = models.ForeignKey(Accessory, related_name='images',
                                   on_delete=models.CASCADE)  # Qaysi aksessuarga tegishli
-    image = models.ImageField(upload_to='accessory_images/')  # Rasm fayli
+    image = models.ImageField(upload_to='accessory_images/', storage=get_content_addressed_storage)  # Rasm fayli
     alt_text = models.CharField(max_length=255, blank=True)  # SEO yoki accessibility uchun matn
+    derivatives_name = models.CharField(max_length=255, blank=True, default="", editable=False)  # Derivativlari tayyor rasm nomi
 
     def __str__(self):
         return f"Image for {self.accessory.title}"
+
+
+# Derivativlari yaratiladigan rasm maydonlari (products/derivatives.py, signals)
+IMAGE_FIELDS = {
+    ProductImage: "image",
+    AccessoryImage: "image",
+    AccessoryTarif: "image",
+    Category: "icon",
+}
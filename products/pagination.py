@@ -0,0 +1,122 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+#  Custom pagination
+class StandardResultsSetPagination(PageNumberPagination):
+    page_size = 12  # Default page size
+    page_size_query_param = "page_size"  # Frontenddan o‘zgartirish mumkin
+    max_page_size = 100  # Limit
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination: OFFSET va COUNT(*) o‘rniga
+    `WHERE (field, id) < (oxirgi qiymat, oxirgi id)` sharti ishlatiladi.
+    Tartiblash maydoni (model maydoni yoki annotatsiya) view'ning `get_keyset_ordering()`
+    metodidan olinadi, teng qiymatlar uchun `id` tie-breaker bo‘ladi.
+    COUNT faqat `with_count=1` so‘ralganda bajariladi.
+    """
+    page_size = 12
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    count_query_param = "with_count"
+    invalid_cursor_message = "Cursor noto‘g‘ri."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.count = None
+        self.next_cursor = None
+
+        ordering = view.get_keyset_ordering() if view is not None else "-id"
+        descending = ordering.startswith("-")
+        self.field_name = ordering.lstrip("-")
+        direction = "lt" if descending else "gt"
+        prefix = "-" if descending else ""
+
+        if request.query_params.get(self.count_query_param) in ("1", "true"):
+            self.count = queryset.order_by().count()
+
+        queryset = queryset.order_by(f"{prefix}{self.field_name}", f"{prefix}id")
+
+        cursor = self.decode_cursor(request, queryset)
+        if cursor is not None:
+            value, pk = cursor
+            queryset = queryset.filter(
+                Q(**{f"{self.field_name}__{direction}": value})
+                | Q(**{self.field_name: value, f"id__{direction}": pk})
+            )
+
+        page_size = self.get_page_size(request)
+        rows = list(queryset[:page_size + 1])
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            self.next_cursor = self.encode_cursor(rows[-1])
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        payload = {"next": self.get_next_link()}
+        if self.count is not None:
+            payload["count"] = self.count
+        payload["results"] = data
+        return Response(payload)
+
+    def encode_cursor(self, row):
+        if isinstance(row, dict):
+            value, pk = row[self.field_name], row["id"]
+        else:
+            value, pk = getattr(row, self.field_name), row.pk
+        value = value.isoformat() if hasattr(value, "isoformat") else str(value)
+        raw = json.dumps([value, pk]).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, request, queryset):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        # Tartiblash maydoni annotatsiya ham bo‘lishi mumkin (masalan, search_rank)
+        annotation = queryset.query.annotations.get(self.field_name)
+        field = annotation.output_field if annotation is not None else queryset.model._meta.get_field(self.field_name)
+        try:
+            raw = base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4))
+            value, pk = json.loads(raw)
+            value = field.to_python(value)
+            # Qo‘lda o‘zgartirilgan cursor: NULL bilan solishtirish filtrda xato beradi
+            if value is None:
+                raise ValueError(value)
+            return value, int(pk)
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "count": {"type": "integer"},
+                "results": schema,
+            },
+        }
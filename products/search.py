@@ -0,0 +1,92 @@
+import re
+import unicodedata
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import F, FloatField, Func, OuterRef, Subquery, TextField, Value
+from django.db.models.functions import Cast
+
+# Qidiruv bir nechta til konfiguratsiyasida ishlaydi:
+# simple — o‘zbekcha (stemmer yo‘q), russian va english — o‘z stemmerlari bilan
+SEARCH_CONFIGS = ("simple", "russian", "english")
+
+# O‘zbek lotin yozuvidagi apostrof variantlari (o‘, g‘, ʼ) bitta belgiga, ё esa е ga keltiriladi
+SOURCE_CHARS = "ʻʼ‘’`´ё"
+TARGET_CHARS = "''''''е"
+
+MAX_SEARCH_TERMS = 10
+
+_TRANSLATION = str.maketrans(SOURCE_CHARS, TARGET_CHARS)
+_TERM_RE = re.compile(r"[^\W_]+")
+
+
+def normalize_text(text):
+    return unicodedata.normalize("NFKC", text).lower().translate(_TRANSLATION)
+
+
+def _normalized(expression):
+    # Bazada ham matn xuddi normalize_text() dagidek normallashtiriladi
+    return Func(
+        Func(expression, function="LOWER", output_field=TextField()),
+        Value(SOURCE_CHARS), Value(TARGET_CHARS),
+        function="TRANSLATE", output_field=TextField(),
+    )
+
+
+def search_vector_expression():
+    """
+    Product.search_vector uchun ifoda: title (A), manufacturer va kategoriya nomi (B), description (C).
+    Kategoriya nomi subquery orqali olinadi, shuning uchun ifodani update() da ishlatish mumkin.
+    O‘zgartirilsa rebuild_search_index buyrug‘ini ishga tushiring (0004 migratsiyasida eski nusxasi).
+    """
+    from .models import Category
+
+    category_name = Subquery(Category.objects.filter(pk=OuterRef("category_id")).values("name")[:1])
+    fields = (
+        (F("title"), "A"),
+        (F("manufacturer"), "B"),
+        (category_name, "B"),
+        (F("description"), "C"),
+    )
+
+    vector = None
+    for config in SEARCH_CONFIGS:
+        for expression, weight in fields:
+            part = SearchVector(_normalized(expression), config=config, weight=weight)
+            vector = part if vector is None else vector + part
+    return vector
+
+
+def update_search_vector(queryset):
+    # Bitta UPDATE bilan berilgan mahsulotlarning search_vector ustunini qayta hisoblaydi
+    return queryset.update(search_vector=search_vector_expression())
+
+
+def build_search_query(text):
+    """
+    Foydalanuvchi matnidan prefiksli tsquery yasaydi ("iphon pro" -> iphon:* & pro:*).
+    Har bir til konfiguratsiyasi uchun alohida so‘rov tuzilib, OR bilan birlashtiriladi.
+    """
+    terms = _TERM_RE.findall(normalize_text(text))[:MAX_SEARCH_TERMS]
+    if not terms:
+        return None
+
+    raw = " & ".join(f"{term}:*" for term in terms)
+    query = None
+    for config in SEARCH_CONFIGS:
+        part = SearchQuery(raw, config=config, search_type="raw")
+        query = part if query is None else query | part
+    return query
+
+
+def search_products(queryset, text):
+    """
+    GIN indeks bo‘yicha qidiradi va natijaga `search_rank` annotatsiyasini qo‘shadi.
+    Matnda birorta ham so‘z bo‘lmasa ("!!!") natija bo‘sh — butun katalog emas.
+    """
+    query = build_search_query(text)
+    if query is None:
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField())).none()
+    # ts_rank real (float4) qaytaradi; double ga keltirilsa qiymat Python float ida aniq saqlanadi
+    # va keyset cursor idagi tenglik sharti ishlaydi
+    rank = Cast(SearchRank(F("search_vector"), query), FloatField())
+    return queryset.filter(search_vector=query).annotate(search_rank=rank)
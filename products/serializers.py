@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from .derivatives import image_srcset
 from .models import (
     Category, Product, ProductImage, MemoryOption, Color,
     ProductVariant, AccessoryTarif, Bundle,
@@ -6,14 +7,43 @@ from .models import (
 )
 
 
+class SrcsetField(serializers.Field):
+    """
+    Rasm derivativlari URL lari: {"jpeg": {"320": url, ...}, "webp": {...}}.
+    `source` — ImageField yoki saqlangan fayl nomi, `derivatives_source` — derivativlari tayyor rasm nomi.
+    """
+    def __init__(self, derivatives_source='derivatives_name', **kwargs):
+        kwargs['read_only'] = True
+        self.derivatives_source = derivatives_source
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        return super().get_attribute(instance), getattr(instance, self.derivatives_source)
+
+    def to_representation(self, value):
+        value, derivatives_name = value
+        return image_srcset(getattr(value, 'name', value) or None, derivatives_name, self.context.get('request'))
+
+
+class FileNameURLField(serializers.Field):
+    # Saqlangan ProductImage fayl nomini ImageField kabi (to‘liq) URL ga aylantiradi
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return _file_url(value, self.context.get('request'))
+
+
 # Kategoriya serializer
 class CategorySerializer(serializers.ModelSerializer):
     sub_count = serializers.IntegerField(read_only=True)  # Faol sub-kategoriyalar soni
     product_count = serializers.IntegerField(read_only=True)  # Kategoriyadagi mahsulotlar soni
+    icon_srcset = SrcsetField(source='icon')
 
     class Meta:
         model = Category
-        fields = ['id', 'name', 'slug', 'icon', 'sub_count', 'product_count']
+        fields = ['id', 'name', 'slug', 'parent', 'icon', 'icon_srcset', 'sub_count', 'product_count']
 
 
 class ColorSerializer(serializers.ModelSerializer):
@@ -37,29 +67,112 @@ class ProductVariantSerializer(serializers.ModelSerializer):
         fields = ['id', 'color', 'memory', 'price', 'stock']
 
 
+# Tez (read-only) rejimda qiymatlarni DRF bilan bir xil formatlash uchun
+_money_field = serializers.DecimalField(max_digits=10, decimal_places=2)
+_datetime_field = serializers.DateTimeField()
+
+
+def _file_url(name, request):
+    # serializers.ImageField.to_representation bilan bir xil natija: URL ProductImage.image
+    # maydonining o‘z storage idan (kontent bo‘yicha saqlash), default_storage dan emas
+    if not name:
+        return None
+    url = ProductImage._meta.get_field('image').storage.url(name)
+    return request.build_absolute_uri(url) if request is not None else url
+
+
 class ProductImageSerializer(serializers.ModelSerializer):
+    srcset = SrcsetField(source='image')
+
     class Meta:
         model = ProductImage
-        fields = ['id', 'image', 'is_main']
+        fields = ['id', 'image', 'is_main', 'srcset']
+
+    @classmethod
+    def fast_data(cls, product_ids, request=None):
+        """
+        Tez rejim: berilgan mahsulotlar rasmlarini bitta values() so‘rovida o‘qib,
+        {product_id: [rasm, ...]} ko‘rinishida qaytaradi.
+        """
+        images = {pk: [] for pk in product_ids}
+        rows = ProductImage.objects.filter(product_id__in=product_ids).values_list(
+            'product_id', 'id', 'image', 'is_main', 'derivatives_name',
+        )
+        for product_id, pk, image, is_main, derivatives_name in rows:
+            images[product_id].append({
+                'id': pk,
+                'image': _file_url(image, request),
+                'is_main': is_main,
+                'srcset': image_srcset(image, derivatives_name, request),
+            })
+        return images
 
 
 class ProductSerializer(serializers.ModelSerializer):
     likes_count = serializers.IntegerField(read_only=True)
     images = ProductImageSerializer(many=True, read_only=True)
     category = serializers.StringRelatedField()  # faqat nomini ko‘rsatadi
+    # Asosiy rasm Product dagi saqlangan nomdan — images jadvalisiz
+    main_image = FileNameURLField(source='main_image_name')
+    main_image_srcset = SrcsetField(source='main_image_name', derivatives_source='main_image_derivatives_name')
+
+    # Tez rejimda values() orqali o‘qiladigan ustunlar
+    FAST_FIELDS = (
+        'id', 'title', 'slug', 'price', 'old_price', 'discount_percent',
+        'category__name', 'likes_count', 'is_featured', 'created_at',
+        'main_image_name', 'main_image_derivatives_name',
+    )
 
     class Meta:
         model = Product
         fields = [
             'id', 'title', 'slug', 'price', 'old_price', 'discount_percent',
-            'category', 'likes_count', 'is_featured', 'created_at', 'images'
+            'category', 'likes_count', 'is_featured', 'created_at',
+            'main_image', 'main_image_srcset', 'images'
+        ]
+
+    @classmethod
+    def fast_queryset(cls, queryset, *extra_fields):
+        # Model obyektlari o‘rniga lug‘at qatorlari; rasmlar fast_data() da alohida o‘qiladi.
+        # extra_fields — serializatsiyaga kirmaydigan, lekin pagination uchun kerak ustunlar (search_rank)
+        return queryset.select_related(None).prefetch_related(None).values(*cls.FAST_FIELDS, *extra_fields)
+
+    @classmethod
+    def fast_data(cls, rows, request=None):
+        """
+        Tez (read-only) rejim: fast_queryset() qatorlaridan oddiy serializer bilan
+        bayt-ma-bayt bir xil JSON beradigan ro‘yxat yasaydi, har bir obyekt uchun
+        maydon mexanizmisiz.
+        """
+        images = ProductImageSerializer.fast_data([row['id'] for row in rows], request)
+        return [
+            {
+                'id': row['id'],
+                'title': row['title'],
+                'slug': row['slug'],
+                'price': _money_field.to_representation(row['price']),
+                'old_price': _money_field.to_representation(row['old_price']) if row['old_price'] is not None else None,
+                'discount_percent': row['discount_percent'],
+                'category': row['category__name'],
+                'likes_count': row['likes_count'],
+                'is_featured': row['is_featured'],
+                'created_at': _datetime_field.to_representation(row['created_at']),
+                'main_image': _file_url(row['main_image_name'], request),
+                'main_image_srcset': image_srcset(
+                    row['main_image_name'] or None, row['main_image_derivatives_name'], request,
+                ),
+                'images': images[row['id']],
+            }
+            for row in rows
         ]
 
 
 class AccessoryTarifSerializer(serializers.ModelSerializer):
+    image_srcset = SrcsetField(source='image')
+
     class Meta:
         model = AccessoryTarif
-        fields = ['id', 'name', 'price', 'type', 'image']
+        fields = ['id', 'name', 'price', 'type', 'image', 'image_srcset']
 
 
 class BundleSerializer(serializers.ModelSerializer):
@@ -95,9 +208,11 @@ class ProductDetailSerializer(serializers.ModelSerializer):
 
 
 class AccessoryImageSerializer(serializers.ModelSerializer):
+    srcset = SrcsetField(source='image')
+
     class Meta:
         model = AccessoryImage
-        fields = ['id', 'image', 'alt_text']
+        fields = ['id', 'image', 'alt_text', 'srcset']
 
 
 class AccessorySerializer(serializers.ModelSerializer):
@@ -0,0 +1,294 @@
+import threading
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_init, post_save, post_delete, pre_delete, pre_save
+
+from .cache import bump_catalog_version
+from .derivatives import schedule_derivatives
+from .models import (
+    Category, Product, ProductImage, ProductVariant, SimilarProduct,
+    AccessoryImage, AccessoryTarif, Bundle, IMAGE_FIELDS, promote_main_image, refresh_bundle_prices, refresh_main_images,
+)
+from .search import update_search_vector
+from .storage import add_blob_reference, remove_blob_reference
+from .similarity import schedule_refresh
+from .tree import adjust_product_count, adjust_sub_count
+
+
+def invalidate_catalog_cache(sender, **kwargs):
+    # Katalogdagi har qanday o‘zgarish kesh versiyasini oshiradi — commit dan keyin, aks holda
+    # parallel so‘rov hali eski qatorlarni yangi versiya ostida keshlab qo‘yishi mumkin
+    transaction.on_commit(bump_catalog_version, robust=True)
+
+
+for model in (Product, ProductImage, ProductVariant, Category, Bundle, AccessoryTarif):
+    post_save.connect(invalidate_catalog_cache, sender=model, dispatch_uid=f"catalog_cache_save_{model.__name__}")
+    post_delete.connect(invalidate_catalog_cache, sender=model, dispatch_uid=f"catalog_cache_delete_{model.__name__}")
+# Bundle tarkibi mahsulot sahifasida ko‘rinadi
+m2m_changed.connect(invalidate_catalog_cache, sender=Bundle.accessories.through, dispatch_uid="catalog_cache_bundle_accessories")
+
+
+def refresh_product_search_vector(sender, instance, **kwargs):
+    update_search_vector(Product.objects.filter(pk=instance.pk))
+
+
+def refresh_category_search_vectors(sender, instance, **kwargs):
+    # Kategoriya nomi mahsulot vektoriga kiradi
+    update_search_vector(Product.objects.filter(category_id=instance.pk))
+
+
+post_save.connect(refresh_product_search_vector, sender=Product, dispatch_uid="product_search_vector")
+post_save.connect(refresh_category_search_vectors, sender=Category, dispatch_uid="category_search_vectors")
+
+
+# Kategoriya sonlarini (product_count, sub_count) o‘sib boruvchi tarzda yangilash.
+# Obyekt yuklanganda eski qiymatlar eslab qolinadi, saqlanganda farq qo‘llanadi.
+
+_UNKNOWN = object()
+
+
+def remember_product_state(sender, instance, **kwargs):
+    # __dict__ orqali o‘qiladi — deferred maydonlar uchun qo‘shimcha so‘rov bo‘lmasligi uchun
+    instance._category_state = (
+        instance.__dict__.get("category_id", _UNKNOWN), instance.__dict__.get("is_available", _UNKNOWN),
+    )
+
+
+def load_product_state(sender, instance, **kwargs):
+    # only()/defer() bilan yuklangan obyekt: eski qiymat noma’lum — saqlashdan oldin bazadan olinadi
+    if _UNKNOWN in instance._category_state and instance.pk and not instance._state.adding:
+        instance._category_state = Product.objects.filter(pk=instance.pk).values_list(
+            "category_id", "is_available"
+        ).first() or (None, False)
+
+
+def update_counts_on_product_save(sender, instance, created, **kwargs):
+    old_category_id, old_available = (None, False) if created else instance._category_state
+    new_state = (instance.category_id, instance.is_available)
+    if (old_category_id, old_available) != new_state:
+        if old_available:
+            adjust_product_count(old_category_id, -1)
+        if instance.is_available:
+            adjust_product_count(instance.category_id, 1)
+    instance._category_state = new_state
+
+
+def update_counts_on_product_delete(sender, instance, **kwargs):
+    if instance.is_available:
+        adjust_product_count(instance.category_id, -1)
+
+
+def remember_category_state(sender, instance, **kwargs):
+    instance._parent_state = (instance.__dict__.get("parent_id", _UNKNOWN), instance.__dict__.get("is_active", _UNKNOWN))
+
+
+def load_category_state(sender, instance, **kwargs):
+    if _UNKNOWN in instance._parent_state and instance.pk and not instance._state.adding:
+        instance._parent_state = Category.objects.filter(pk=instance.pk).values_list(
+            "parent_id", "is_active"
+        ).first() or (None, False)
+
+
+def update_counts_on_category_save(sender, instance, created, **kwargs):
+    old_parent_id, old_active = (None, False) if created else instance._parent_state
+    new_state = (instance.parent_id, instance.is_active)
+    if (old_parent_id, old_active) != new_state:
+        if old_active:
+            adjust_sub_count(old_parent_id, -1)
+        if instance.is_active:
+            adjust_sub_count(instance.parent_id, 1)
+    instance._parent_state = new_state
+
+
+def update_counts_on_category_delete(sender, instance, **kwargs):
+    if instance.is_active:
+        adjust_sub_count(instance.parent_id, -1)
+
+
+post_init.connect(remember_product_state, sender=Product, dispatch_uid="product_category_state")
+pre_save.connect(load_product_state, sender=Product, dispatch_uid="product_category_state_load")
+post_save.connect(update_counts_on_product_save, sender=Product, dispatch_uid="product_category_counts_save")
+post_delete.connect(update_counts_on_product_delete, sender=Product, dispatch_uid="product_category_counts_delete")
+post_init.connect(remember_category_state, sender=Category, dispatch_uid="category_parent_state")
+pre_save.connect(load_category_state, sender=Category, dispatch_uid="category_parent_state_load")
+post_save.connect(update_counts_on_category_save, sender=Category, dispatch_uid="category_counts_save")
+post_delete.connect(update_counts_on_category_delete, sender=Category, dispatch_uid="category_counts_delete")
+
+
+# O‘xshash mahsulotlar jadvali: o‘xshashlikka ta’sir qiladigan maydonlar o‘zgarganda
+# tranzaksiya tugagach fon oqimida o‘sib boruvchi yangilanadi (birga like qilinganlik — refresh_similar_products buyrug‘ida).
+SIMILARITY_FIELDS = ("category_id", "manufacturer", "operating_system", "price", "is_available")
+
+
+# Tranzaksiyadagi barcha o‘zgargan mahsulotlar bitta to‘plamga yig‘iladi (admin da 12 ta inline
+# variant saqlansa ham bucket bir marta hisoblanadi). Callback har safar ro‘yxatga olinadi, lekin
+# to‘plamni faqat birinchisi fon oqimiga topshiradi — qolganlari bo‘sh to‘plamni ko‘radi. Rollback
+# bo‘lgan tranzaksiyadagi id lar keyingi commit da qayta hisoblanadi, bu zararsiz.
+_pending_similarity = threading.local()
+
+
+def refresh_similar_and_invalidate():
+    product_ids = getattr(_pending_similarity, "ids", None)
+    if not product_ids:
+        return
+    _pending_similarity.ids = set()
+    # Bucket yuklash va qayta hisoblash so‘rov oqimini kutdirmaydi (products/similarity.py)
+    schedule_refresh(product_ids)
+
+
+def schedule_similarity_refresh(product_ids):
+    if getattr(_pending_similarity, "ids", None) is None:
+        _pending_similarity.ids = set()
+    _pending_similarity.ids.update(product_ids)
+    transaction.on_commit(refresh_similar_and_invalidate, robust=True)
+
+
+def remember_similarity_state(sender, instance, **kwargs):
+    instance._similarity_state = tuple(instance.__dict__.get(name) for name in SIMILARITY_FIELDS)
+
+
+def refresh_similar_on_product_save(sender, instance, created, **kwargs):
+    state = tuple(getattr(instance, name) for name in SIMILARITY_FIELDS)
+    if created or state != instance._similarity_state:
+        schedule_similarity_refresh([instance.pk])
+    instance._similarity_state = state
+
+
+def refresh_similar_on_product_delete(sender, instance, **kwargs):
+    # O‘chirilgan mahsulotni ro‘yxatida saqlagan mahsulotlar qayta hisoblanadi
+    listing_ids = list(SimilarProduct.objects.filter(similar_id=instance.pk).values_list("product_id", flat=True))
+    if listing_ids:
+        schedule_similarity_refresh(listing_ids)
+
+
+def refresh_similar_on_variant_change(sender, instance, **kwargs):
+    # Xotira variantlari o‘xshashlik belgisi hisoblanadi
+    schedule_similarity_refresh([instance.product_id])
+
+
+post_init.connect(remember_similarity_state, sender=Product, dispatch_uid="product_similarity_state")
+post_save.connect(refresh_similar_on_product_save, sender=Product, dispatch_uid="product_similarity_save")
+pre_delete.connect(refresh_similar_on_product_delete, sender=Product, dispatch_uid="product_similarity_delete")
+post_save.connect(refresh_similar_on_variant_change, sender=ProductVariant, dispatch_uid="variant_similarity_save")
+post_delete.connect(refresh_similar_on_variant_change, sender=ProductVariant, dispatch_uid="variant_similarity_delete")
+
+
+# Rasm derivativlari (thumbnail/WebP) tranzaksiya tugagach jarayonlar puliga topshiriladi
+def generate_image_derivatives(sender, instance, **kwargs):
+    name = getattr(instance, IMAGE_FIELDS[sender]).name
+    if name:
+        transaction.on_commit(partial(schedule_derivatives, name), robust=True)
+
+
+for model in IMAGE_FIELDS:
+    post_save.connect(generate_image_derivatives, sender=model, dispatch_uid=f"image_derivatives_{model.__name__}")
+
+
+# Product.main_image_name ni asosiy rasm bilan sinxron saqlash
+def refresh_main_image_on_save(sender, instance, **kwargs):
+    refresh_main_images([instance.product_id])
+
+
+def refresh_main_image_on_delete(sender, instance, **kwargs):
+    if instance.is_main:
+        promote_main_image(instance.product_id)
+    refresh_main_images([instance.product_id])
+
+
+post_save.connect(refresh_main_image_on_save, sender=ProductImage, dispatch_uid="product_main_image_save")
+post_delete.connect(refresh_main_image_on_delete, sender=ProductImage, dispatch_uid="product_main_image_delete")
+
+
+# Kontent bo‘yicha saqlangan bloblarga murojaatlar sonini yuritish (products/storage.py)
+def remember_image_name(sender, instance, **kwargs):
+    value = instance.__dict__.get("image")
+    instance._image_name = getattr(value, "name", value)
+
+
+def count_blob_references_on_save(sender, instance, created, **kwargs):
+    old_name = None if created else instance._image_name
+    new_name = instance.image.name
+    if old_name != new_name:
+        add_blob_reference(new_name)
+        remove_blob_reference(old_name)
+    instance._image_name = new_name
+
+
+def count_blob_references_on_delete(sender, instance, **kwargs):
+    remove_blob_reference(instance.image.name)
+
+
+for model in (ProductImage, AccessoryImage):
+    post_init.connect(remember_image_name, sender=model, dispatch_uid=f"blob_name_{model.__name__}")
+    post_save.connect(count_blob_references_on_save, sender=model, dispatch_uid=f"blob_refs_save_{model.__name__}")
+    post_delete.connect(count_blob_references_on_delete, sender=model, dispatch_uid=f"blob_refs_delete_{model.__name__}")
+
+
+# Bundle.total_price ni saqlangan holda yuritish: ta’sirlangan barcha to‘plamlar bitta UPDATE bilan
+def refresh_bundle_price(bundle):
+    refresh_bundle_prices(Bundle.objects.filter(pk=bundle.pk))
+    # UPDATE faqat bazada — signal obyekti (masalan, Bundle.objects.create natijasi) ham yangi narxni ko‘rsin
+    bundle.refresh_from_db(fields=["total_price"])
+
+
+def refresh_bundle_price_on_save(sender, instance, **kwargs):
+    # Yangi to‘plam, chegirma yoki asosiy mahsulot o‘zgarishi
+    refresh_bundle_price(instance)
+
+
+def refresh_bundle_price_on_accessories_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            refresh_bundle_price(instance)
+        return
+    # Teskari tomondan: accessory_tarif.bundle_set.add(...)/clear()
+    if action == "pre_clear":
+        instance._cleared_bundle_ids = list(instance.bundle_set.values_list("pk", flat=True))
+    elif action in ("post_add", "post_remove"):
+        refresh_bundle_prices(Bundle.objects.filter(pk__in=pk_set))
+    elif action == "post_clear":
+        refresh_bundle_prices(Bundle.objects.filter(pk__in=instance._cleared_bundle_ids))
+
+
+def remember_accessory_price(sender, instance, **kwargs):
+    instance._price_state = instance.__dict__.get("price")
+
+
+def refresh_bundle_prices_on_accessory_save(sender, instance, created, **kwargs):
+    if not created and instance.price != instance._price_state:
+        refresh_bundle_prices(Bundle.objects.filter(accessories=instance))
+    instance._price_state = instance.price
+
+
+def remember_accessory_bundles(sender, instance, **kwargs):
+    # O‘chirishda m2m qatorlari m2m_changed siz o‘chadi
+    instance._bundle_ids = list(instance.bundle_set.values_list("pk", flat=True))
+
+
+def refresh_bundle_prices_on_accessory_delete(sender, instance, **kwargs):
+    refresh_bundle_prices(Bundle.objects.filter(pk__in=instance._bundle_ids))
+
+
+def remember_product_price(sender, instance, **kwargs):
+    instance._price_state = instance.__dict__.get("price")
+
+
+def refresh_bundle_prices_on_product_save(sender, instance, created, **kwargs):
+    if not created and instance.price != instance._price_state:
+        refresh_bundle_prices(Bundle.objects.filter(product=instance))
+    instance._price_state = instance.price
+
+
+post_save.connect(refresh_bundle_price_on_save, sender=Bundle, dispatch_uid="bundle_price_save")
+m2m_changed.connect(
+    refresh_bundle_price_on_accessories_change, sender=Bundle.accessories.through, dispatch_uid="bundle_price_accessories",
+)
+post_init.connect(remember_accessory_price, sender=AccessoryTarif, dispatch_uid="accessory_tarif_price_state")
+post_save.connect(refresh_bundle_prices_on_accessory_save, sender=AccessoryTarif, dispatch_uid="accessory_tarif_bundle_prices")
+pre_delete.connect(remember_accessory_bundles, sender=AccessoryTarif, dispatch_uid="accessory_tarif_bundles")
+post_delete.connect(
+    refresh_bundle_prices_on_accessory_delete, sender=AccessoryTarif, dispatch_uid="accessory_tarif_delete_bundle_prices",
+)
+post_init.connect(remember_product_price, sender=Product, dispatch_uid="product_price_state")
+post_save.connect(refresh_bundle_prices_on_product_save, sender=Product, dispatch_uid="product_bundle_prices")
@@ -0,0 +1,320 @@
+"""
+O‘xshash mahsulotlar dvigateli.
+
+Mahsulotlar ildiz kategoriya bo‘yicha "bucket" larga bo‘linadi. Har bir bucket uchun
+belgilar (kategoriya, ishlab chiqaruvchi, OS, narx, xotira variantlari, birga like qilinganlik)
+NumPy massivlariga yuklanadi va o‘xshashlik bloklab, vektorlashtirilgan holda hisoblanadi.
+Har bir mahsulot uchun eng yaxshi K ta qo‘shni SimilarProduct jadvalida saqlanadi.
+
+Saqlash signallaridan keladigan o‘sib boruvchi yangilashlar so‘rov oqimida emas, bitta fon
+oqimida bajariladi (schedule_refresh) — mahsulot saqlash vaqti bucket hajmiga bog‘liq emas.
+"""
+import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+from django.db import connection, transaction
+from django.db.models import Count, F, Min
+
+from .cache import bump_catalog_version
+from .tree import PATH_SEGMENT_LENGTH
+
+logger = logging.getLogger(__name__)
+
+SIMILAR_TOP_K = 12
+# Blokdagi qatorlar soni: ko‘pi bilan BLOCK_SIZE, lekin (qatorlar × bucket) matritsasi
+# BLOCK_ELEMENTS dan oshmaydi — float64 da ~8 MB, score_rows dagi vaqtinchalik massivlar
+# bilan ham cho‘qqi xotira bucket hajmidan qat’i nazar ~50 MB atrofida qoladi
+BLOCK_SIZE = 256
+BLOCK_ELEMENTS = 1_000_000
+
+# Belgilar og‘irligi
+WEIGHTS = {
+    "category": 3.0,
+    "manufacturer": 2.0,
+    "operating_system": 1.0,
+    "price": 2.0,
+    "memory": 1.0,
+    "co_likes": 2.0,
+}
+
+
+@dataclass
+class Bucket:
+    ids: np.ndarray
+    index: dict
+    category: np.ndarray
+    manufacturer: np.ndarray
+    operating_system: np.ndarray
+    price: np.ndarray
+    memory: np.ndarray
+    memory_count: np.ndarray
+    like_count: np.ndarray
+    pair_rows: np.ndarray
+    pair_cols: np.ndarray
+    pair_counts: np.ndarray
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def _codes(values):
+    # Matnli qiymatlarni butun son kodlariga o‘giradi, None -> -1
+    lookup = {}
+    return np.array([-1 if value is None else lookup.setdefault(value, len(lookup)) for value in values], dtype=np.int64)
+
+
+def root_path(path):
+    return path[:PATH_SEGMENT_LENGTH + 1]
+
+
+def load_bucket(root):
+    """Bir ildiz kategoriyadagi faol mahsulotlar belgilarini 3 ta so‘rovda yuklaydi."""
+    from .models import Product, ProductVariant
+
+    products = Product.objects.filter(is_available=True, category__path__startswith=root)
+    rows = list(products.order_by("pk").values_list(
+        "pk", "category_id", "manufacturer", "operating_system", "price", "likes_count",
+    ))
+    ids = np.array([row[0] for row in rows], dtype=np.int64)
+    index = {pk: position for position, pk in enumerate(ids.tolist())}
+
+    memory_pairs = list(
+        ProductVariant.objects.filter(product__in=products).values_list("product_id", "memory_id").distinct()
+    )
+    memory_ids = {memory_id: column for column, memory_id in enumerate(sorted({m for _, m in memory_pairs}))}
+    memory = np.zeros((len(ids), max(len(memory_ids), 1)), dtype=np.float32)
+    for product_id, memory_id in memory_pairs:
+        memory[index[product_id], memory_ids[memory_id]] = 1
+
+    # Birga like qilinganlik: bir xil foydalanuvchi like qilgan mahsulot juftliklari soni
+    through = Product.likes.through
+    pairs = list(
+        through.objects.filter(product__in=products, user__liked_products__in=products)
+        .exclude(product_id=F("user__liked_products"))
+        .values_list("product_id", "user__liked_products")
+        .annotate(total=Count("*"))
+    )
+    pair_rows = np.array([index[a] for a, _, _ in pairs], dtype=np.int64)
+    pair_cols = np.array([index[b] for _, b, _ in pairs], dtype=np.int64)
+    pair_counts = np.array([total for _, _, total in pairs], dtype=np.float32)
+
+    return Bucket(
+        ids=ids,
+        index=index,
+        category=np.array([row[1] for row in rows], dtype=np.int64),
+        manufacturer=_codes([row[2] for row in rows]),
+        operating_system=_codes([row[3] for row in rows]),
+        price=np.array([float(row[4]) for row in rows], dtype=np.float64),
+        memory=memory,
+        memory_count=memory.sum(axis=1),
+        like_count=np.array([row[5] for row in rows], dtype=np.float64),
+        pair_rows=pair_rows,
+        pair_cols=pair_cols,
+        pair_counts=pair_counts,
+    )
+
+
+def block_size(bucket):
+    return max(1, min(BLOCK_SIZE, BLOCK_ELEMENTS // max(len(bucket), 1)))
+
+
+def score_rows(bucket, rows):
+    """`rows` (bucket indekslari) va bucketdagi barcha mahsulotlar orasidagi o‘xshashlik matritsasi."""
+    rows = np.asarray(rows, dtype=np.int64)
+    scores = WEIGHTS["category"] * (bucket.category[rows, None] == bucket.category[None, :])
+    scores = scores + WEIGHTS["manufacturer"] * (bucket.manufacturer[rows, None] == bucket.manufacturer[None, :])
+    same_os = (bucket.operating_system[rows, None] == bucket.operating_system[None, :]) & (
+        bucket.operating_system[rows, None] >= 0
+    )
+    scores = scores + WEIGHTS["operating_system"] * same_os
+
+    # Narx yaqinligi: 1 - |a - b| / max(a, b)
+    price_i, price_j = bucket.price[rows, None], bucket.price[None, :]
+    highest = np.maximum(np.maximum(price_i, price_j), 1e-9)
+    scores = scores + WEIGHTS["price"] * np.clip(1 - np.abs(price_i - price_j) / highest, 0, 1)
+
+    # Xotira variantlari bo‘yicha Jaccard
+    intersection = bucket.memory[rows] @ bucket.memory.T
+    union = bucket.memory_count[rows, None] + bucket.memory_count[None, :] - intersection
+    scores = scores + WEIGHTS["memory"] * np.divide(
+        intersection, union, out=np.zeros_like(intersection), where=union > 0
+    )
+
+    # Birga like qilinganlik (kosinus)
+    if len(bucket.pair_rows):
+        positions = np.full(len(bucket), -1, dtype=np.int64)
+        positions[rows] = np.arange(len(rows))
+        selected = positions[bucket.pair_rows] >= 0
+        co_likes = np.zeros((len(rows), len(bucket)), dtype=np.float64)
+        co_likes[positions[bucket.pair_rows[selected]], bucket.pair_cols[selected]] = bucket.pair_counts[selected]
+        norm = np.sqrt(bucket.like_count[rows, None] * bucket.like_count[None, :])
+        scores = scores + WEIGHTS["co_likes"] * np.divide(
+            co_likes, norm, out=np.zeros_like(co_likes), where=norm > 0
+        )
+
+    # Mahsulot o‘ziga o‘xshash hisoblanmaydi
+    scores[np.arange(len(rows)), rows] = -np.inf
+    return scores
+
+
+def top_k(scores, k=SIMILAR_TOP_K):
+    """Har bir qator uchun eng katta k ta qiymat indekslari (kamayish tartibida)."""
+    k = min(k, scores.shape[1] - 1)
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, candidates, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def _store(bucket, rows):
+    """
+    Berilgan qatorlar uchun top-K ni qayta hisoblab, jadvaldagi yozuvlarni almashtiradi.
+    Bog‘lanishlar blok-blok yoziladi — butun bucket uchun obyektlar ro‘yxati xotirada yig‘ilmaydi.
+    """
+    from .models import SimilarProduct
+
+    stored = 0
+    size = block_size(bucket)
+    with transaction.atomic():
+        SimilarProduct.objects.filter(product_id__in=[int(bucket.ids[row]) for row in rows]).delete()
+        for start in range(0, len(rows), size):
+            block = rows[start:start + size]
+            scores = score_rows(bucket, block)
+            neighbours = top_k(scores)
+            links = [
+                SimilarProduct(
+                    product_id=int(bucket.ids[row]),
+                    similar_id=int(bucket.ids[column]),
+                    rank=rank,
+                    score=float(scores[offset, column]),
+                )
+                for offset, row in enumerate(block)
+                for rank, column in enumerate(neighbours[offset])
+            ]
+            SimilarProduct.objects.bulk_create(links, batch_size=2000)
+            stored += len(links)
+    return stored
+
+
+def rebuild_bucket(root):
+    bucket = load_bucket(root)
+    return _store(bucket, list(range(len(bucket))))
+
+
+def _affected_rows(bucket, changed_rows):
+    """
+    O‘zgargan mahsulotlar kimlarning top-K ro‘yxatiga kirishi (yoki chiqishi) mumkinligini aniqlaydi:
+    yangi ball qo‘shnining hozirgi K-chi balidan yuqori bo‘lsa yoki u allaqachon ro‘yxatda bo‘lsa.
+    """
+    from .models import SimilarProduct
+
+    changed_ids = [int(bucket.ids[row]) for row in changed_rows]
+    thresholds = np.full(len(bucket), -np.inf)
+    for stats in (
+        SimilarProduct.objects.filter(product_id__in=bucket.ids.tolist())
+        .values("product_id")
+        .annotate(lowest=Min("score"), total=Count("id"))
+    ):
+        if stats["total"] >= min(SIMILAR_TOP_K, len(bucket) - 1):
+            thresholds[bucket.index[stats["product_id"]]] = stats["lowest"]
+
+    size = block_size(bucket)
+    best = np.full(len(bucket), -np.inf)
+    for start in range(0, len(changed_rows), size):
+        best = np.maximum(best, score_rows(bucket, changed_rows[start:start + size]).max(axis=0))
+    affected = set(np.nonzero(best > thresholds)[0].tolist())
+
+    listing = SimilarProduct.objects.filter(similar_id__in=changed_ids).values_list("product_id", flat=True)
+    affected.update(bucket.index[pk] for pk in listing if pk in bucket.index)
+    return affected
+
+
+def refresh_similar_products(product_ids):
+    """
+    O‘zgargan mahsulotlar uchun o‘sib boruvchi yangilash: mahsulotning o‘z ro‘yxati va
+    u ta’sir qiladigan qo‘shnilarning ro‘yxatlari qayta hisoblanadi, butun bucket emas.
+    """
+    from .models import Product, SimilarProduct
+
+    product_ids = set(product_ids)
+    # Ushbu mahsulotlarni ro‘yxatida saqlaganlar (boshqa bucketda bo‘lishi ham mumkin)
+    listing_ids = set(
+        SimilarProduct.objects.filter(similar_id__in=product_ids).values_list("product_id", flat=True)
+    )
+
+    changed_by_root = defaultdict(set)
+    listing_by_root = defaultdict(set)
+    for pk, path in Product.objects.filter(pk__in=product_ids | listing_ids).values_list("pk", "category__path"):
+        target = changed_by_root if pk in product_ids else listing_by_root
+        target[root_path(path)].add(pk)
+
+    stored = 0
+    present = set()
+    for root in set(changed_by_root) | set(listing_by_root):
+        bucket = load_bucket(root)
+        changed_rows = [bucket.index[pk] for pk in changed_by_root[root] if pk in bucket.index]
+        rows = set(changed_rows)
+        rows.update(bucket.index[pk] for pk in listing_by_root[root] if pk in bucket.index)
+        if changed_rows:
+            rows.update(_affected_rows(bucket, changed_rows))
+        present.update(int(bucket.ids[row]) for row in rows)
+        if rows:
+            stored += _store(bucket, sorted(rows))
+
+    # Endi faol bo‘lmagan (yoki o‘chirilgan) mahsulotlarning ro‘yxatlari olib tashlanadi
+    SimilarProduct.objects.filter(product_id__in=product_ids - present).delete()
+    return stored
+
+
+# Fon oqimi: navbatdagi id lar bitta to‘plamga yig‘iladi, worker ularni bo‘shatib bitta
+# refresh_similar_products da hisoblaydi. Bitta worker — bucket lar parallel qayta yozilmaydi.
+_executor = None
+_queue_lock = threading.Lock()
+_queued_ids = set()
+_drain_scheduled = False
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="similarity")
+    return _executor
+
+
+def _drain():
+    global _drain_scheduled
+    try:
+        while True:
+            with _queue_lock:
+                product_ids = set(_queued_ids)
+                _queued_ids.clear()
+                if not product_ids:
+                    _drain_scheduled = False
+                    return
+            try:
+                refresh_similar_products(product_ids)
+            except Exception:
+                # Ro‘yxatlar keyingi o‘zgarishda yoki refresh_similar_products buyrug‘ida tiklanadi
+                logger.exception("O‘xshash mahsulotlar yangilanmadi: %s", sorted(product_ids))
+            else:
+                # Yangi ro‘yxatlar kesh va ETag larda ko‘rinishi uchun
+                bump_catalog_version()
+    finally:
+        # Worker oqimining o‘z ulanishi — uzoq ochiq qolmaydi
+        connection.close()
+
+
+def schedule_refresh(product_ids):
+    """Commit qilingan o‘zgarishlar uchun o‘sib boruvchi yangilashni fon oqimiga topshiradi."""
+    global _drain_scheduled
+    with _queue_lock:
+        _queued_ids.update(product_ids)
+        if _drain_scheduled:
+            return
+        _drain_scheduled = True
+    get_executor().submit(_drain)
@@ -0,0 +1,112 @@
+"""
+Kontent bo‘yicha manzillanadigan (content-addressed) media saqlash.
+
+Yuklangan fayl SHA-256 bo‘yicha `blobs/ab/cd/<hash><kengaytma>` ga yoziladi — bir xil
+baytlar diskda bir marta saqlanadi. Har bir blobga nechta ProductImage/AccessoryImage
+murojaat qilishi MediaBlob.ref_count da yuritiladi (signals), yetim bloblarni
+`gc_media_blobs` buyrug‘i o‘chiradi.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+BLOBS_DIR = "blobs"
+
+
+def blob_name(digest, extension):
+    return f"{BLOBS_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{extension.lower()}"
+
+
+def is_blob(name):
+    return bool(name) and name.startswith(f"{BLOBS_DIR}/")
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Fayl nomi yuklangan nomdan emas, tarkib xeshidan olinadi. Fayl allaqachon bor bo‘lsa
+    qayta yozilmaydi (faqat mtime yangilanadi — GC yangi murojaatni o‘chirib yubormasligi uchun).
+    """
+
+    def hashed_name(self, name, content):
+        # Fayl saqlanganda oladigan nom (validatsiya uchun; fayl yozilmaydi)
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        return blob_name(digest.hexdigest(), os.path.splitext(name)[1])
+
+    def get_available_name(self, name, max_length=None):
+        # Nom _save() da xeshdan hisoblanadi; bir xil nom = bir xil tarkib
+        return name
+
+    def _save(self, name, content):
+        blobs_root = self.path(BLOBS_DIR)
+        os.makedirs(blobs_root, exist_ok=True)
+
+        # Bitta o‘tishda xeshlanadi va vaqtinchalik faylga yoziladi
+        digest = hashlib.sha256()
+        descriptor, temporary = tempfile.mkstemp(dir=blobs_root, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as output:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    output.write(chunk)
+
+            name = blob_name(digest.hexdigest(), os.path.splitext(name)[1])
+            full_path = self.path(name)
+            if os.path.exists(full_path):
+                os.utime(full_path)
+            else:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(temporary, self.file_permissions_mode)
+                # Parallel yuklashda ham xavfsiz: ikkala fayl tarkibi bir xil
+                os.replace(temporary, full_path)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+        return name
+
+
+content_addressed_storage = ContentAddressedStorage()
+
+
+def get_content_addressed_storage():
+    # ImageField(storage=...) uchun callable — migratsiyalarda sozlamalar qotib qolmaydi
+    return content_addressed_storage
+
+
+def _media_blob_model():
+    from .models import MediaBlob
+    return MediaBlob
+
+
+def add_blob_reference(name):
+    if not is_blob(name):
+        return
+    MediaBlob = _media_blob_model()
+    now = timezone.now()
+    if MediaBlob.objects.filter(name=name).update(ref_count=F("ref_count") + 1, updated_at=now):
+        return
+    try:
+        with transaction.atomic():
+            MediaBlob.objects.create(name=name, ref_count=1, updated_at=now)
+    except IntegrityError:
+        # Parallel so‘rov qatorni birinchi yaratdi
+        MediaBlob.objects.filter(name=name).update(ref_count=F("ref_count") + 1, updated_at=now)
+
+
+def remove_blob_reference(name):
+    if not is_blob(name):
+        return
+    _media_blob_model().objects.filter(name=name).update(
+        ref_count=Greatest(F("ref_count") - 1, 0), updated_at=timezone.now()
+    )
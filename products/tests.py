@@ -1,3 +1,750 @@
-from django.test import TestCase
+import base64
+import os
+import shutil
+import tempfile
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from .cache import bump_catalog_version, catalog_cache_key
+from .derivatives import record_derivatives
+from .facets import compute_facets, selected_filters
+from . import similarity
+from .pagination import KeysetPagination
+from .serializers import ProductSerializer
+from .storage import content_addressed_storage
+from .tree import rebuild_category_tree
+
+User = get_user_model()
+
+
+def run_concurrently(*targets):
+    """Funksiyalarni alohida oqimlarda (har biri o‘z ulanishi bilan) bir vaqtda ishga tushiradi."""
+    barrier = threading.Barrier(len(targets))
+    errors = []
+
+    def worker(target):
+        try:
+            barrier.wait()
+            target()
+        except Exception as error:  # noqa: BLE001 — test xabarida ko‘rsatiladi
+            errors.append(error)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=(target,)) for target in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+from .models import (
+    AccessoryTarif, Bundle, Category, Color, MediaBlob, MemoryOption, Product, ProductImage, ProductVariant,
+    SimilarProduct,
+)
+
+
+class ProductDetailQueryBudgetTests(TestCase):
+    """
+    ProductDetailAPIView so‘rovlari soni variant, bundle va rasmlar soniga bog‘liq emas:
+    ETag/Last-Modified uchun bitta yengil so‘rov + with_detail_relations() dagi 5 ta.
+    """
+    QUERY_BUDGET = 6
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Smartfonlar", slug="smartfonlar")
+        cls.colors = [Color.objects.create(name=f"Rang {i}") for i in range(4)]
+        cls.memories = [MemoryOption.objects.create(size=f"{64 * 2 ** i}GB") for i in range(3)]
+        cls.accessories = [
+            AccessoryTarif.objects.create(name=f"Aksessuar {i}", price=Decimal("50.00"), type=AccessoryTarif.TYPE_CHOICES[0][0])
+            for i in range(3)
+        ]
+
+    def create_product(self, slug, size):
+        product = Product.objects.create(category=self.category, title=slug, slug=slug, price=Decimal("1000.00"))
+        for i in range(size):
+            # Fayl yozilmaydi — faqat saqlangan nom kerak
+            ProductImage.objects.create(product=product, image=f"products/images/{slug}-{i}.jpg", is_main=i == 0)
+        for i in range(size):
+            ProductVariant.objects.create(
+                product=product,
+                color=self.colors[i % len(self.colors)],
+                memory=self.memories[i // len(self.colors) % len(self.memories)],
+                price=Decimal("1000.00") + i,
+            )
+        for i in range(size):
+            bundle = Bundle.objects.create(product=product, name=Bundle.BUNDLE_CHOICES[i % len(Bundle.BUNDLE_CHOICES)][0])
+            bundle.accessories.set(self.accessories[:i % len(self.accessories) + 1])
+        return product
+
+    def assert_detail_budget(self, product):
+        with self.assertNumQueries(self.QUERY_BUDGET):
+            response = self.client.get(reverse("product-detail", args=[product.slug]))
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_query_count_does_not_grow_with_relations(self):
+        small = self.assert_detail_budget(self.create_product("kichik", 1))
+        large = self.assert_detail_budget(self.create_product("katta", 12))
+
+        self.assertEqual(len(small["variants"]), 1)
+        self.assertEqual(len(large["variants"]), 12)
+        self.assertEqual(len(large["bundles"]), 12)
+        self.assertEqual(len(large["images"]), 12)
+
+
+class ProductDetailConditionalGetTests(TestCase):
+    """Detal sahifasi ETag i: mos If-None-Match 304 beradi, katalog versiyasi yoki like uni o‘zgartiradi."""
+
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name="Smartfonlar", slug="smartfonlar")
+        self.product = Product.objects.create(category=category, title="Telefon", slug="telefon", price=Decimal(100))
+        self.url = reverse("product-detail", args=[self.product.slug])
+
+    def get_etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response["ETag"]
+
+    def test_matching_etag_returns_304_without_detail_queries(self):
+        etag = self.get_etag()
+        # Faqat validator uchun yengil so‘rov
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH='"boshqa"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_catalog_bump_changes_etag(self):
+        etag = self.get_etag()
+        bump_catalog_version()
+        self.assertNotEqual(self.get_etag(), etag)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_like_changes_etag(self):
+        etag = self.get_etag()
+        self.product.toggle_like(User.objects.create_user(email="etag@example.com"))
+        self.assertNotEqual(self.get_etag(), etag)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+class CatalogCacheKeyTests(TestCase):
+
+    def test_scheme_is_part_of_key(self):
+        # Keshlangan javobdagi absolyut URL lar sxemaga bog‘liq — http javobi https mijozga berilmaydi
+        factory = RequestFactory()
+        http = Request(factory.get("/products/products/?page=2"))
+        https = Request(factory.get("/products/products/?page=2", secure=True))
+        self.assertNotEqual(
+            catalog_cache_key("product-list", http, ("page",)),
+            catalog_cache_key("product-list", https, ("page",)),
+        )
+
+
+class ToggleLikeTests(TransactionTestCase):
+
+    def setUp(self):
+        category = Category.objects.create(name="Smartfonlar", slug="smartfonlar")
+        self.product = Product.objects.create(category=category, title="Telefon", slug="telefon", price=Decimal(100))
+        self.users = [User.objects.create_user(email=f"like{i}@example.com") for i in range(4)]
+
+    def actual_likes(self):
+        return Product.likes.through.objects.filter(product=self.product).count()
+
+    def test_like_and_unlike(self):
+        self.assertEqual(self.product.toggle_like(self.users[0]), (True, 1))
+        self.assertEqual(self.product.toggle_like(self.users[1]), (True, 2))
+        self.assertEqual(self.product.toggle_like(self.users[0]), (False, 1))
+        self.assertEqual(Product.objects.get(pk=self.product.pk).likes_count, self.actual_likes())
+
+    def test_concurrent_double_toggle_keeps_counter_exact(self):
+        # Bir foydalanuvchining ikki parallel bosishi: hisoblagich haqiqiy like soni bilan mos qoladi
+        for _ in range(3):
+            targets = [
+                lambda user=user: Product.objects.get(pk=self.product.pk).toggle_like(user)
+                for user in self.users for _ in range(2)
+            ]
+            self.assertEqual(run_concurrently(*targets), [])
+            self.assertEqual(Product.objects.get(pk=self.product.pk).likes_count, self.actual_likes())
+
+    def test_reconcile_fixes_drifted_counter(self):
+        self.product.toggle_like(self.users[0])
+        Product.objects.filter(pk=self.product.pk).update(likes_count=7)
+
+        call_command("reconcile_likes_count", stdout=StringIO())
+
+        self.assertEqual(Product.objects.get(pk=self.product.pk).likes_count, 1)
+
+
+class ProductSearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Smartfonlar", slug="smartfonlar")
+        for slug, title in (("iphone", "iPhone 15 Pro"), ("galaxy", "Galaxy S24")):
+            Product.objects.create(category=category, title=title, slug=slug, price=Decimal(100))
+
+    def search(self, text):
+        response = self.client.get(reverse("product-list"), {"search": text})
+        self.assertEqual(response.status_code, 200)
+        return [product["slug"] for product in response.json()["results"]]
+
+    def test_prefix_search(self):
+        self.assertEqual(self.search("iphon pro"), ["iphone"])
+
+    def test_text_without_words_matches_nothing(self):
+        # So‘zsiz matn butun katalogni qaytarmaydi
+        self.assertEqual(self.search("!!!"), [])
+
+
+class KeysetPaginationTests(TestCase):
+    PRODUCTS = 7
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Smartfonlar", slug="smartfonlar")
+        for i in range(cls.PRODUCTS):
+            Product.objects.create(
+                category=category, title=f"Telefon {i}", slug=f"telefon-{i}", price=Decimal(100 + i % 2),
+            )
+        # Bir xil created_at — tartib faqat id tie-breaker bilan aniqlanadi
+        Product.objects.update(created_at=timezone.now())
+
+    def setUp(self):
+        cache.clear()
+
+    def walk(self, **params):
+        # Cursor larni oxirigacha kuzatib, barcha sahifalardagi slug larni qaytaradi
+        slugs = []
+        response = self.client.get(reverse("product-list"), {"pagination": "cursor", "page_size": 2, **params})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            slugs += [product["slug"] for product in data["results"]]
+            if not data["next"]:
+                return slugs
+            response = self.client.get(data["next"])
+
+    def test_cursor_round_trip_with_ties(self):
+        expected = list(Product.objects.order_by("-created_at", "-id").values_list("slug", flat=True))
+        self.assertEqual(self.walk(), expected)
+        expected = list(Product.objects.order_by("price", "id").values_list("slug", flat=True))
+        self.assertEqual(self.walk(ordering="price"), expected)
+
+    def walk_pages(self, url, results="results", **params):
+        slugs = []
+        for page in range(1, self.PRODUCTS):
+            response = self.client.get(url, {"page": page, "page_size": 2, **params})
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            slugs += [product["slug"] for product in data[results]]
+            if not data["next"]:
+                return slugs
+
+    def test_page_mode_matches_cursor_order(self):
+        # Sahifa rejimi ham id tie-breaker bilan: sahifalar orasida takror yoki tushib qolish yo‘q
+        for params in ({}, {"ordering": "price"}, {"ordering": "likes"}, {"search": "telefon"}):
+            self.assertEqual(self.walk_pages(reverse("product-list"), **params), self.walk(**params), params)
+        expected = list(Product.objects.order_by("-created_at", "-id").values_list("slug", flat=True))
+        self.assertEqual(self.walk_pages(reverse("category-detail", args=["smartfonlar"]), "products"), expected)
+
+    def test_cursor_by_search_rank(self):
+        slugs = self.walk(search="telefon")
+        self.assertEqual(sorted(slugs), sorted(Product.objects.values_list("slug", flat=True)))
+        self.assertEqual(len(slugs), len(set(slugs)))
+
+    def test_invalid_cursor_is_not_found(self):
+        for payload in (b"not json", b'"text"', b"[null, 1]", b'[[1], 1]', b'{"a": 1, "b": 2}', b'["2024-01-01", "x"]'):
+            cursor = base64.urlsafe_b64encode(payload).decode().rstrip("=")
+            response = self.client.get(reverse("product-list"), {"cursor": cursor})
+            self.assertEqual(response.status_code, 404, payload)
+        response = self.client.get(reverse("product-list"), {"cursor": "%%%"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_count_only_with_count(self):
+        view = SimpleNamespace(get_keyset_ordering=lambda: "-created_at")
+        factory = RequestFactory()
+        with self.assertNumQueries(1):
+            KeysetPagination().paginate_queryset(Product.objects.all(), Request(factory.get("/")), view)
+        paginator = KeysetPagination()
+        with self.assertNumQueries(2):
+            paginator.paginate_queryset(Product.objects.all(), Request(factory.get("/", {"with_count": "1"})), view)
+        self.assertEqual(paginator.count, self.PRODUCTS)
+
+
+class FacetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Smartfonlar", slug="smartfonlar")
+        for slug, manufacturer, operating_system, price in (
+            ("iphone-15", "apple", "ios", 1000),
+            ("iphone-14", "apple", "ios", 800),
+            ("galaxy", "samsung", "android", 900),
+            ("redmi", "xiaomi", "android", 200),
+        ):
+            Product.objects.create(
+                category=category, title=slug, slug=slug, price=Decimal(price),
+                manufacturer=manufacturer, operating_system=operating_system,
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    @staticmethod
+    def counts(facets, field):
+        return {bucket["value"]: bucket["count"] for bucket in facets[field] if bucket["count"]}
+
+    def facets(self, **params):
+        response = self.client.get(reverse("product-list"), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_facet_ignores_its_own_selection(self):
+        data = self.facets(manufacturer="apple")
+        self.assertEqual(len(data["results"]), 2)
+        # Tanlangan guruhning boshqa qiymatlari ham sanaladi, boshqa guruhlar tanlov bilan toraytiriladi
+        self.assertEqual(self.counts(data["facets"], "manufacturer"), {"apple": 2, "samsung": 1, "xiaomi": 1})
+        self.assertEqual(self.counts(data["facets"], "operating_system"), {"ios": 2})
+
+    def test_selections_narrow_other_facets(self):
+        data = self.facets(operating_system="android", max_price="850")
+        self.assertEqual([product["slug"] for product in data["results"]], ["redmi"])
+        self.assertEqual(self.counts(data["facets"], "manufacturer"), {"xiaomi": 1})
+        self.assertEqual(self.counts(data["facets"], "operating_system"), {"android": 1, "ios": 1})
+        # Narx gistogrammasi narx filtrisiz, lekin OS tanlovi bilan
+        self.assertEqual(data["facets"]["price"]["min"], "200.00")
+        self.assertEqual(data["facets"]["price"]["max"], "900.00")
+        self.assertEqual(sum(bucket["count"] for bucket in data["facets"]["price"]["histogram"]), 2)
+
+    def test_two_queries(self):
+        filters = selected_filters({"manufacturer": ["apple", "samsung"], "operating_system": ["ios"], "min_price": Decimal(100)})
+        with self.assertNumQueries(2):
+            facets = compute_facets(Product.objects.all(), filters)
+        self.assertEqual(self.counts(facets, "manufacturer"), {"apple": 2})
+        self.assertEqual(self.counts(facets, "operating_system"), {"ios": 2, "android": 1})
+
+
+class CategoryCountsTests(TestCase):
+    """O‘sib boruvchi product_count/sub_count har bir amaldan keyin rebuild_category_tree natijasi bilan bir xil."""
+
+    def setUp(self):
+        self.phones = Category.objects.create(name="Telefonlar", slug="telefonlar")
+        self.smart = Category.objects.create(name="Smartfonlar", slug="smartfonlar", parent=self.phones)
+        self.flagship = Category.objects.create(name="Flagmanlar", slug="flagmanlar", parent=self.smart)
+        self.accessories = Category.objects.create(name="Aksessuarlar", slug="aksessuarlar")
+        self.products = [
+            Product.objects.create(category=category, title=slug, slug=slug, price=Decimal(100))
+            for category, slug in ((self.flagship, "a"), (self.flagship, "b"), (self.smart, "c"), (self.accessories, "d"))
+        ]
+        self.assert_counts_match_rebuild()
+
+    def assert_counts_match_rebuild(self):
+        fields = ("pk", "path", "depth", "product_count", "sub_count")
+        maintained = list(Category.objects.order_by("pk").values_list(*fields))
+        rebuild_category_tree()
+        self.assertEqual(maintained, list(Category.objects.order_by("pk").values_list(*fields)))
+        return {pk: count for pk, _, _, count, _ in maintained}
+
+    def test_product_changes(self):
+        product = self.products[0]
+        product.is_available = False
+        product.save()
+        self.assert_counts_match_rebuild()
+
+        product.is_available = True
+        product.category = self.accessories
+        product.save()
+        self.assert_counts_match_rebuild()
+
+        # Bazadan qayta yuklangan obyekt (admin dagidek) va faqat ba’zi maydonlar
+        product = Product.objects.only("pk", "category").get(pk=self.products[1].pk)
+        product.category = self.phones
+        product.save(update_fields=["category"])
+        self.assert_counts_match_rebuild()
+
+        self.products[2].delete()
+        counts = self.assert_counts_match_rebuild()
+        self.assertEqual(counts[self.phones.pk], 1)
+        self.assertEqual(counts[self.accessories.pk], 2)
+
+    def test_subtree_moves(self):
+        self.flagship.parent = self.accessories
+        self.flagship.save()
+        counts = self.assert_counts_match_rebuild()
+        self.assertEqual(counts[self.accessories.pk], 3)
+        self.assertEqual(counts[self.phones.pk], 1)
+
+        self.smart.parent = self.accessories
+        self.smart.save()
+        self.assert_counts_match_rebuild()
+
+        self.smart.parent = None
+        self.smart.is_active = False
+        self.smart.save()
+        self.assert_counts_match_rebuild()
+
+        category = Category.objects.only("pk", "parent", "name", "slug").get(pk=self.flagship.pk)
+        category.parent = self.phones
+        category.save()
+        self.assert_counts_match_rebuild()
+
+        self.accessories.delete()
+        self.assert_counts_match_rebuild()
+
+
+class SimilarityRefreshTests(TransactionTestCase):
+
+    def wait_for_worker(self):
+        # Bitta worker — keyin topshirilgan bo‘sh vazifa navbatdagi yangilashdan keyin bajariladi
+        similarity.get_executor().submit(lambda: None).result()
+
+    def test_refresh_runs_off_the_request_thread(self):
+        threads = []
+        refresh = similarity.refresh_similar_products
+
+        def recording_refresh(product_ids):
+            threads.append(threading.current_thread())
+            return refresh(product_ids)
+
+        category = Category.objects.create(name="Smartfonlar", slug="smartfonlar")
+        with mock.patch.object(similarity, "refresh_similar_products", recording_refresh):
+            products = [
+                Product.objects.create(category=category, title=f"Telefon {i}", slug=f"telefon-{i}", price=Decimal(100 + i))
+                for i in range(3)
+            ]
+            self.wait_for_worker()
+
+        self.assertTrue(threads)
+        self.assertNotIn(threading.current_thread(), threads)
+        self.assertEqual(
+            set(SimilarProduct.objects.filter(product=products[0]).values_list("similar_id", flat=True)),
+            {products[1].pk, products[2].pk},
+        )
+
+
+class ProductSerializerFastPathTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Smartfonlar", slug="smartfonlar")
+        with_images = Product.objects.create(
+            category=category, title="Rasmli", slug="rasmli", price=Decimal("1299.90"), old_price=Decimal("1499.00"),
+            discount_percent=13, is_featured=True,
+        )
+        for i in range(3):
+            # Fayl yozilmaydi — URL faqat nomdan yasaladi
+            ProductImage.objects.create(product=with_images, image=f"blobs/ab/{i}{'0' * 39}.jpg", is_main=i == 1)
+        # Asosiy rasm derivativlari tayyor deb qayd etiladi, qolganlariniki hali yo‘q
+        record_derivatives(f"blobs/ab/1{'0' * 39}.jpg")
+        Product.objects.create(category=category, title="Rasmsiz", slug="rasmsiz", price=Decimal(100))
+
+    def test_fast_data_matches_serializer(self):
+        request = Request(RequestFactory().get("/products/products/", secure=True))
+        queryset = Product.objects.select_related("category").prefetch_related("images").order_by("id")
+
+        # srcset qayd etilgan nomdan quriladi — storage tekshirilmaydi
+        with mock.patch.object(default_storage, "exists", side_effect=AssertionError("storage tekshirildi")):
+            expected = ProductSerializer(queryset, many=True, context={"request": request}).data
+            fast = ProductSerializer.fast_data(list(ProductSerializer.fast_queryset(queryset)), request)
+
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(fast), renderer.render(expected))
+        self.assertEqual(len(fast[0]["images"]), 3)
+        self.assertTrue(fast[0]["main_image"].startswith("https://"))
+        self.assertEqual(set(fast[0]["main_image_srcset"]), {"jpeg", "webp"})
+        self.assertEqual([image["srcset"] is not None for image in fast[0]["images"]], [True, False, False])
+        self.assertEqual(fast[1]["images"], [])
+        self.assertIsNone(fast[1]["main_image"])
+
+
+class ImageDerivativesRecordTests(TestCase):
+
+    def setUp(self):
+        category = Category.objects.create(name="Smartfonlar", slug="smartfonlar")
+        self.product = Product.objects.create(category=category, title="Rasmli", slug="rasmli", price=Decimal(100))
+        self.image = ProductImage.objects.create(product=self.product, image=f"blobs/cd/{'1' * 40}.jpg")
+
+    def test_record_marks_image_and_main_image(self):
+        name = self.image.image.name
+        self.assertEqual(record_derivatives(name), 2)
+        self.assertEqual(record_derivatives(name), 0)
+
+        self.image.refresh_from_db()
+        self.product.refresh_from_db()
+        self.assertEqual(self.image.derivatives_name, name)
+        self.assertEqual(self.product.main_image_derivatives_name, name)
+        self.assertIn("/derivatives/blobs/cd/", self.product.main_image_thumbnail)
+
+    def test_replaced_image_drops_srcset_until_recorded(self):
+        record_derivatives(self.image.image.name)
+        self.image.image = f"blobs/cd/{'2' * 40}.jpg"
+        self.image.save()
+        self.product.refresh_from_db()
+
+        data = ProductSerializer(self.product).data
+        self.assertIsNone(data["main_image_srcset"])
+        self.assertEqual(self.product.main_image_thumbnail, self.product.main_image)
+
+        record_derivatives(self.image.image.name)
+        self.product.refresh_from_db()
+        self.assertEqual(set(ProductSerializer(self.product).data["main_image_srcset"]), {"jpeg", "webp"})
+
+
+class MainImageTests(TestCase):
+
+    def setUp(self):
+        category = Category.objects.create(name="Smartfonlar", slug="smartfonlar")
+        self.product = Product.objects.create(category=category, title="Rasmli", slug="rasmli", price=Decimal(100))
+
+    def add_image(self, number, **kwargs):
+        return ProductImage.objects.create(product=self.product, image=f"blobs/ef/{number}{'0' * 39}.jpg", **kwargs)
+
+    def main_images(self):
+        return list(ProductImage.objects.filter(product=self.product, is_main=True).values_list("pk", flat=True))
+
+    def test_first_image_becomes_main(self):
+        first = self.add_image(1)
+        second = self.add_image(2)
+
+        self.assertEqual(self.main_images(), [first.pk])
+        second.refresh_from_db()
+        self.assertFalse(second.is_main)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.main_image_name, first.image.name)
+
+    def test_new_main_image_demotes_previous(self):
+        self.add_image(1)
+        second = self.add_image(2, is_main=True)
+
+        self.assertEqual(self.main_images(), [second.pk])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.main_image_name, second.image.name)
+
+    def test_constraint_rejects_second_main_image(self):
+        self.add_image(1)
+        second = self.add_image(2)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ProductImage.objects.filter(pk=second.pk).update(is_main=True)
+
+    def test_deleting_main_image_promotes_next(self):
+        first = self.add_image(1)
+        second = self.add_image(2)
+        third = self.add_image(3)
+
+        first.delete()
+        self.assertEqual(self.main_images(), [second.pk])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.main_image_name, second.image.name)
+
+        # Asosiy bo‘lmagan rasm o‘chirilsa asosiy rasm o‘zgarmaydi
+        third.delete()
+        self.assertEqual(self.main_images(), [second.pk])
+
+        second.delete()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.main_image_name, "")
+
+
+class MainImageConcurrencyTests(TransactionTestCase):
+
+    # Fayllar yozilmaydi — derivativlar rejalashtirilmaydi
+    @mock.patch("products.signals.schedule_derivatives")
+    def test_parallel_main_images_keep_single_main(self, schedule_derivatives):
+        category = Category.objects.create(name="Smartfonlar", slug="smartfonlar")
+        product = Product.objects.create(category=category, title="Rasmli", slug="rasmli", price=Decimal(100))
+
+        def add_main(number):
+            return lambda: ProductImage.objects.create(
+                product_id=product.pk, image=f"blobs/ef/{number}{'0' * 39}.jpg", is_main=True,
+            )
+
+        errors = run_concurrently(*(add_main(i) for i in range(4)))
+        self.assertEqual(errors, [])
+        self.assertEqual(ProductImage.objects.filter(product=product).count(), 4)
+        self.assertEqual(ProductImage.objects.filter(product=product, is_main=True).count(), 1)
+        product.refresh_from_db()
+        self.assertEqual(product.main_image_name, ProductImage.objects.get(product=product, is_main=True).image.name)
+
+
+class MediaBlobTests(TestCase):
+    """Kontent bo‘yicha saqlash: takrorlanmaslik, ref_count va gc_media_blobs (vaqtinchalik MEDIA_ROOT da)."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        category = Category.objects.create(name="Smartfonlar", slug="smartfonlar")
+        self.first = Product.objects.create(category=category, title="Birinchi", slug="birinchi", price=Decimal(100))
+        self.second = Product.objects.create(category=category, title="Ikkinchi", slug="ikkinchi", price=Decimal(100))
+
+    def add_image(self, product, content):
+        return ProductImage.objects.create(product=product, image=SimpleUploadedFile("rasm.JPG", content))
+
+    def ref_count(self, name):
+        return MediaBlob.objects.get(name=name).ref_count
+
+    def age(self, name, seconds=7200):
+        # Blob va uning fayli grace oralig‘idan eskiroq qilinadi
+        past = timezone.now() - timedelta(seconds=seconds)
+        MediaBlob.objects.filter(name=name).update(updated_at=past)
+        os.utime(content_addressed_storage.path(name), (past.timestamp(), past.timestamp()))
+
+    def gc(self, *args):
+        call_command("gc_media_blobs", *args, stdout=StringIO())
+
+    def test_same_content_is_stored_once(self):
+        first = self.add_image(self.first, b"bir xil baytlar")
+        second = self.add_image(self.second, b"bir xil baytlar")
+
+        name = first.image.name
+        self.assertEqual(second.image.name, name)
+        self.assertRegex(name, r"^blobs/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$")
+        self.assertEqual(len(os.listdir(os.path.dirname(content_addressed_storage.path(name)))), 1)
+        self.assertEqual(self.ref_count(name), 2)
+
+    def test_replace_and_delete_update_ref_count(self):
+        image = self.add_image(self.first, b"eski")
+        self.add_image(self.second, b"eski")
+        old_name = image.image.name
+
+        image.image = SimpleUploadedFile("yangi.jpg", b"yangi")
+        image.save()
+        self.assertEqual(self.ref_count(old_name), 1)
+        self.assertEqual(self.ref_count(image.image.name), 1)
+
+        # Faylga tegmaydigan saqlash hisoblagichni o‘zgartirmaydi
+        ProductImage.objects.get(pk=image.pk).save()
+        self.assertEqual(self.ref_count(image.image.name), 1)
+
+        new_name = image.image.name
+        image.delete()
+        self.assertEqual(self.ref_count(new_name), 0)
+        self.assertEqual(self.ref_count(old_name), 1)
+
+    def test_gc_deletes_only_old_orphans(self):
+        orphan = self.add_image(self.first, b"yetim")
+        fresh = self.add_image(self.first, b"yangi yetim")
+        used = self.add_image(self.second, b"ishlatilmoqda")
+        orphan_name, fresh_name, used_name = orphan.image.name, fresh.image.name, used.image.name
+        derivatives = content_addressed_storage.path(f"derivatives/{os.path.splitext(orphan_name)[0]}")
+        os.makedirs(derivatives)
+
+        orphan.delete()
+        fresh.delete()
+        self.age(orphan_name)
+        # Hisoblagich adashgan: rasm bor, lekin ref_count 0
+        MediaBlob.objects.filter(name=used_name).update(ref_count=0)
+        self.age(used_name)
+
+        self.gc()
+
+        self.assertFalse(content_addressed_storage.exists(orphan_name))
+        self.assertFalse(os.path.exists(derivatives))
+        self.assertFalse(MediaBlob.objects.filter(name=orphan_name).exists())
+        # Grace ichidagi blob va jadvalda ishlatilayotgan blob qoladi
+        self.assertTrue(content_addressed_storage.exists(fresh_name))
+        self.assertTrue(content_addressed_storage.exists(used_name))
+
+    def test_gc_keeps_reuploaded_blob(self):
+        image = self.add_image(self.first, b"qayta yuklanadi")
+        name = image.image.name
+        image.delete()
+        self.age(name)
+        # Storage mavjud blobni qayta yozmaydi, faqat mtime ni yangilaydi
+        content_addressed_storage.save("rasm.jpg", SimpleUploadedFile("rasm.jpg", b"qayta yuklanadi"))
+
+        self.gc()
+        self.assertTrue(content_addressed_storage.exists(name))
+
+    def test_full_gc_reconciles_counts_and_untracked_files(self):
+        image = self.add_image(self.first, b"ishlatilmoqda")
+        MediaBlob.objects.filter(name=image.image.name).update(ref_count=5)
+        untracked = content_addressed_storage.save("rasm.jpg", SimpleUploadedFile("rasm.jpg", b"yozuvsiz"))
+        self.age(untracked)
+
+        self.gc("--full")
+
+        self.assertEqual(self.ref_count(image.image.name), 1)
+        self.assertFalse(content_addressed_storage.exists(untracked))
+        self.assertTrue(content_addressed_storage.exists(image.image.name))
+
+
+class BundlePriceTests(TestCase):
+    """Bundle.total_price = mahsulot narxi + aksessuarlar - chegirma; signals orqali yuritiladi."""
+
+    def setUp(self):
+        category = Category.objects.create(name="Smartfonlar", slug="smartfonlar")
+        self.product = Product.objects.create(category=category, title="Telefon", slug="telefon", price=Decimal("1000.00"))
+        self.glass, self.case = (
+            AccessoryTarif.objects.create(name=name, price=price, type=kind)
+            for name, price, kind in (("Oyna", Decimal("30.00"), "glass"), ("G‘ilof", Decimal("50.00"), "case"))
+        )
+        self.bundle = Bundle.objects.create(product=self.product, name="VIP", discount=Decimal("20.00"))
+
+    def stored_total(self):
+        return Bundle.objects.values_list("total_price", flat=True).get(pk=self.bundle.pk)
+
+    def test_created_instance_has_total(self):
+        self.assertEqual(self.bundle.total_price, Decimal("980.00"))
+        self.assertEqual(self.stored_total(), Decimal("980.00"))
+
+    def test_accessories_set_recomputes_total(self):
+        self.bundle.accessories.set([self.glass, self.case])
+        self.assertEqual(self.bundle.total_price, Decimal("1060.00"))
+        self.assertEqual(self.stored_total(), Decimal("1060.00"))
+
+        self.bundle.accessories.set([self.case])
+        self.assertEqual(self.bundle.total_price, Decimal("1030.00"))
+
+        self.bundle.accessories.clear()
+        self.assertEqual(self.bundle.total_price, Decimal("980.00"))
+
+        # Teskari tomondan qo‘shish va tozalash
+        self.glass.bundle_set.add(self.bundle)
+        self.assertEqual(self.stored_total(), Decimal("1010.00"))
+        self.glass.bundle_set.clear()
+        self.assertEqual(self.stored_total(), Decimal("980.00"))
+
+    def test_accessory_price_and_delete_recompute_total(self):
+        self.bundle.accessories.set([self.glass, self.case])
+        self.glass.price = Decimal("40.00")
+        self.glass.save()
+        self.assertEqual(self.stored_total(), Decimal("1070.00"))
+
+        self.case.delete()
+        self.assertEqual(self.stored_total(), Decimal("1020.00"))
+
+    def test_product_price_and_discount_recompute_total(self):
+        self.bundle.accessories.set([self.glass])
+        self.product.price = Decimal("900.00")
+        self.product.save()
+        self.assertEqual(self.stored_total(), Decimal("910.00"))
+
+        self.bundle.discount = Decimal("1000.00")
+        self.bundle.save()
+        # Manfiy bo‘lmaydi
+        self.assertEqual(self.bundle.total_price, Decimal("0.00"))
+        self.assertEqual(self.stored_total(), Decimal("0.00"))
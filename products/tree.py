@@ -0,0 +1,140 @@
+"""
+Kategoriyalar daraxti (materialized path) bilan ishlash uchun yordamchi funksiyalar.
+
+Har bir kategoriyaning `path` maydonida ildizdan o‘zigacha bo‘lgan id lar saqlanadi:
+"0000000001/0000000007/". Avlodlar `path__startswith`, ajdodlar esa path'ni
+bo‘laklash orqali bitta so‘rovda topiladi.
+"""
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Concat, Greatest, Substr
+
+PATH_SEGMENT_LENGTH = 10
+
+
+def make_path(parent_path, pk):
+    return f"{parent_path}{pk:0{PATH_SEGMENT_LENGTH}d}/"
+
+
+def path_ids(path):
+    # "0000000001/0000000007/" -> [1, 7]
+    return [int(part) for part in path.split("/") if part]
+
+
+def _category_model():
+    from .models import Category
+    return Category
+
+
+def adjust_product_count(category_id, delta):
+    """
+    Mahsulot qo‘shilganda/ko‘chirilganda kategoriya va uning barcha ajdodlarining
+    `product_count` qiymatini F() orqali o‘zgartiradi.
+    """
+    if not category_id or not delta:
+        return
+    Category = _category_model()
+    path = Category.objects.filter(pk=category_id).values_list("path", flat=True).first()
+    if path:
+        Category.objects.filter(pk__in=path_ids(path)).update(
+            product_count=Greatest(F("product_count") + delta, 0)
+        )
+
+
+def adjust_sub_count(category_id, delta):
+    if not category_id or not delta:
+        return
+    _category_model().objects.filter(pk=category_id).update(sub_count=Greatest(F("sub_count") + delta, 0))
+
+
+def move_subtree(category, new_path):
+    """
+    Kategoriyani (va butun sub-daraxtini) yangi path'ga ko‘chiradi.
+    Eski ajdodlardan sub-daraxtdagi mahsulotlar soni ayriladi, yangilariga qo‘shiladi.
+    """
+    Category = _category_model()
+    old_path = category.path
+    new_depth = len(path_ids(new_path)) - 1
+
+    if not old_path:
+        Category.objects.filter(pk=category.pk).update(path=new_path, depth=new_depth)
+    else:
+        product_count = Category.objects.values_list("product_count", flat=True).get(pk=category.pk)
+        Category.objects.filter(path__startswith=old_path).update(
+            path=Concat(Value(new_path), Substr("path", len(old_path) + 1)),
+            depth=F("depth") + (new_depth - category.depth),
+        )
+        if product_count:
+            Category.objects.filter(pk__in=path_ids(old_path)[:-1]).update(
+                product_count=Greatest(F("product_count") - product_count, 0)
+            )
+            Category.objects.filter(pk__in=path_ids(new_path)[:-1]).update(
+                product_count=F("product_count") + product_count
+            )
+
+    category.path = new_path
+    category.depth = new_depth
+
+
+def build_tree(nodes):
+    """
+    Tekis ro‘yxatdan (har bir tugunda "id" va "parent" bor) ichma-ich daraxt yasaydi.
+    `nodes` ota-ona bolalaridan oldin keladigan tartibda bo‘lishi kerak (depth bo‘yicha).
+    Ota-onasi ro‘yxatda bo‘lmagan (masalan, nofaol) tugunlar tashlab yuboriladi.
+    """
+    by_id = {}
+    roots = []
+    for node in nodes:
+        node["children"] = []
+        parent_id = node["parent"]
+        if parent_id is None:
+            roots.append(node)
+        elif parent_id in by_id:
+            by_id[parent_id]["children"].append(node)
+        else:
+            continue
+        by_id[node["id"]] = node
+    return roots
+
+
+def rebuild_category_tree():
+    """
+    Path, depth va saqlangan sonlarni noldan qayta hisoblaydi (`rebuild_category_tree` buyrug‘i).
+    0006 migratsiyasida shu funksiyaning o‘z nusxasi bor.
+    """
+    from .models import Category, Product
+
+    parents = dict(Category.objects.values_list("pk", "parent_id"))
+    paths = {}
+
+    def resolve(pk, seen=()):
+        if pk not in paths:
+            parent_id = parents[pk]
+            if parent_id is None or parent_id in seen:
+                paths[pk] = make_path("", pk)
+            else:
+                paths[pk] = make_path(resolve(parent_id, seen + (pk,)), pk)
+        return paths[pk]
+
+    categories = list(Category.objects.only("pk", "path", "depth"))
+    for category in categories:
+        category.path = resolve(category.pk)
+        category.depth = len(path_ids(category.path)) - 1
+    Category.objects.bulk_update(categories, ["path", "depth"], batch_size=500)
+
+    Category.objects.update(
+        product_count=Coalesce(
+            Subquery(
+                Product.objects.filter(is_available=True, category__path__startswith=OuterRef("path"))
+                .order_by().values("is_available").annotate(total=Count("pk")).values("total")
+            ),
+            0,
+        ),
+        sub_count=Coalesce(
+            Subquery(
+                Category.objects.filter(parent_id=OuterRef("pk"), is_active=True)
+                .order_by().values("parent_id").annotate(total=Count("pk")).values("total")
+            ),
+            0,
+        ),
+    )
+    return len(categories)
@@ -1,6 +1,7 @@
 from django.urls import path
 from .views import (
     CategoryListAPIView,
+    CategoryTreeAPIView,
     CategoryDetailAPIView,
     ProductListAPIView,
     ProductDetailAPIView,
@@ -13,6 +14,9 @@ urlpatterns = [
     # Kategoriyalar ro‘yxati (faol bo‘lganlar)
     path('categories/', CategoryListAPIView.as_view(), name='category-list'),
 
+    # Kategoriyalar daraxti (navigatsiya menyusi uchun)
+    path('categories/tree/', CategoryTreeAPIView.as_view(), name='category-tree'),
+
     # Bitta kategoriya va unga tegishli mahsulotlar
     path('categories/<slug:slug>/', CategoryDetailAPIView.as_view(), name='category-detail'),
 
@@ -2,81 +2,212 @@ from rest_framework import status, generics
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from django.core.cache import cache
 from django.shortcuts import get_object_or_404
-from django.db.models import Q, Count
-from .models import Category, Product, Accessory
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from .cache import catalog_cache_key, get_catalog_cache_timeout
+from .conditional import catalog_etag, catalog_last_modified, product_detail_etag, product_detail_last_modified
+from .facets import compute_facets, selected_filters
+from .filters import FACET_FIELDS, ProductFilter
+from .models import Category, Product, Accessory, SimilarProduct
+from .search import search_products
+from .similarity import SIMILAR_TOP_K
+from .tree import build_tree
 from .serializers import (
     CategorySerializer,
     ProductSerializer,
     ProductDetailSerializer, AccessoryTarifSerializer, AccessorySerializer,
 )
-from rest_framework.pagination import PageNumberPagination
-
-
-#  Custom pagination
-class StandardResultsSetPagination(PageNumberPagination):
-    page_size = 12  # Default page size
-    page_size_query_param = "page_size"  # Frontenddan o‘zgartirish mumkin
-    max_page_size = 100  # Limit
+from .pagination import StandardResultsSetPagination, KeysetPagination
 
+# Ruxsat etilgan sortirovkalar: query parametri -> model maydoni
+PRODUCT_ORDERINGS = {
+    "-created_at": "-created_at",
+    "created_at": "created_at",
+    "price": "price",
+    "-price": "-price",
+    "likes": "-likes_count",
+}
 
 
 class CategoryListAPIView(generics.ListAPIView):
     """
     Barcha faol kategoriyalarni chiqaradi.
-    Har bir categoryda nechta subcategory borligi va product soni ham chiqadi.
+    Har bir categoryda nechta subcategory borligi va product soni ham chiqadi
+    (saqlangan ustunlardan, sub-kategoriyalardagi mahsulotlar bilan birga).
     """
-    queryset = Category.objects.filter(is_active=True).annotate(product_count=Count("products"))
+    queryset = Category.objects.filter(is_active=True)
     serializer_class = CategorySerializer
     permission_classes = [AllowAny]
     pagination_class = None  # To‘liq ro‘yxat
 
-class CategoryDetailAPIView(APIView):
+    # ETag/Last-Modified katalog versiyasidan — o‘zgarish bo‘lmasa 304, so‘rovlarsiz
+    @method_decorator(condition(etag_func=catalog_etag("category-list"), last_modified_func=catalog_last_modified))
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class CategoryTreeAPIView(APIView):
+    """
+    Faol kategoriyalarning to‘liq ichma-ich daraxti (navigatsiya menyusi uchun).
+    Bitta so‘rov bilan olinadi va katalog versiyasi bo‘yicha keshlanadi.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        cache_key = catalog_cache_key("category-tree", request, ())
+        data = cache.get(cache_key)
+        if data is None:
+            categories = Category.objects.filter(is_active=True).order_by('depth', 'order', 'name')
+            nodes = CategorySerializer(categories, many=True, context={"request": request}).data
+            data = build_tree([dict(node) for node in nodes])
+            cache.set(cache_key, data, get_catalog_cache_timeout())
+        return Response(data)
+
+class ProductListingMixin:
+    """
+    Mahsulot ro‘yxatlari uchun umumiy qism: pagination (sahifa yoki keyset),
+    sortirovka va prefetch rejasi — so‘rovlar soni mahsulotlar soniga bog‘liq emas.
+    """
+    serializer_class = ProductSerializer
+    pagination_class = StandardResultsSetPagination
+    # ?pagination=cursor — cheksiz skroll uchun keyset pagination
+    keyset_pagination_class = KeysetPagination
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            params = self.request.query_params
+            if params.get("pagination") == "cursor" or "cursor" in params:
+                self._paginator = self.keyset_pagination_class()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def get_ordering(self):
+        return PRODUCT_ORDERINGS.get(self.request.query_params.get("ordering"))  # price, -price, created_at, likes
+
+    def get_keyset_ordering(self):
+        # Sahifa va cursor rejimlari uchun umumiy tartib (order_products), ?ordering bo‘lmasa eng yangilari
+        return self.get_ordering() or "-created_at"
+
+    def get_product_queryset(self):
+        return Product.objects.filter(is_available=True).select_related('category').prefetch_related('images')
+
+    def serialize_product_page(self, queryset):
+        """
+        Joriy sahifani tez rejimda serializatsiya qiladi: values() qatorlari + bitta rasm so‘rovi.
+        Natija ProductSerializer bilan bayt-ma-bayt bir xil.
+        """
+        # Keyset cursor i annotatsiya bo‘yicha bo‘lsa, u ham qatorlarga olinadi
+        extra = ("search_rank",) if "search_rank" in queryset.query.annotations else ()
+        page = self.paginate_queryset(ProductSerializer.fast_queryset(queryset, *extra))
+        return ProductSerializer.fast_data(page, self.request)
+
+    def order_products(self, queryset):
+        # Teng qiymatlarda tartib barqaror bo‘lishi uchun id qo‘shiladi — keyset va eksport bilan bir xil
+        ordering = self.get_keyset_ordering()
+        return queryset.order_by(ordering, "-id" if ordering.startswith("-") else "id")
+
+
+class CategoryDetailAPIView(ProductListingMixin, generics.GenericAPIView):
     """
-    Category slug orqali chiqadi (subcategories va products bilan birga)
+    Category slug orqali chiqadi (products sahifalangan holda, sortirovka bilan).
+    Sub-kategoriyalardagi mahsulotlar ham chiqadi.
     """
     permission_classes = [AllowAny]
 
     def get(self, request, slug):
         category = get_object_or_404(Category, slug=slug, is_active=True)
-        products = category.products.filter(is_available=True)
+        products = self.order_products(
+            self.get_product_queryset().filter(category__path__startswith=category.path)
+        )
+
+        paginated = self.get_paginated_response(self.serialize_product_page(products)).data
         serializer = CategorySerializer(category, context={"request": request})
-        product_serializer = ProductSerializer(products, many=True, context={"request": request})
         return Response({
             "category": serializer.data,
-            "products": product_serializer.data
+            **{key: value for key, value in paginated.items() if key != "results"},
+            "products": paginated["results"],
         })
 
 
-
-class ProductListAPIView(generics.ListAPIView):
+class ProductListAPIView(ProductListingMixin, generics.ListAPIView):
     """
     Barcha productlar — filter, qidiruv, sortirovka bilan.
+    Javobda joriy filtr uchun facet sonlari va narx gistogrammasi ham qaytadi.
+    Javob katalog versiyasi bo‘yicha keshlanadi (products/cache.py).
     """
-    serializer_class = ProductSerializer
     permission_classes = [AllowAny]
-    pagination_class = StandardResultsSetPagination
+    filterset_class = ProductFilter
+    # Facetlar natijasiga ta’sir qiladigan parametrlar (sahifa va sortirovkasiz)
+    facet_query_params = ("category", "search", "min_price", "max_price") + FACET_FIELDS
+    # Kesh kalitiga kiradigan query parametrlar
+    cache_query_params = facet_query_params + (
+        "ordering", "page", "page_size", "pagination", "cursor", "with_count",
+    )
+
+    @method_decorator(condition(
+        etag_func=catalog_etag("product-list", cache_query_params), last_modified_func=catalog_last_modified,
+    ))
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        cache_key = catalog_cache_key("product-list", request, self.cache_query_params)
+        data = cache.get(cache_key)
+        if data is not None:
+            return Response(data)
+
+        base = self.get_queryset()
+        queryset = self.filter_queryset(base)
+        response = self.get_paginated_response(self.serialize_product_page(queryset))
+        response.data["facets"] = self.get_facets(base)
+
+        cache.set(cache_key, response.data, get_catalog_cache_timeout())
+        return response
+
+    def get_keyset_ordering(self):
+        # Qidiruvda relevantlik bo‘yicha, xuddi sahifa rejimidagidek
+        if not self.get_ordering() and self.request.query_params.get("search"):
+            return "-search_rank"
+        return super().get_keyset_ordering()
+
+    def get_facets(self, queryset):
+        """
+        Facetlar sahifadan mustaqil — har bir filtr kombinatsiyasi uchun alohida keshlanadi.
+        `queryset` — ProductFilter qo‘llanmagan natija: har bir facet o‘z filtrisiz sanaladi.
+        """
+        cache_key = catalog_cache_key("product-facets", self.request, self.facet_query_params)
+        facets = cache.get(cache_key)
+        if facets is None:
+            filterset = ProductFilter(self.request.query_params, queryset=queryset)
+            filters = selected_filters(filterset.form.cleaned_data) if filterset.is_valid() else {}
+            facets = compute_facets(queryset, filters)
+            cache.set(cache_key, facets, get_catalog_cache_timeout())
+        return facets
 
     def get_queryset(self):
-        queryset = Product.objects.filter(is_available=True).select_related('category').prefetch_related('images', 'likes')
+        queryset = self.get_product_queryset()
 
         category_slug = self.request.query_params.get("category")
         search = self.request.query_params.get("search")
-        ordering = self.request.query_params.get("ordering")  # price, -price, created_at, -likes
 
         if category_slug:
-            queryset = queryset.filter(category__slug=category_slug)
+            # Kategoriya va uning barcha sub-kategoriyalaridagi mahsulotlar
+            category_path = Category.objects.filter(slug=category_slug).values_list("path", flat=True).first()
+            if category_path:
+                queryset = queryset.filter(category__path__startswith=category_path)
+            else:
+                queryset = queryset.none()
 
         if search:
-            queryset = queryset.filter(Q(title__icontains=search) | Q(short_description__icontains=search))
-
-        if ordering:
-            if ordering == "likes":
-                queryset = queryset.annotate(likes_count=Count("likes")).order_by("-likes_count")
-            else:
-                queryset = queryset.order_by(ordering)
+            # PostgreSQL full-text search (GIN indeks), natija relevantlik bo‘yicha
+            queryset = search_products(queryset, search)
 
-        return queryset
+        # Qidiruvda ?ordering bo‘lmasa relevantlik bo‘yicha (get_keyset_ordering)
+        return self.order_products(queryset)
 
 class ProductDetailAPIView(APIView):
     """
@@ -84,8 +215,10 @@ class ProductDetailAPIView(APIView):
     """
     permission_classes = [AllowAny]
 
+    # Validatorlar bitta yengil so‘rovdan (updated_at, likes_count) va katalog versiyasidan
+    @method_decorator(condition(etag_func=product_detail_etag, last_modified_func=product_detail_last_modified))
     def get(self, request, slug):
-        product = get_object_or_404(Product, slug=slug, is_available=True)
+        product = get_object_or_404(Product.objects.with_detail_relations(), slug=slug, is_available=True)
         serializer = ProductDetailSerializer(product, context={"request": request})
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -97,18 +230,11 @@ class ProductLikeAPIView(APIView):
 
     def post(self, request, slug):
         product = get_object_or_404(Product, slug=slug)
-        user = request.user
-
-        if product.likes.filter(id=user.id).exists():
-            product.likes.remove(user)
-            liked = False
-        else:
-            product.likes.add(user)
-            liked = True
+        liked, likes_count = product.toggle_like(request.user)
 
         return Response({
             "liked": liked,
-            "likes_count": product.likes.count()
+            "likes_count": likes_count
         }, status=status.HTTP_200_OK)
 
 
@@ -128,14 +254,20 @@ class AccessoryListAPIView(generics.ListAPIView):
 
 class SimilarProductAPIView(APIView):
     """
-    Mahsulotga o‘xshash boshqa mahsulotlar (kategoriya bo‘yicha)
+    Mahsulotga o‘xshash boshqa mahsulotlar — oldindan hisoblangan top-K jadvalidan
+    (kategoriya, ishlab chiqaruvchi, OS, narx, xotira va birga like qilinganlik bo‘yicha).
     """
+    @method_decorator(condition(etag_func=catalog_etag("similar-products"), last_modified_func=catalog_last_modified))
     def get(self, request, product_id):
-        try:
-            product = Product.objects.get(id=product_id)
-        except Product.DoesNotExist:
+        links = (
+            SimilarProduct.objects.filter(product_id=product_id, similar__is_available=True)
+            .select_related('similar__category')
+            .prefetch_related('similar__images')
+            .order_by('rank')[:SIMILAR_TOP_K]
+        )
+        similar_products = [link.similar for link in links]
+        if not similar_products and not Product.objects.filter(id=product_id).exists():
             return Response({"error": "Mahsulot topilmadi"}, status=404)
 
-        similar_products = Product.objects.filter(category=product.category).exclude(id=product.id)
         serializer = ProductSerializer(similar_products, many=True, context={"request": request})
         return Response(serializer.data)
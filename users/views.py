@@ -13,6 +13,9 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
+from django.db import transaction
+from orders.cart_storage import get_anonymous_cart_store
+from orders.utils import merge_session_cart
 
 
 class RegisterView(generics.CreateAPIView):
@@ -48,6 +51,12 @@ class LoginView(generics.GenericAPIView):
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data["user"]
 
+        # Login dan oldin (sessiya bo‘yicha) yig‘ilgan savat: keshdan bazaga yoziladi va
+        # foydalanuvchi savatiga qo‘shiladi
+        with transaction.atomic():
+            get_anonymous_cart_store(request).persist()
+            merge_session_cart(request, user)
+
         refresh = RefreshToken.for_user(user)
 
         return Response({